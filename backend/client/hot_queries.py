@@ -0,0 +1,14 @@
+"""Hot queries of the tracking endpoints (see database.hot_queries)."""
+from database.hot_queries import register
+
+from . import tracking
+
+
+@register('tracking: packages by tracking number')
+def packages(sample):
+    return tracking.package_rows([sample.tracking_number])
+
+
+@register("tracking: owner with latest shipment")
+def owners(sample):
+    return tracking.client_rows([sample.client_id])
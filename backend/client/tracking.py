@@ -0,0 +1,325 @@
+"""
+Cached lookups behind the public tracking endpoint (client.views.track).
+
+A tracking result is built from two cache entries:
+
+- ``package:<tracking number>``: the package, its owner and its shipment;
+- ``client:<client id>``: the owner's e-mail and latest shipment.
+
+Splitting them keeps invalidation cheap: a shipment write drops one entry of
+each kind, however many packages its client owns.
+
+Each entry is looked up in a bounded per-process LRU first
+(``TRACKING_CACHE_LOCAL_SIZE`` entries kept ``TRACKING_CACHE_LOCAL_TTL``
+seconds), then in the Django cache ``TRACKING_CACHE`` (an alias of CACHES)
+for ``TRACKING_CACHE_TTL`` seconds. Writes to Shipment, Package and Client
+delete the affected entries after commit, from the shared cache and from
+this process's LRU; other processes' LRUs expire on their short TTL.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save
+
+from database import history
+from database.models import Client, Package, Shipment
+from database.signals import shipments_imported, shipments_updated
+
+
+DEFAULT_TTL = 300
+DEFAULT_LOCAL_TTL = 5
+DEFAULT_LOCAL_SIZE = 10000
+KEY_PREFIX = 'tracking'
+
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def _count(name, n=1):
+    with _counters_lock:
+        _counters[name] += n
+
+
+class LRUCache:
+    """Thread-safe LRU of at most ``maxsize`` entries, each kept ``ttl`` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+local_cache = LRUCache(
+    getattr(settings, 'TRACKING_CACHE_LOCAL_SIZE', DEFAULT_LOCAL_SIZE),
+    getattr(settings, 'TRACKING_CACHE_LOCAL_TTL', DEFAULT_LOCAL_TTL),
+)
+
+
+def get_cache():
+    return caches[getattr(settings, 'TRACKING_CACHE', 'default')]
+
+
+def get_ttl():
+    return getattr(settings, 'TRACKING_CACHE_TTL', DEFAULT_TTL)
+
+
+def package_key(number):
+    # Tracking numbers come from the query string: hash them into a key
+    # every cache backend accepts.
+    digest = hashlib.sha1(str(number).encode()).hexdigest()
+    return f'{KEY_PREFIX}:package:{digest}'
+
+
+def client_key(client_id):
+    return f'{KEY_PREFIX}:client:{client_id}'
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def package_entry(pkg, timelines):
+    """Package part of a tracking result (``pkg.shipment`` must be loaded).
+
+    ``timelines`` maps shipment ids to their status history (ShipmentEvent
+    rows, oldest first).
+    """
+    shipment = getattr(pkg, 'shipment', None)
+    return {
+        'tracking': pkg.tracking_number,
+        'client_id': pkg.client_id,
+        'date_creation': _isoformat(pkg.date_creation),
+        'shipment': shipment and {
+            'shipment_date': _isoformat(shipment.shipment_date),
+            'date_creation': _isoformat(shipment.date_creation),
+            'history': [
+                {'status': event.status, 'date': _isoformat(event.timestamp)}
+                for event in timelines.get(shipment.pk, ())
+            ],
+        },
+    }
+
+
+def package_rows(numbers):
+    # One query: packages joined to their shipment.
+    return (
+        Package.objects.filter(tracking_number__in=numbers)
+        .select_related('shipment')
+        .only(
+            'tracking_number', 'client_id', 'date_creation',
+            'shipment__shipment_date', 'shipment__date_creation',
+        )
+    )
+
+
+def client_rows(client_ids):
+    # One query: the latest shipment of each client through subqueries.
+    latest = Shipment.objects.filter(package__client_id=OuterRef('pk')).order_by('-date_creation')
+    return (
+        Client.objects.filter(pk__in=client_ids)
+        .annotate(
+            latest_statut=Subquery(latest.values('statut')[:1]),
+            latest_date=Subquery(latest.values('date_creation')[:1]),
+        )
+        .only('email')
+    )
+
+
+def client_entry(client):
+    """Owner part of a tracking result, from a ``client_rows()`` row."""
+    latest = None
+    if client.latest_statut is not None:
+        latest = {'statut': client.latest_statut, 'date_creation': _isoformat(client.latest_date)}
+    return {'id': client.pk, 'email': client.email, 'latest_shipment': latest}
+
+
+async def _load_packages(numbers):
+    packages = [pkg async for pkg in package_rows(numbers)]
+    # One more query for every timeline (index range scans).
+    shipment_ids = [pkg.shipment.pk for pkg in packages if getattr(pkg, 'shipment', None)]
+    timelines = defaultdict(list)
+    if shipment_ids:
+        async for event in history.timeline(shipment_ids).only('shipment_id', 'status', 'timestamp'):
+            timelines[event.shipment_id].append(event)
+    return {pkg.tracking_number: package_entry(pkg, timelines) for pkg in packages}
+
+
+async def _load_clients(client_ids):
+    return {client.pk: client_entry(client) async for client in client_rows(client_ids)}
+
+
+async def _aget_many(ids, make_key, load):
+    """Batch two-level lookup: {id: value} for the ids found.
+
+    ``load(missing_ids)`` is a coroutine function returning {id: value}; it
+    runs once, for the ids missing from both cache levels.
+    """
+    ids = list(dict.fromkeys(ids))
+    ttl = get_ttl()
+    if not ttl:
+        return await load(ids)
+
+    found = {}
+    keys = {}
+    for id_ in ids:
+        key = make_key(id_)
+        value = local_cache.get(key)
+        if value is None:
+            keys[key] = id_
+        else:
+            found[id_] = value
+    _count('local_hits', len(found))
+    if not keys:
+        return found
+
+    cache = get_cache()
+    shared = await cache.aget_many(keys)
+    _count('shared_hits', len(shared))
+    for key, value in shared.items():
+        found[keys.pop(key)] = value
+        local_cache.set(key, value)
+
+    if keys:
+        _count('misses', len(keys))
+        loaded = await load(list(keys.values()))
+        await cache.aset_many({make_key(id_): value for id_, value in loaded.items()}, ttl)
+        for id_, value in loaded.items():
+            local_cache.set(make_key(id_), value)
+        found.update(loaded)
+    return found
+
+
+async def aget_packages(numbers):
+    """{tracking number: package part} for the known ``numbers``."""
+    return await _aget_many(numbers, package_key, _load_packages)
+
+
+async def aget_clients(client_ids):
+    """{client id: owner part (e-mail, latest shipment)} for the known ids."""
+    return await _aget_many(client_ids, client_key, _load_clients)
+
+
+async def aget_package(number):
+    """Package part of a tracking result, or None when ``number`` is unknown."""
+    return (await aget_packages([number])).get(number)
+
+
+async def aget_client(client_id):
+    """Owner part of a tracking result, or None."""
+    return (await aget_clients([client_id])).get(client_id)
+
+
+def invalidate(tracking_numbers=(), client_ids=()):
+    keys = [package_key(number) for number in tracking_numbers if number]
+    keys.extend(client_key(client_id) for client_id in client_ids if client_id)
+    if not keys:
+        return
+    local_cache.delete_many(keys)
+    get_cache().delete_many(keys)
+    _count('invalidations')
+
+
+def stats():
+    with _counters_lock:
+        counters = dict(_counters)
+    lookups = sum(counters.get(name, 0) for name in ('local_hits', 'shared_hits', 'misses'))
+    hits = counters.get('local_hits', 0) + counters.get('shared_hits', 0)
+    return {
+        'local_hits': counters.get('local_hits', 0),
+        'shared_hits': counters.get('shared_hits', 0),
+        'misses': counters.get('misses', 0),
+        'invalidations': counters.get('invalidations', 0),
+        'hit_ratio': round(hits / lookups, 4) if lookups else None,
+        'local_size': len(local_cache),
+        'ttl': get_ttl(),
+    }
+
+
+def reset():
+    """Clear this process's LRU and counters (the shared cache is kept)."""
+    local_cache.clear()
+    with _counters_lock:
+        _counters.clear()
+
+
+# =========================
+#     INVALIDATION
+# =========================
+def _invalidate_packages(package_ids):
+    """Invalidate the entries of the given packages and of their owners."""
+    rows = Package.objects.filter(pk__in=package_ids).values_list('tracking_number', 'client_id')
+    numbers = [number for number, _ in rows]
+    client_ids = {client_id for _, client_id in rows}
+    invalidate(numbers, client_ids)
+
+
+def _on_shipment_change(sender, instance, **kwargs):
+    package_ids = {instance.package_id}
+    # The shipment may have moved from another package.
+    package_ids.add(getattr(instance, '_loaded_values', {}).get('package_id'))
+    package_ids.discard(None)
+    transaction.on_commit(lambda: _invalidate_packages(package_ids))
+
+
+def _on_shipments_written(sender, shipments, **kwargs):
+    package_ids = {shipment.package_id for shipment in shipments}
+    transaction.on_commit(lambda: _invalidate_packages(package_ids))
+
+
+def _on_package_change(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    numbers = {instance.tracking_number, loaded.get('tracking_number')}
+    client_ids = {instance.client_id, loaded.get('client_id')}
+    transaction.on_commit(lambda: invalidate(numbers, client_ids))
+
+
+def _on_client_change(sender, instance, **kwargs):
+    client_id = instance.pk
+    transaction.on_commit(lambda: invalidate(client_ids=[client_id]))
+
+
+def connect_signals():
+    for signal, name in ((post_save, 'save'), (post_delete, 'delete')):
+        signal.connect(_on_shipment_change, sender=Shipment, dispatch_uid=f'tracking_shipment_{name}')
+        signal.connect(_on_package_change, sender=Package, dispatch_uid=f'tracking_package_{name}')
+        signal.connect(_on_client_change, sender=Client, dispatch_uid=f'tracking_client_{name}')
+    shipments_imported.connect(_on_shipments_written, dispatch_uid='tracking_shipments_imported')
+    shipments_updated.connect(_on_shipments_written, dispatch_uid='tracking_shipments_updated')
@@ -12,6 +12,7 @@ urlpatterns = [
     path('dashboard/', views.client, name='client_dashboard'),
     # Track endpoint used by frontend (moved from /api/track/)
     path('track/', views.track, name='client_track'),
+    path('track/batch/', views.track_batch, name='client_track_batch'),
     # Client auth endpoint (moved from /api/auth/client/login/)
     path('auth/client/login/', views.client_login, name='client_auth_login'),
 ]
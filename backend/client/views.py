@@ -2,12 +2,22 @@ from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST, require_GET
 from django.core.serializers.json import DjangoJSONEncoder
+import json
 import logging
+import re
 
-from database.models import Client, Package, Shipment, Invoice, Reclamation
+from database.models import Client, Shipment, Invoice, Reclamation, STATUS_CHOICES
+from database import tokens
+from . import tracking
 from django.db.models import Q
 
 
+# Tracking numbers accepted by one track_batch request.
+TRACK_BATCH_MAX_SIZE = 100
+
+STATUS_LABELS = {**dict(STATUS_CHOICES), 'FAILED': 'Failed'}
+
+
 def client(request):
   
 
@@ -16,11 +26,10 @@ def client(request):
 
 def my_shipments(request):
  
-    context = {'active_tab': 'shipments', 'shipments': [], 'stats': {}}
+    context = {'active_tab': 'shipments', 'shipments': [], 'stats': {}, 'api_token': tokens.token_for(request, 'client')}
 
     try:
-        role = request.session.get('role')
-        user_id = request.session.get('user_id')
+        role, user_id = tokens.request_identity(request)
         if role != 'client' or not user_id:
             # not a logged-in client — render page but without shipments
             return render(request, 'client.html', context)
@@ -95,11 +104,10 @@ def my_shipments(request):
 
 def invoices(request):
     """Render the client portal with the Invoices tab active."""
-    context = {'active_tab': 'invoices', 'stats': {}, 'invoices': [], 'shipments': []}
+    context = {'active_tab': 'invoices', 'stats': {}, 'invoices': [], 'shipments': [], 'api_token': tokens.token_for(request, 'client')}
 
     try:
-        role = request.session.get('role')
-        user_id = request.session.get('user_id')
+        role, user_id = tokens.request_identity(request)
         if role != 'client' or not user_id:
             return render(request, 'client.html', context)
 
@@ -167,10 +175,9 @@ def invoices(request):
 
 def support(request):
     """Render the client portal with the Support tab active."""
-    context = {'active_tab': 'support', 'stats': {}}
+    context = {'active_tab': 'support', 'stats': {}, 'api_token': tokens.token_for(request, 'client')}
     try:
-        role = request.session.get('role')
-        user_id = request.session.get('user_id')
+        role, user_id = tokens.request_identity(request)
         if role == 'client' and user_id:
             client_obj = Client.objects.filter(pk=user_id).first()
             if client_obj:
@@ -204,35 +211,83 @@ def client_login(request):
     if client.check_password(password):
         request.session['role'] = 'client'
         request.session['user_id'] = client.id_client
-        return JsonResponse({'success': True, 'role': 'client'})
+        return JsonResponse({
+            'success': True,
+            'role': 'client',
+            'token': tokens.issue('client', client.id_client),
+            'expires_in': tokens.max_age(),
+        })
 
     return JsonResponse({'success': False}, status=401)
 
 
+def _tracking_result(pkg, owner):
+    """Tracking payload from the cached package and owner parts (see client.tracking)."""
+    shipment = pkg['shipment']
+    latest_shipment_for_client = owner['latest_shipment'] if owner else None
+
+    events = []
+    if pkg['date_creation']:
+        events.append({'description': 'Package created', 'date': pkg['date_creation']})
+
+    if shipment:
+        ev_date = shipment['shipment_date'] or shipment['date_creation']
+        events.append({'description': 'Shipment record created', 'date': ev_date})
+        # Status timeline from the shipment history (database.history)
+        for step in shipment['history']:
+            events.append({
+                'description': f"Status: {STATUS_LABELS.get(step['status'], step['status'])}",
+                'date': step['date'],
+                'status': step['status'],
+            })
+
+    if latest_shipment_for_client:
+        events.append({'description': f"Latest shipment status: {latest_shipment_for_client['statut']}", 'date': latest_shipment_for_client['date_creation']})
+
+    if latest_shipment_for_client and latest_shipment_for_client['statut'] == 'DELIVERED':
+        status = 'Delivered'
+        progress = 100
+    elif shipment:
+        status = 'In Transit'
+        progress = 60
+    else:
+        status = 'Created'
+        progress = 5
+
+    response = {
+        'tracking': pkg['tracking'],
+        'status': status,
+        'estimated_delivery': shipment['shipment_date'] if shipment else None,
+        'progress': progress,
+        'events': events,
+        'client': {'id': pkg['client_id'], 'email': owner['email'] if owner else None}
+    }
+
+    return response
+
+
 @require_GET
-def track(request):
-    """Return basic tracking information for a package (moved to client app)."""
+async def track(request):
+    """Return basic tracking information for a package (async, cached, see client.tracking)."""
     number = request.GET.get('number') or request.GET.get('tracking')
-    logging.getLogger('api.track').info('Track request received, params=%s', request.GET.dict())
+    logging.getLogger('api.track').debug('Track request received, params=%s', request.GET.dict())
     if not number:
         return JsonResponse({'error': 'missing_number'}, status=400)
 
-    try:
-        pkg = Package.objects.get(tracking_number=number)
-    except Package.DoesNotExist:
+    pkg = await tracking.aget_package(number)
+    if pkg is None:
         return JsonResponse({'error': 'not_found'}, status=404)
 
     
     try:
-        role = request.session.get('role')
-        user_id = request.session.get('user_id')
+        role, user_id = await tokens.arequest_identity(request)
         if role == 'client' and user_id is not None:
           
             try:
-                if str(user_id) != str(pkg.client.id_client):
+                if str(user_id) != str(pkg['client_id']):
                     logging.getLogger('api.track').warning(
                         'Client %s attempted to access package %s owned by %s',
-                        user_id, pkg.tracking_number, pkg.client.id_client
+                        user_id, pkg['tracking'], pkg['client_id']
                     )
                     return JsonResponse({'error': 'forbidden'}, status=403)
             except Exception:
@@ -244,42 +299,54 @@ def track(request):
         logging.getLogger('api.track').exception('Error while authorizing track request')
         return JsonResponse({'error': 'forbidden'}, status=403)
 
-    shipment = None
-    try:
-        shipment = pkg.shipment
-    except Shipment.DoesNotExist:
-        shipment = None
-
-    latest_shipment_for_client = Shipment.objects.filter(package__client=pkg.client).order_by('-date_creation').first()
-
-    events = []
-    if pkg.date_creation:
-        events.append({'description': 'Package created', 'date': pkg.date_creation.isoformat()})
-
-    if shipment:
-        ev_date = shipment.shipment_date.isoformat() if shipment.shipment_date else shipment.date_creation.isoformat()
-        events.append({'description': 'Shipment record created', 'date': ev_date})
-
-    if latest_shipment_for_client:
-        events.append({'description': f'Latest shipment status: {latest_shipment_for_client.statut}', 'date': latest_shipment_for_client.date_creation.isoformat()})
+    owner = await tracking.aget_client(pkg['client_id'])
+    response = _tracking_result(pkg, owner)
+    return JsonResponse(response, encoder=DjangoJSONEncoder)
 
-    if latest_shipment_for_client and latest_shipment_for_client.statut == 'DELIVERED':
-        status = 'Delivered'
-        progress = 100
-    elif shipment:
-        status = 'In Transit'
-        progress = 60
-    else:
-        status = 'Created'
-        progress = 5
 
-    response = {
-        'tracking': pkg.tracking_number,
-        'status': status,
-        'estimated_delivery': shipment.shipment_date.isoformat() if shipment and shipment.shipment_date else None,
-        'progress': progress,
-        'events': events,
-        'client': {'id': pkg.client.id_client, 'email': pkg.client.email}
+@require_POST
+async def track_batch(request):
+    """Track several packages at once.
+
+    Body: JSON ``{"numbers": [...]}`` or a ``numbers`` form field (comma or
+    newline separated), at most TRACK_BATCH_MAX_SIZE numbers. Returns
+    ``{"results": {number: payload}}`` where payload is what ``track``
+    returns, or ``{"error": "not_found" | "forbidden"}``.
+    """
+    try:
+        if request.content_type == 'application/json':
+            numbers = json.loads(request.body).get('numbers')
+        else:
+            numbers = re.split(r'[\s,]+', request.POST.get('numbers', ''))
+        if not isinstance(numbers, list) or not all(isinstance(n, str) for n in numbers):
+            raise ValueError('numbers: expected a list of tracking numbers')
+        numbers = list(dict.fromkeys(n.strip() for n in numbers if n.strip()))
+        if not numbers:
+            raise ValueError('numbers: required')
+        if len(numbers) > TRACK_BATCH_MAX_SIZE:
+            raise ValueError(f'numbers: at most {TRACK_BATCH_MAX_SIZE} per request')
+    except (ValueError, AttributeError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    logging.getLogger('api.track').debug('Batch track request received, %d numbers', len(numbers))
+    role, user_id = await tokens.arequest_identity(request)
+    # Same rule as track: a logged-in client only sees their own packages.
+    owner_filter = str(user_id) if role == 'client' and user_id is not None else None
+
+    packages = await tracking.aget_packages(numbers)
+    allowed = {
+        number: pkg for number, pkg in packages.items()
+        if owner_filter is None or str(pkg['client_id']) == owner_filter
     }
-
-    return JsonResponse(response, encoder=DjangoJSONEncoder)
+    owners = await tracking.aget_clients({pkg['client_id'] for pkg in allowed.values()})
+
+    results = {}
+    for number in numbers:
+        if number in allowed:
+            pkg = allowed[number]
+            results[number] = _tracking_result(pkg, owners.get(pkg['client_id']))
+        elif number in packages:
+            results[number] = {'error': 'forbidden'}
+        else:
+            results[number] = {'error': 'not_found'}
+    return JsonResponse({'success': True, 'results': results}, encoder=DjangoJSONEncoder)
@@ -3,6 +3,10 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve through ASGI (ex: ``uvicorn config.asgi:application``) to keep the
+live event streams (/dashboard/events/, /driver/events/) open; under WSGI
+they fall back to periodic reconnects.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -1,22 +1,18 @@
-from database.models import Agent
+from database.identity import resolve
 
 
 def user_context(request):
-    """Add logged-in user info to template context."""
-    context = {
-        'logged_in_user': None,
-        'logged_in_role': None,
+    """Add logged-in user info to template context.
+
+    The agent, driver or client comes from database.identity: resolved once
+    per request and cached in the session, not queried on every render.
+    """
+    principal = getattr(request, 'identity', None)
+    if principal is None:
+        principal = resolve(request)
+    principal = principal or None
+
+    return {
+        'logged_in_user': principal,
+        'logged_in_role': principal.role.capitalize() if principal else None,
     }
-    
-    user_id = request.session.get('user_id')
-    role = request.session.get('role')
-    
-    if user_id and role:
-        try:
-            agent = Agent.objects.get(agent_id=user_id)
-            context['logged_in_user'] = agent
-            context['logged_in_role'] = role.capitalize()
-        except Agent.DoesNotExist:
-            pass
-    
-    return context
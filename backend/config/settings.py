@@ -59,6 +59,8 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'database.tokens.BearerTokenMiddleware',
+    'database.identity.IdentityMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -84,6 +86,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 
 # Database
@@ -143,3 +146,64 @@ import os
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Invoice PDFs are stored under the hash of their content, deduplicated
+# (see database/storage.py); `manage.py gc_invoice_files` removes the
+# files no invoice refers to anymore.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'invoices': {
+        'BACKEND': 'database.storage.ContentAddressedStorage',
+    },
+}
+
+# Number of IDs a worker process reserves at once from the per-prefix
+# counters (see database/sequences.py). Larger blocks mean fewer writes on
+# the counter row; unused numbers of a block are skipped after a restart.
+ID_SEQUENCE_BLOCK_SIZE = 20
+
+# Cache framework. Local memory by default (one cache per process); point
+# 'default' at a FileBasedCache or DatabaseCache to share it between workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'swiftship-default',
+    },
+}
+
+# Dashboard KPI payloads (stats cards, charts, recent activity): cache alias
+# and lifetime in seconds, 0 to disable (see dashboard/kpi_cache.py).
+DASHBOARD_KPI_CACHE = 'default'
+DASHBOARD_KPI_CACHE_TTL = 60
+
+# Public tracking lookups (see client/tracking.py): shared cache alias and
+# lifetime in seconds (0 disables), then the per-process LRU in front of it.
+TRACKING_CACHE = 'default'
+TRACKING_CACHE_TTL = 300
+TRACKING_CACHE_LOCAL_SIZE = 10000
+TRACKING_CACHE_LOCAL_TTL = 5
+
+# Bearer tokens of the driver app and client portal (see database/tokens.py):
+# lifetime in seconds, then the signing keys. The first key signs, all of
+# them verify: to rotate, add the new key in front and remove the old one
+# API_TOKEN_MAX_AGE later. Empty: SECRET_KEY and SECRET_KEY_FALLBACKS.
+API_TOKEN_MAX_AGE = 8 * 3600
+API_TOKEN_KEYS = []
+
+# Cache holding the version of each logged-in user's row; the display fields
+# cached in the sessions are reloaded when it changes (see database/identity.py).
+IDENTITY_CACHE = 'default'
+
+# Live events pushed to /dashboard/events/ and /driver/events/ (see
+# database/live.py). 'inprocess' reaches the streams of this process only;
+# 'database' polls the activity log every LIVE_EVENTS_POLL_INTERVAL seconds
+# so several workers see each other's events.
+LIVE_EVENTS_BROKER = 'inprocess'
+LIVE_EVENTS_POLL_INTERVAL = 2.0
+# Seconds a stream stays open before the browser reconnects.
+LIVE_EVENTS_STREAM_TIMEOUT = 300
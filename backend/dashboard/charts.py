@@ -0,0 +1,86 @@
+"""
+Time series for the dashboard charts.
+
+A series is computed with one grouped query (``Trunc`` on the date column,
+``GROUP BY`` the bucket) over the requested range; buckets with no rows are
+filled with zero in Python so the chart always gets a continuous axis.
+"""
+from datetime import date, datetime, timedelta
+
+from django.db.models import DateField
+from django.db.models.functions import Trunc
+
+
+GRANULARITIES = ('day', 'week', 'month')
+# Refuse ranges that would draw an unreadable chart (ex: ten years by day).
+MAX_BUCKETS = 400
+
+
+def add_months(day, months):
+    """First day of the month ``months`` away from ``day``'s month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def bucket_start(day, granularity):
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def next_bucket(day, granularity):
+    if granularity == 'month':
+        return add_months(day, 1)
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    return day + timedelta(days=1)
+
+
+def buckets(start, end, granularity):
+    """Every bucket start between ``start`` and ``end`` (inclusive)."""
+    current = bucket_start(start, granularity)
+    result = []
+    while current <= end:
+        result.append(current)
+        current = next_bucket(current, granularity)
+    return result
+
+
+def parse_range(params, default_start, default_end, default_granularity):
+    """Read ``from``/``to``/``granularity`` from a QueryDict.
+
+    Raises ValueError on a malformed date, an unknown granularity, an empty
+    range or one with more than MAX_BUCKETS buckets.
+    """
+    try:
+        start = datetime.strptime(params['from'], '%Y-%m-%d').date() if params.get('from') else default_start
+        end = datetime.strptime(params['to'], '%Y-%m-%d').date() if params.get('to') else default_end
+    except ValueError:
+        raise ValueError('from/to: expected YYYY-MM-DD')
+    granularity = params.get('granularity') or default_granularity
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity: expected one of {', '.join(GRANULARITIES)}")
+    if start > end:
+        raise ValueError('from: must not be after to')
+    if len(buckets(start, end, granularity)) > MAX_BUCKETS:
+        raise ValueError(f'range too large: at most {MAX_BUCKETS} {granularity} buckets')
+    return start, end, granularity
+
+
+def series(queryset, date_field, aggregate, start, end, granularity):
+    """Return [(bucket_start, value), ...] for ``start``..``end``.
+
+    ``aggregate`` is an aggregate expression (ex: ``Sum('total_amount')``);
+    empty buckets get 0.
+    """
+    rows = (
+        queryset.filter(**{f'{date_field}__gte': start, f'{date_field}__lte': end})
+        .annotate(bucket=Trunc(date_field, granularity, output_field=DateField()))
+        .order_by()
+        .values('bucket')
+        .annotate(value=aggregate)
+    )
+    totals = {row['bucket']: row['value'] or 0 for row in rows}
+    return [(day, totals.get(day, 0)) for day in buckets(start, end, granularity)]
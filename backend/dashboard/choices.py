@@ -0,0 +1,51 @@
+"""
+Options of the dashboard form dropdowns (client, shipment to invoice).
+
+Pages render the first ``CHOICE_LIMIT`` options only; the rest are found by
+typing in the search box above the dropdown, which calls ``form_choices``
+(``/dashboard/choices/<kind>/?q=``). Each page load therefore renders a
+fixed-size slice whatever the size of the tables.
+"""
+from django.db.models import Q
+
+from database.models import Client, Shipment
+
+
+CHOICE_LIMIT = 50
+
+
+def clients(query='', limit=CHOICE_LIMIT):
+    """Newest clients first, or those whose id, name or first name match."""
+    rows = Client.objects.only('id_client', 'nom', 'prenom').order_by('-id_client')
+    if query:
+        rows = rows.filter(
+            Q(id_client__istartswith=query) | Q(nom__icontains=query) | Q(prenom__icontains=query)
+        )
+    return list(rows[:limit])
+
+
+def invoiceable_shipments(query='', limit=CHOICE_LIMIT):
+    """Newest shipments without an invoice (Invoice.shipment is one-to-one)."""
+    rows = (
+        Shipment.objects.filter(invoice__isnull=True)
+        .only('id_shipment', 'destination')
+        .order_by('-date_creation', '-id_shipment')
+    )
+    if query:
+        rows = rows.filter(Q(id_shipment__istartswith=query) | Q(destination__icontains=query))
+    return list(rows[:limit])
+
+
+# kind -> (options, label)
+KINDS = {
+    'clients': (clients, lambda client: f'{client.nom} {client.prenom}'),
+    'shipments': (invoiceable_shipments, lambda shipment: f'{shipment.id_shipment} - {shipment.destination}'),
+}
+
+
+def search(kind, query, limit=CHOICE_LIMIT):
+    """[{'id': ..., 'label': ...}] for a ``form_choices`` response."""
+    if kind not in KINDS:
+        raise ValueError(f'unknown choices: {kind!r}')
+    options, label = KINDS[kind]
+    return [{'id': row.pk, 'label': label(row)} for row in options(query.strip(), limit)]
@@ -0,0 +1,54 @@
+"""Hot queries of the dashboard pages (see database.hot_queries)."""
+from database.hot_queries import register
+from database.models import Incident, Invoice, Shipment
+
+from .listing import PAGE_SIZE
+from .pagination import order_by_expressions
+from .serializers import ShipmentSerializer
+
+
+def _first_page(queryset, *ordering):
+    # What list_page() runs for the first page.
+    return queryset.order_by(*order_by_expressions(ordering))[:PAGE_SIZE + 1]
+
+
+@register('dashboard: shipments page')
+def shipments_page(sample):
+    return _first_page(Shipment.objects.select_related('driver', 'client'), '-date_creation', '-id_shipment')
+
+
+@register('dashboard: shipments page, status filter')
+def shipments_by_status(sample):
+    return _first_page(Shipment.objects.filter(statut='PENDING'), '-date_creation', '-id_shipment')
+
+
+@register('dashboard: shipments page, date range sorted by date')
+def shipments_by_date(sample):
+    return _first_page(
+        Shipment.objects.filter(shipment_date__gte=sample.month_start, shipment_date__lte=sample.today),
+        'shipment_date', 'id_shipment',
+    )
+
+
+@register('dashboard: shipments json page')
+def shipments_json(sample):
+    serializer = ShipmentSerializer()
+    return serializer.queryset()[:PAGE_SIZE + 1]
+
+
+@register('dashboard: incidents page')
+def incidents_page(sample):
+    return _first_page(Incident.objects.all(), '-incident_date', '-id_incident')
+
+
+@register('dashboard: incidents page sorted by creation')
+def incidents_by_creation(sample):
+    return _first_page(Incident.objects.all(), '-created_at', '-id_incident')
+
+
+@register('dashboard: invoices page, date range')
+def invoices_page(sample):
+    return _first_page(
+        Invoice.objects.filter(invoice_date__gte=sample.month_start).select_related('client'),
+        '-invoice_date', '-id_invoice',
+    )
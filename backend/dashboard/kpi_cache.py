@@ -0,0 +1,162 @@
+"""
+Cache for the dashboard KPI endpoints (stats cards, charts, recent activity).
+
+Payloads are stored in the Django cache selected by ``DASHBOARD_KPI_CACHE``
+(a CACHES alias, ``'default'`` unless configured) for
+``DASHBOARD_KPI_CACHE_TTL`` seconds. Any local-memory, file or database
+backend works since only picklable dicts are stored.
+
+Every key embeds a generation number kept in the cache itself; a write to a
+model the dashboard reads bumps it (see ``connect_signals``), which makes
+every cached payload unreachable at once, for every process sharing the
+backend. Hit/miss counters are kept per process.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+
+DEFAULT_TTL = 60
+KEY_PREFIX = 'dashboard:kpi'
+GENERATION_KEY = f'{KEY_PREFIX}:generation'
+
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[getattr(settings, 'DASHBOARD_KPI_CACHE', 'default')]
+
+
+def get_ttl():
+    return getattr(settings, 'DASHBOARD_KPI_CACHE_TTL', DEFAULT_TTL)
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def _new_generation():
+    # Time based, so a generation key lost to eviction never comes back with
+    # a value older entries were stored under.
+    return time.time_ns()
+
+
+def _generation(cache):
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # add() is a no-op when the key exists, so concurrent first calls agree.
+        cache.add(GENERATION_KEY, _new_generation(), None)
+        generation = cache.get(GENERATION_KEY) or _new_generation()
+    return generation
+
+
+def make_key(name, params, generation):
+    parts = ':'.join(str(param) for param in params)
+    return f'{KEY_PREFIX}:{generation}:{name}:{parts}'
+
+
+def get_or_compute(name, compute, params=()):
+    """Return the cached payload for (name, params), computing it on a miss.
+
+    ``params`` must identify everything the payload depends on besides the
+    data itself (query string values, today's date, ...).
+    """
+    ttl = get_ttl()
+    if not ttl:
+        return compute()
+
+    cache = get_cache()
+    key = make_key(name, params, _generation(cache))
+    value = cache.get(key)
+    if value is not None:
+        _count('hits')
+        return value
+
+    _count('misses')
+    value = compute()
+    cache.set(key, value, ttl)
+    return value
+
+
+async def _ageneration(cache):
+    generation = await cache.aget(GENERATION_KEY)
+    if generation is None:
+        await cache.aadd(GENERATION_KEY, _new_generation(), None)
+        generation = await cache.aget(GENERATION_KEY) or _new_generation()
+    return generation
+
+
+async def aget_or_compute(name, compute, params=()):
+    """Async version of ``get_or_compute()``; ``compute`` is a coroutine function."""
+    ttl = get_ttl()
+    if not ttl:
+        return await compute()
+
+    cache = get_cache()
+    key = make_key(name, params, await _ageneration(cache))
+    value = await cache.aget(key)
+    if value is not None:
+        _count('hits')
+        return value
+
+    _count('misses')
+    value = await compute()
+    await cache.aset(key, value, ttl)
+    return value
+
+
+def invalidate():
+    """Drop every cached KPI payload (all processes sharing the backend)."""
+    cache = get_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key evicted or never set: a fresh value makes old keys unreachable.
+        cache.add(GENERATION_KEY, _new_generation(), None)
+    _count('invalidations')
+
+
+def stats():
+    with _lock:
+        hits = _counters['hits']
+        misses = _counters['misses']
+        invalidations = _counters['invalidations']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'invalidations': invalidations,
+        'hit_ratio': round(hits / total, 4) if total else None,
+        'ttl': get_ttl(),
+    }
+
+
+def reset_stats():
+    with _lock:
+        _counters.clear()
+
+
+def _on_change(sender, **kwargs):
+    # After commit, so a request racing the write cannot cache the old data
+    # under the new generation.
+    transaction.on_commit(invalidate)
+
+
+def connect_signals():
+    """Invalidate on every write to a model feeding the cached payloads."""
+    from database.models import Agent, Chauffeur, Client, Incident, Invoice, Package, Shipment, Vehicule
+    from database.signals import invoices_created, shipments_imported, shipments_updated
+
+    for model in (Shipment, Invoice, Client, Chauffeur, Incident, Package, Vehicule, Agent):
+        post_save.connect(_on_change, sender=model, dispatch_uid=f'kpi_cache_save_{model.__name__}')
+        post_delete.connect(_on_change, sender=model, dispatch_uid=f'kpi_cache_delete_{model.__name__}')
+    shipments_imported.connect(_on_change, dispatch_uid='kpi_cache_shipments_imported')
+    shipments_updated.connect(_on_change, dispatch_uid='kpi_cache_shipments_updated')
+    invoices_created.connect(_on_change, dispatch_uid='kpi_cache_invoices_created')
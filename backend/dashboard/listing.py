@@ -0,0 +1,146 @@
+"""
+Server-side listing for the dashboard HTML pages.
+
+Each list page declares its filters (``ListFilter``) and sortable columns,
+then ``list_page()`` reads ``?<filter>=``, ``?sort=``, ``?cursor=`` and
+``?limit=`` from the request and returns one keyset page (see
+pagination.py) instead of the whole table.
+"""
+from django.utils.http import urlencode
+
+from .pagination import order_by_expressions, paginate, parse_limit, resolve_field
+
+
+PAGE_SIZE = 50
+PAGE_MAX_SIZE = 200
+
+
+class ListFilter:
+    """One ``?name=value`` filter applied as ``field__lookup=value``.
+
+    ``choices`` renders a select box; otherwise ``input_type`` is the HTML
+    input type ('text', 'date', ...). Values are converted with the model
+    field's ``to_python()`` so a bad value is rejected, not sent to SQL.
+    """
+
+    def __init__(self, name, field, label, lookup='exact', choices=None, input_type='text'):
+        self.name = name
+        self.field = field
+        self.label = label
+        self.lookup = lookup
+        self.choices = choices
+        self.input_type = input_type
+
+    def get_choices(self):
+        return self.choices() if callable(self.choices) else self.choices
+
+    def clean(self, model, raw):
+        try:
+            return resolve_field(model, self.field).to_python(raw)
+        except Exception:
+            raise ValueError(f'{self.label}: invalid value {raw!r}')
+
+    def apply(self, queryset, value):
+        return queryset.filter(**{f'{self.field}__{self.lookup}': value})
+
+
+class ListPage:
+    """One page of a list view, plus what the template needs to render the
+    filter bar and the pager."""
+
+    def __init__(self, rows, cursor, next_cursor, sort, sort_options, filters, params, errors):
+        self.rows = rows
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.sort = sort
+        self.sort_options = sort_options
+        self.filters = filters
+        self.errors = errors
+        self._params = params
+
+    def _query(self, cursor=None):
+        params = dict(self._params)
+        if cursor:
+            params['cursor'] = cursor
+        return urlencode(params)
+
+    @property
+    def next_query(self):
+        return self._query(self.next_cursor) if self.next_cursor else ''
+
+    @property
+    def first_query(self):
+        return self._query()
+
+    @property
+    def is_first(self):
+        return not self.cursor
+
+    @property
+    def is_filtered(self):
+        return any(value not in (None, '') for _, value in self.filters)
+
+
+def list_page(request, queryset, filters=(), sorts=None, default_sort=None):
+    """Filter, sort and paginate ``queryset`` from the request's query string.
+
+    ``sorts`` maps a ``?sort=`` key to (column, label); ``-key`` sorts
+    descending. The primary key is always added as tie-breaker so the keyset
+    cursor is unambiguous. Invalid input is reported in ``page.errors`` and
+    ignored rather than failing the page.
+    """
+    model = queryset.model
+    pk_name = model._meta.pk.name
+    sorts = sorts or {}
+    errors = []
+    params = {}
+
+    current = []
+    for list_filter in filters:
+        raw = request.GET.get(list_filter.name, '').strip()
+        if raw:
+            try:
+                value = list_filter.clean(model, raw)
+                queryset = list_filter.apply(queryset, value)
+                params[list_filter.name] = raw
+            except ValueError as e:
+                errors.append(str(e))
+                raw = ''
+        current.append((list_filter, raw))
+
+    sort = request.GET.get('sort') or default_sort or f'-{pk_name}'
+    if sort.lstrip('-') not in sorts and sort.lstrip('-') != pk_name:
+        errors.append(f'unknown sort: {sort}')
+        sort = default_sort or f'-{pk_name}'
+    key = sort.lstrip('-')
+    descending = '-' if sort.startswith('-') else ''
+    column = sorts[key][0] if key in sorts else pk_name
+    ordering = [f'{descending}{column}']
+    if column != pk_name:
+        ordering.append(f'{descending}{pk_name}')
+    params['sort'] = sort
+
+    try:
+        limit = parse_limit(request.GET.get('limit'), PAGE_SIZE, PAGE_MAX_SIZE)
+    except ValueError as e:
+        errors.append(str(e))
+        limit = PAGE_SIZE
+    if limit != PAGE_SIZE:
+        params['limit'] = limit
+
+    queryset = queryset.order_by(*order_by_expressions(ordering))
+    cursor = request.GET.get('cursor') or None
+    try:
+        rows, next_cursor = paginate(queryset, ordering, cursor, limit)
+    except ValueError as e:
+        # Stale or tampered cursor: start over from the first page.
+        errors.append(str(e))
+        cursor = None
+        rows, next_cursor = paginate(queryset, ordering, None, limit)
+
+    sort_options = []
+    for name, (_, label) in sorts.items():
+        sort_options.append((f'-{name}', f'{label} ↓'))
+        sort_options.append((name, f'{label} ↑'))
+
+    return ListPage(rows, cursor, next_cursor, sort, sort_options, current, params, errors)
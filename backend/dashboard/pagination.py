@@ -0,0 +1,150 @@
+"""
+Keyset (cursor) pagination helpers shared by the dashboard views.
+
+An ordering is a list of column names, each optionally prefixed with ``-``
+for descending order; the last column must be unique (usually the pk) so
+every row has a stable position. NULLs always sort last. A cursor is the
+url-safe base64 encoding of the ordering values of the last row served, so
+the next page is a single indexed range query instead of an OFFSET scan.
+"""
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import F, Q
+
+
+def parse_ordering(ordering):
+    """Return [(column, descending), ...] for an ordering spec."""
+    return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+
+def order_by_expressions(ordering):
+    return [
+        F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)
+        for name, descending in parse_ordering(ordering)
+    ]
+
+
+def encode_cursor(values):
+    raw = json.dumps([None if v is None else str(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def resolve_field(model, path):
+    """Follow a ``a__b__c`` lookup path and return the final concrete field."""
+    field = None
+    for part in path.split('__'):
+        field = model._meta.get_field(part)
+        if field.is_relation:
+            model = field.related_model
+    return field.target_field if field.is_relation else field
+
+
+def decode_cursor(token, model, ordering):
+    """Decode ``token`` back into typed ordering values.
+
+    Raises ValueError when the cursor is malformed or does not match the
+    ordering (ex: it was produced for a different sort).
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f'invalid cursor: {e}')
+
+    columns = parse_ordering(ordering)
+    if not isinstance(raw, list) or len(raw) != len(columns):
+        raise ValueError('invalid cursor: ordering mismatch')
+
+    values = []
+    for (name, _), value in zip(columns, raw):
+        if value is None:
+            values.append(None)
+            continue
+        field = resolve_field(model, name)
+        try:
+            values.append(field.to_python(value))
+        except Exception as e:
+            raise ValueError(f'invalid cursor: {e}')
+    return values
+
+
+def _after(name, descending, value):
+    """Rows strictly after ``value`` on one column (NULLs last)."""
+    if value is None:
+        return None
+    lookup = 'lt' if descending else 'gt'
+    return Q(**{f'{name}__{lookup}': value}) | Q(**{f'{name}__isnull': True})
+
+
+def _equal(name, value):
+    if value is None:
+        return Q(**{f'{name}__isnull': True})
+    return Q(**{name: value})
+
+
+def keyset_filter(ordering, values):
+    """Q object selecting the rows that come after ``values`` in ``ordering``."""
+    branches = []
+    prefix = Q()
+    for (name, descending), value in zip(parse_ordering(ordering), values):
+        after = _after(name, descending, value)
+        if after is not None:
+            branches.append(prefix & after)
+        prefix &= _equal(name, value)
+    if not branches:
+        return Q(pk__in=[])
+    return reduce(or_, branches)
+
+
+def cursor_values(row, ordering):
+    """Extract the ordering values of ``row`` (a ``values()`` dict or instance)."""
+    columns = [name for name, _ in parse_ordering(ordering)]
+    if isinstance(row, dict):
+        return [row[name] for name in columns]
+    return [getattr(row, name) for name in columns]
+
+
+def _page_queryset(queryset, ordering, cursor, limit):
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, ordering)
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    # One extra row tells whether there is a next page.
+    return queryset[:limit + 1]
+
+
+def _split_page(rows, ordering, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(cursor_values(rows[-1], ordering))
+    return rows, next_cursor
+
+
+def paginate(queryset, ordering, cursor=None, limit=50):
+    """Return (rows, next_cursor) for one page of ``queryset``.
+
+    ``queryset`` must already be ordered by ``ordering``. ``next_cursor`` is
+    None on the last page.
+    """
+    rows = list(_page_queryset(queryset, ordering, cursor, limit))
+    return _split_page(rows, ordering, limit)
+
+
+async def apaginate(queryset, ordering, cursor=None, limit=50):
+    """Async version of ``paginate()``, for async views."""
+    rows = [row async for row in _page_queryset(queryset, ordering, cursor, limit)]
+    return _split_page(rows, ordering, limit)
+
+
+def parse_limit(value, default, maximum):
+    """Parse a ``?limit=`` value, clamped to [1, maximum]."""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'invalid limit: {value!r}')
+    return max(1, min(limit, maximum))
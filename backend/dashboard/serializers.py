@@ -0,0 +1,268 @@
+"""
+Row serializers for the dashboard JSON endpoints.
+
+Each serializer declares its output fields as (columns, getter) pairs. Rows
+are built from one ``values()`` query that pulls exactly the columns of the
+selected fields, following foreign keys with SQL joins, so serializing a
+list never touches related objects one row at a time.
+"""
+from django.http import Http404
+
+from database.models import Agent, Chauffeur, Client, Incident, Invoice, Package, Shipment, Vehicule
+
+from .pagination import order_by_expressions, parse_ordering
+
+
+# =========================
+#        FIELD HELPERS
+# =========================
+def column(name, default=None):
+    """Output a column as-is (``default`` replaces NULL)."""
+    return (name,), lambda row: default if row[name] is None else row[name]
+
+
+def text(name):
+    """Output a column as a string, '' for NULL."""
+    return (name,), lambda row: '' if row[name] is None else str(row[name])
+
+
+def isoformat(name, default=''):
+    return (name,), lambda row: row[name].isoformat() if row[name] else default
+
+
+def strftime(name, fmt, default=''):
+    return (name,), lambda row: row[name].strftime(fmt) if row[name] else default
+
+
+def display(name, choices):
+    """Human readable label of a choices column (like get_FOO_display())."""
+    labels = dict(choices)
+    return (name,), lambda row: labels.get(row[name], row[name])
+
+
+def full_name(relation, default=''):
+    """'<nom> <prenom>' of a related Client/Chauffeur/Agent."""
+    nom, prenom = f'{relation}__nom', f'{relation}__prenom'
+    return (nom, prenom), lambda row: f'{row[nom]} {row[prenom]}' if row[nom] is not None else default
+
+
+class RowSerializer:
+    """Turn a queryset into plain dicts with a single ``values()`` query.
+
+    ``fields`` may restrict the output to a subset of the declared fields
+    (a list or a comma separated string); unknown names raise ValueError.
+    Without it, ``default_fields`` (or every declared field) is used;
+    ``'__all__'`` always selects every declared field.
+    """
+
+    model = None
+    fields = {}
+    default_fields = None
+    ordering = ()
+
+    def __init__(self, fields=None):
+        if fields == '__all__':
+            fields = list(self.fields)
+        if isinstance(fields, str):
+            fields = [name.strip() for name in fields.split(',') if name.strip()]
+        if fields:
+            unknown = [name for name in fields if name not in self.fields]
+            if unknown:
+                raise ValueError(f"unknown field(s): {', '.join(unknown)}")
+            self.selected = list(dict.fromkeys(fields))
+        else:
+            self.selected = list(self.default_fields or self.fields)
+
+    def columns(self):
+        columns = [name for name, _ in parse_ordering(self.ordering)]
+        for name in self.selected:
+            columns.extend(self.fields[name][0])
+        return list(dict.fromkeys(columns))
+
+    def queryset(self, queryset=None, ordering=None):
+        """Ordered ``values()`` queryset holding every needed column."""
+        if queryset is None:
+            queryset = self.model._default_manager.all()
+        ordering = ordering or self.ordering
+        columns = self.columns()
+        columns.extend(name for name, _ in parse_ordering(ordering) if name not in columns)
+        return queryset.order_by(*order_by_expressions(ordering)).values(*columns)
+
+    def to_dict(self, row):
+        return {name: self.fields[name][1](row) for name in self.selected}
+
+    def serialize(self, rows):
+        return [self.to_dict(row) for row in rows]
+
+    def get(self, pk):
+        """Serialize one object by primary key, or raise Http404."""
+        row = self.queryset().filter(pk=pk).first()
+        if row is None:
+            raise Http404(f'No {self.model.__name__} matches the given query.')
+        return self.to_dict(row)
+
+
+# =========================
+#        SERIALIZERS
+# =========================
+class ShipmentSerializer(RowSerializer):
+    model = Shipment
+    ordering = ('-date_creation', '-id_shipment')
+    fields = {
+        'id_shipment': column('id_shipment'),
+        # Shipment.client, falling back on Package.client for legacy rows.
+        'client': (
+            ('client__nom', 'client__prenom', 'package__client__nom', 'package__client__prenom'),
+            lambda row: (
+                f"{row['client__nom']} {row['client__prenom']}" if row['client__nom'] is not None
+                else f"{row['package__client__nom']} {row['package__client__prenom']}" if row['package__client__nom'] is not None
+                else ''
+            ),
+        ),
+        'client_id': (
+            ('client_id', 'package__client_id'),
+            lambda row: row['client_id'] or row['package__client_id'] or '',
+        ),
+        'tracking_number': column('package__tracking_number', ''),
+        'origin': column('origin'),
+        'destination': column('destination'),
+        'status': column('statut'),
+        'driver': full_name('driver'),
+        'driver_id': column('driver_id', ''),
+        'date': isoformat('shipment_date'),
+        'zone': column('zone'),
+        'speed': column('speed'),
+        'distance': (('distance',), lambda row: str(row['distance']) if row['distance'] else ''),
+        'description': column('description'),
+    }
+    # The list endpoint's historical payload; ?fields= can ask for the rest.
+    default_fields = [
+        'id_shipment', 'client', 'client_id', 'origin', 'destination', 'status',
+        'driver', 'driver_id', 'date', 'zone', 'speed',
+    ]
+
+
+class IncidentSerializer(RowSerializer):
+    model = Incident
+    ordering = ('-incident_date', '-id_incident')
+    fields = {
+        'id_incident': column('id_incident'),
+        'incident_type': column('incident_type'),
+        'type_display': display('incident_type', Incident.INCIDENT_TYPE_CHOICES),
+        'description': column('description'),
+        'status': column('status'),
+        'status_display': display('status', Incident.INCIDENT_STATUS_CHOICES),
+        'priority': column('priority'),
+        'priority_display': display('priority', Incident.PRIORITY_CHOICES),
+        'date': strftime('incident_date', '%Y-%m-%d'),
+        'commentaire': column('commentaire'),
+        'created_at': isoformat('created_at'),
+        'resolution_date': isoformat('resolution_date'),
+    }
+    default_fields = [
+        'id_incident', 'incident_type', 'type_display', 'description', 'status',
+        'status_display', 'priority', 'priority_display', 'date', 'commentaire',
+    ]
+
+
+class ClientSerializer(RowSerializer):
+    model = Client
+    ordering = ('-id_client',)
+    fields = {
+        'id_client': column('id_client'),
+        'nom': column('nom'),
+        'prenom': column('prenom'),
+        'email': column('email'),
+        'telephone': column('telephone'),
+        'adresse': column('adresse'),
+        'ville': column('ville'),
+        'pays': column('pays'),
+        'date_inscription': isoformat('date_inscription'),
+    }
+
+
+class DriverSerializer(RowSerializer):
+    model = Chauffeur
+    ordering = ('-id_chauffeur',)
+    fields = {
+        'id_chauffeur': column('id_chauffeur'),
+        'nom': column('nom'),
+        'prenom': column('prenom'),
+        'email': column('email'),
+        'telephone': column('telephone'),
+        'numero_permis': column('numero_permis'),
+        'disponibilite': column('disponibilite'),
+        'statut': column('statut'),
+        'vehicule': column('vehicule__immatriculation'),
+        'vehicule_id': column('vehicule_id'),
+        'date_embauche': isoformat('date_embauche', None),
+    }
+
+
+def _split_type_vehicule(row):
+    """(type, marque, modele) from a "<type> - <marque> <modele>" string."""
+    type_display = row['type_vehicule'] or ''
+    if ' - ' not in type_display:
+        return type_display, '', ''
+    type_display, rest = type_display.split(' - ', 1)
+    tokens = rest.split(' ', 1)
+    return type_display, tokens[0] if tokens else '', tokens[1] if len(tokens) > 1 else ''
+
+
+class VehicleSerializer(RowSerializer):
+    model = Vehicule
+    ordering = ('-id_vehicule',)
+    fields = {
+        'id_vehicule': column('id_vehicule'),
+        'immatriculation': column('immatriculation'),
+        'marque': (('type_vehicule',), lambda row: _split_type_vehicule(row)[1]),
+        'modele': (('type_vehicule',), lambda row: _split_type_vehicule(row)[2]),
+        'type_vehicule': (('type_vehicule',), lambda row: _split_type_vehicule(row)[0]),
+        'capacite_charge': text('capacite_charge'),
+        'consommation': text('consommation'),
+        'date_mise_service': isoformat('date_mise_service'),
+        'etat': column('etat'),
+    }
+
+
+class InvoiceSerializer(RowSerializer):
+    model = Invoice
+    ordering = ('-invoice_date', '-id_invoice')
+    fields = {
+        'id_invoice': column('id_invoice'),
+        'client': full_name('client'),
+        'client_id': column('client_id', ''),
+        'shipment': column('shipment_id', ''),
+        'shipment_id': column('shipment_id', ''),
+        'total_amount': text('total_amount'),
+        'invoice_date': strftime('invoice_date', '%Y-%m-%d'),
+    }
+
+
+class PackageSerializer(RowSerializer):
+    model = Package
+    ordering = ('-id_package',)
+    fields = {
+        'id_package': column('id_package'),
+        'tracking_number': column('tracking_number'),
+        'client': full_name('client'),
+        'client_id': column('client_id', ''),
+        'weight': text('weight'),
+        'number_of_pieces': column('number_of_pieces'),
+        'package_type': column('package_type'),
+        'package_type_display': display('package_type', Package.PACKAGE_TYPE_CHOICES),
+        'date_creation': strftime('date_creation', '%Y-%m-%d %H:%M'),
+    }
+
+
+class AgentSerializer(RowSerializer):
+    model = Agent
+    ordering = ('-agent_id',)
+    fields = {
+        'agent_id': column('agent_id'),
+        'nom': column('nom'),
+        'prenom': column('prenom'),
+        'email': column('email'),
+        'telephone': column('telephone'),
+        'role': column('role'),
+    }
@@ -0,0 +1,109 @@
+"""
+Streaming JSON responses for large list endpoints.
+
+``StreamingJsonResponse`` writes the usual ``{"success": true, "<key>": [...]}``
+envelope but encodes rows as they come out of ``queryset.iterator()``, so
+memory stays flat whatever the table size and the first bytes leave before
+the last row is read.
+"""
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per database round trip.
+ITERATOR_CHUNK_SIZE = 2000
+# Approximate number of bytes buffered before a chunk is sent to the client.
+BUFFER_SIZE = 64 * 1024
+
+
+class _Envelope:
+    """Incremental encoder shared by the sync and async generators."""
+
+    def __init__(self, key, extra, encoder):
+        self.key = key
+        self.extra = dict(extra or {})
+        self.encode = encoder(separators=(',', ':')).encode
+        self.buffer = []
+        self.size = 0
+        self.first = True
+
+    def head(self):
+        return self.encode({'success': True})[:-1] + ',' + json.dumps(self.key) + ':['
+
+    def add(self, row):
+        """Buffer ``row``; return a chunk to send once BUFFER_SIZE is reached."""
+        chunk = self.encode(row) if self.first else ',' + self.encode(row)
+        self.first = False
+        self.buffer.append(chunk)
+        self.size += len(chunk)
+        if self.size >= BUFFER_SIZE:
+            return self.flush()
+        return None
+
+    def flush(self):
+        data = ''.join(self.buffer)
+        self.buffer = []
+        self.size = 0
+        return data
+
+    def interrupted(self):
+        # Headers are already sent: log, close the document and flag it so
+        # the client can tell a truncated list from a complete one.
+        logger.exception('Error while streaming %s', self.key)
+        self.extra['error'] = 'stream_interrupted'
+
+    def tail(self):
+        tail = self.flush() + ']'
+        for name, value in self.extra.items():
+            tail += ',' + json.dumps(name) + ':' + self.encode(value)
+        return tail + '}'
+
+
+def iter_json_envelope(rows, key, extra=None, encoder=DjangoJSONEncoder):
+    """Yield the JSON text of ``{"success": true, key: rows, **extra}`` piece by piece."""
+    envelope = _Envelope(key, extra, encoder)
+    yield envelope.head()
+    try:
+        for row in rows:
+            chunk = envelope.add(row)
+            if chunk:
+                yield chunk
+    except Exception:
+        envelope.interrupted()
+    yield envelope.tail()
+
+
+async def aiter_json_envelope(rows, key, extra=None, encoder=DjangoJSONEncoder):
+    """Same as ``iter_json_envelope()`` for an async iterable of rows."""
+    envelope = _Envelope(key, extra, encoder)
+    yield envelope.head()
+    try:
+        async for row in rows:
+            chunk = envelope.add(row)
+            if chunk:
+                yield chunk
+    except Exception:
+        envelope.interrupted()
+    yield envelope.tail()
+
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    """Stream ``rows`` (an iterable of dicts) inside the list envelope.
+
+    Pass ``queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE)`` (or a generator
+    built on it) rather than a queryset, so rows are not cached. Under ASGI,
+    an async iterable (``queryset.aiterator()``) is streamed without a thread.
+    """
+
+    def __init__(self, rows, key, extra=None, encoder=DjangoJSONEncoder, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        if hasattr(rows, '__aiter__'):
+            content = aiter_json_envelope(rows, key, extra, encoder)
+        else:
+            content = iter_json_envelope(rows, key, extra, encoder)
+        super().__init__(content, **kwargs)
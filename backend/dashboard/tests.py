@@ -0,0 +1,60 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from database.models import Client, Package, Shipment
+
+from .pagination import order_by_expressions, paginate
+
+
+# shipment_date with ties and NULLs (NULLs sort last).
+DATES = [date(2026, 1, 2), None, date(2026, 1, 1), date(2026, 1, 2), None, date(2026, 1, 3), date(2026, 1, 1)]
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        client = Client.objects.create(nom='Client', prenom='Test', email='client@example.com', password_client='!')
+        packages = Package.objects.bulk_create([
+            Package(id_package=f'PCG{n:08d}', client=client, tracking_number=f'TRK-{n}',
+                    weight=Decimal('1'), number_of_pieces=1, package_type='OTHER')
+            for n in range(len(DATES))
+        ])
+        Shipment.objects.bulk_create([
+            Shipment(id_shipment=f'SHP{n:08d}', package=package, client=client, zone='NATIONAL',
+                     speed='NORMAL', distance=Decimal('1'), shipment_date=day)
+            for n, (package, day) in enumerate(zip(packages, DATES))
+        ])
+
+    def walk(self, ordering, limit):
+        queryset = Shipment.objects.order_by(*order_by_expressions(ordering)).values('id_shipment', 'shipment_date')
+        pages, cursor = [], None
+        while True:
+            rows, cursor = paginate(queryset, ordering, cursor=cursor, limit=limit)
+            pages.append([row['id_shipment'] for row in rows])
+            if cursor is None:
+                return pages
+
+    def expected(self, ordering):
+        rows = [(f'SHP{n:08d}', day) for n, day in enumerate(DATES)]
+        dated = sorted(row for row in rows if row[1] is not None)
+        # Stable sort: ties stay in id order.
+        dated.sort(key=lambda row: row[1], reverse=ordering[0].startswith('-'))
+        return [pk for pk, day in dated] + sorted(pk for pk, day in rows if day is None)
+
+    def test_every_row_once_in_order(self):
+        for ordering in (['shipment_date', 'id_shipment'], ['-shipment_date', 'id_shipment']):
+            for limit in (1, 2, 3, 10):
+                with self.subTest(ordering=ordering, limit=limit):
+                    pages = self.walk(ordering, limit)
+                    self.assertTrue(all(len(page) <= limit for page in pages))
+                    self.assertEqual(sum(pages, []), self.expected(ordering))
+
+    def test_invalid_cursor(self):
+        queryset = Shipment.objects.order_by(*order_by_expressions(['shipment_date', 'id_shipment']))
+        for cursor in ('not-base64!', 'WyJ4Il0'):  # WyJ4Il0: ["x"], one value for two columns
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    paginate(queryset, ['shipment_date', 'id_shipment'], cursor=cursor)
@@ -16,6 +16,7 @@ urlpatterns = [
     path('shipments/', views.dashboard_shipments, name='dashboard_shipments'),
     path('shipments/json/', views.list_shipments_json, name='dashboard_list_shipments'),
     path('shipments/add/', views.add_shipment, name='dashboard_add_shipment'),
+    path('shipments/bulk/', views.bulk_add_shipments, name='dashboard_bulk_add_shipments'),
     path('shipments/<str:shipment_id>/json/', views.show_shipment, name='dashboard_show_shipment'),
     path('shipments/<str:shipment_id>/edit/', views.edit_shipment, name='dashboard_edit_shipment'),
     path('shipments/<str:shipment_id>/delete/', views.delete_shipment, name='dashboard_delete_shipment'),
@@ -66,5 +67,8 @@ urlpatterns = [
     path('data/', views.dashboard_data, name='dashboard_data'),
     path('charts-data/', views.dashboard_charts_data, name='dashboard_charts_data'),
     path('recent-activity/json/', views.recent_activity_data, name='dashboard_recent_activity'),
+    path('kpi-cache/stats/', views.kpi_cache_stats, name='dashboard_kpi_cache_stats'),
+    path('choices/<str:kind>/', views.form_choices, name='dashboard_form_choices'),
+    path('events/', views.dashboard_events, name='dashboard_events'),
 
 ]
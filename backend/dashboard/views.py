@@ -3,202 +3,218 @@ from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseNotAll
 from django.views.decorators.http import require_POST, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 import json
-import re
 from datetime import datetime, date
 from django.contrib.admin.views.decorators import staff_member_required
 from django.http import HttpResponseForbidden
 import uuid
+from django.core.handlers.asgi import ASGIRequest
 from django.db import IntegrityError
 
-from database.models import Client, Chauffeur, Vehicule, Shipment, Incident, Package, Invoice, Agent
+from database.models import (
+    Client, Chauffeur, Vehicule, Shipment, Incident, Package, Invoice, Agent, ActivityEvent, DailyStats,
+    STATUS_CHOICES, STATUT_CHOICES,
+)
+from database import history
+from database.intake import import_shipments, rows_from_request
+from database.live import event_stream_response
+from . import choices, kpi_cache
+from .charts import add_months, parse_range, series
+from .listing import ListFilter, list_page
+from .pagination import apaginate, paginate, parse_limit
+from .streaming import ITERATOR_CHUNK_SIZE, StreamingJsonResponse
+from .serializers import (
+    AgentSerializer, ClientSerializer, DriverSerializer, IncidentSerializer,
+    InvoiceSerializer, PackageSerializer, ShipmentSerializer, VehicleSerializer,
+)
 from django.utils import timezone
-from django.db.models import Count, Sum
+from django.db.models import Count, Q, Sum
 from datetime import timedelta
 from django.utils.timezone import make_aware
 
-def dashboard_data(request):
-    """Return JSON stats for dashboard"""
-    total_shipments = Shipment.objects.count()
-    total_drivers = Chauffeur.objects.count()
-    total_clients = Client.objects.count()
-    
-    today = timezone.now().date()
+async def _dashboard_stats(today):
+    total_shipments = await Shipment.objects.acount()
+    total_drivers = await Chauffeur.objects.acount()
+    total_clients = await Client.objects.acount()
+
     start_month = today.replace(day=1)
-    
+
+    # Read from the daily rollup, not from every invoice row
     monthly_revenue = (
-        Invoice.objects.filter(invoice_date__gte=start_month)
-        .aggregate(total=Sum('total_amount'))['total'] or 0
-    )
+        await DailyStats.objects.filter(date__gte=start_month, date__lte=today)
+        .aaggregate(total=Sum('revenue'))
+    )['total'] or 0
 
-    return JsonResponse({
+    return {
         "total_shipments": total_shipments,
         "total_drivers": total_drivers,
         "total_clients": total_clients,
         "monthly_revenue": float(monthly_revenue)
-    })
-  
+    }
 
-def dashboard_charts_data(request):
+
+async def dashboard_data(request):
+    """Return JSON stats for dashboard (async, cached, see kpi_cache)"""
     today = timezone.now().date()
-    
-    # Revenue trends (last 6 months)
-    revenue_trends = []
-    for i in range(6, 0, -1):
-        month_start = today.replace(day=1) - timedelta(days=30*i)
-        month_end = month_start.replace(day=28) + timedelta(days=4)  # trick to get last day
-        month_end = month_end - timedelta(days=month_end.day)
-        
-        total = Invoice.objects.filter(
-            invoice_date__gte=month_start,
-            invoice_date__lte=month_end
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
-        
-        revenue_trends.append({
-            "month": month_start.strftime('%b %Y'),
-            "revenue": float(total)
-        })
+    data = await kpi_cache.aget_or_compute('data', lambda: _dashboard_stats(today), (today,))
+    return JsonResponse(data)
+  
+
+def _chart_label(day, granularity, buckets):
+    if granularity == 'month':
+        return day.strftime('%b %Y')
+    if granularity == 'day' and buckets <= 7:
+        return day.strftime('%a')
+    return day.strftime('%d %b')
+
+
+def _charts_payload(revenue_range, weekly_range):
+    # Revenue trends (from the daily rollup)
+    revenue = series(DailyStats.objects.all(), 'date', Sum('revenue'), *revenue_range)
+    revenue_trends = [
+        {
+            "month": _chart_label(day, revenue_range[2], len(revenue)),
+            "start": day.isoformat(),
+            "revenue": float(total),
+        }
+        for day, total in revenue
+    ]
 
     # Shipment status distribution
     status_distribution = Shipment.objects.values('statut').annotate(count=Count('id_shipment'))
-    
-    # Weekly delivery performance (last 7 days)
-    weekly_performance = []
-    for i in range(7, 0, -1):
-        day = today - timedelta(days=i-1)
-        count = Shipment.objects.filter(shipment_date=day).count()
-        weekly_performance.append({
-            "day": day.strftime('%a'),
-            "count": count
-        })
-    
-    return JsonResponse({
+
+    # Shipment volume (shipments created per bucket, from the daily rollup)
+    weekly = series(DailyStats.objects.all(), 'date', Sum('shipments_created'), *weekly_range)
+    weekly_performance = [
+        {
+            "day": _chart_label(day, weekly_range[2], len(weekly)),
+            "start": day.isoformat(),
+            "count": count,
+        }
+        for day, count in weekly
+    ]
+
+    return {
         "revenue_trends": revenue_trends,
         "status_distribution": list(status_distribution),
         "weekly_performance": weekly_performance
-    })
+    }
 
 
-def recent_activity_data(request):
-    """
-    Return recent activities:
-    5 latest of each:
-    clients, shipments, drivers, vehicles, invoices, packages, incidents, agents
+def dashboard_charts_data(request):
+    """Chart series for the dashboard, one grouped query per chart.
+
+    Default: revenue per calendar month over the last 6 months (current
+    month included) and shipments per day over the last 7 days.
+    ``?from=YYYY-MM-DD&to=YYYY-MM-DD&granularity=day|week|month`` draws both
+    series over that range instead.
     """
+    today = timezone.now().date()
+    custom = any(request.GET.get(name) for name in ('from', 'to', 'granularity'))
+    try:
+        if custom:
+            revenue_range = weekly_range = parse_range(request.GET, add_months(today, -5), today, 'month')
+        else:
+            revenue_range = (add_months(today, -5), today, 'month')
+            weekly_range = (today - timedelta(days=6), today, 'day')
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
-    activity_list = []
-
-    # ---- Shipments ----
-    shipments = Shipment.objects.select_related('client').order_by('-date_creation')[:5]
-    for s in shipments:
-        activity_list.append({
-            "datetime": s.date_creation,
-            "time": s.date_creation.strftime("%H:%M"),
-            "action": "New Shipment",
-            "user": f"{s.client.nom} {s.client.prenom}" if s.client else "Unknown",
-            "details": f"Shipment #{s.id_shipment} created",
-            "status": s.statut,
-        })
+    data = kpi_cache.get_or_compute(
+        'charts', lambda: _charts_payload(revenue_range, weekly_range),
+        (today, *revenue_range, *weekly_range),
+    )
+    return JsonResponse(data)
 
-    # ---- Incidents ----
-    incidents = Incident.objects.order_by('-created_at')[:5]
-    for i in incidents:
-        activity_list.append({
-            "datetime": i.created_at,
-            "time": i.created_at.strftime("%H:%M"),
-            "action": "Incident Reported",
-            "user": "System",
-            "details": i.description,
-            "status": i.status,
-        })
 
-    # ---- Clients ----
-    clients = Client.objects.order_by('-date_inscription')[:5]
-    for c in clients:
-        activity_list.append({
-            "datetime": c.date_inscription,
-            "time": c.date_inscription.strftime("%H:%M"),
-            "action": "New Client",
-            "user": f"{c.nom} {c.prenom}",
-            "details": "Client registered",
-            "status": "Completed",
-        })
+ACTIVITY_LIMIT = 40
+ACTIVITY_MAX_LIMIT = 200
 
-    # ---- Drivers ----
-    drivers = Chauffeur.objects.order_by('-date_embauche')[:5]
-    for d in drivers:
-        activity_list.append({
-            "datetime": d.date_embauche,
-            "time": d.date_embauche.strftime("%H:%M"),
-            "action": "New Driver",
-            "user": f"{d.nom} {d.prenom}",
-            "details": "Driver added to system",
-            "status": d.statut,
-        })
 
-    # ---- Vehicles ----
-    vehicles = Vehicule.objects.order_by('-date_mise_service')[:5]
-    for v in vehicles:
-        if not v.date_mise_service:
-            continue
-        activity_list.append({
-            "datetime": v.date_mise_service,
-            "time": v.date_mise_service.strftime("%H:%M"),
-            "action": "Vehicle Added",
-            "user": "System",
-            "details": f"Vehicle {v.immatriculation}",
-            "status": v.etat,
-        })
+def _parse_since(value):
+    """``?since=`` is an event id (as returned in ``latest``) or an ISO datetime."""
+    if not value:
+        return None
+    if value.isdigit():
+        return Q(id__gt=int(value))
+    try:
+        since = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'invalid since: {value!r}')
+    if timezone.is_naive(since):
+        since = make_aware(since)
+    return Q(timestamp__gt=since)
 
-    # ---- Invoices ----
-    invoices = Invoice.objects.select_related('client').order_by('-invoice_date')[:5]
-    for inv in invoices:
-        activity_list.append({
-            "datetime": inv.invoice_date,
-            "time": inv.invoice_date.strftime("%H:%M"),
-            "action": "Invoice Generated",
-            "user": f"{inv.client.nom} {inv.client.prenom}" if inv.client else "Unknown",
-            "details": f"Invoice #{inv.id_invoice}",
-            "status": "Completed",
-        })
 
-    # ---- Packages ----
-    packages = Package.objects.select_related('client').order_by('-date_creation')[:5]
-    for p in packages:
-        activity_list.append({
-            "datetime": p.date_creation,
-            "time": p.date_creation.strftime("%H:%M"),
-            "action": "Package Created",
-            "user": f"{p.client.nom} {p.client.prenom}" if p.client else "Unknown",
-            "details": f"Tracking {p.tracking_number}",
-            "status": "Completed",
-        })
+def _recent_activities(since, limit):
+    """Activity events: one indexed query on the activity log.
 
-    # ---- Agents ----
-    agents = Agent.objects.order_by('-agent_id')[:5]
-    for a in agents:
-        activity_list.append({
-            "datetime": timezone.now(),  # no created_at → fallback
-            "time": timezone.now().strftime("%H:%M"),
-            "action": "Agent Added",
-            "user": f"{a.nom} {a.prenom}",
-            "details": f"Role: {a.role}",
-            "status": "Active",
-        })
+    Without ``since``, the ``limit`` newest events. With it, the ``limit``
+    oldest events after ``since`` (ascending id), so ``latest`` moves forward
+    without skipping any; ``has_more`` tells whether more are waiting.
+    Either way the page lists the newest first.
+    """
+    if since is None:
+        events = list(ActivityEvent.objects.order_by('-timestamp', '-id')[:limit])
+        has_more = False
+    else:
+        events = list(ActivityEvent.objects.filter(since).order_by('id')[:limit + 1])
+        has_more = len(events) > limit
+        events = events[:limit][::-1]
+    activities = [
+        {
+            "id": event.id,
+            "timestamp": event.timestamp.isoformat(),
+            "time": timezone.localtime(event.timestamp).strftime("%H:%M"),
+            "action": event.action,
+            "user": event.user,
+            "details": event.details,
+            "status": event.status,
+        }
+        for event in events
+    ]
+    latest = max((activity["id"] for activity in activities), default=None)
+    return {"activities": activities, "latest": latest, "has_more": has_more}
+
+
+def recent_activity_data(request):
+    """Return recent activities (cached, see kpi_cache).
+
+    ``?since=<latest>`` only returns events newer than a previous response,
+    for incremental polling; ``?limit=`` caps the number of events. When
+    ``has_more`` is true, poll again at once with the new ``latest``.
+    """
+    try:
+        since = request.GET.get('since', '')
+        limit = parse_limit(request.GET.get('limit'), ACTIVITY_LIMIT, ACTIVITY_MAX_LIMIT)
+        since_filter = _parse_since(since)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    data = kpi_cache.get_or_compute(
+        'recent_activity', lambda: _recent_activities(since_filter, limit), (since, limit),
+    )
+    if data["latest"] is None and since.isdigit():
+        # Nothing new: hand the same cursor back for the next poll.
+        data = {**data, "latest": int(since)}
+    return JsonResponse(data)
+
+
+def form_choices(request, kind):
+    """Options of a form dropdown matching ``?q=`` (see dashboard/choices.py)."""
+    try:
+        options = choices.search(kind, request.GET.get('q', ''))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, 'choices': options})
 
-    # ---- NORMALIZE DATETIME ----
-    for act in activity_list:
-        if isinstance(act["datetime"], datetime):
-            continue
-        # convert date → datetime
-        act["datetime"] = make_aware(datetime.combine(act["datetime"], datetime.min.time()))
 
-    # ---- SORT & CLEAN ----
-    activity_list.sort(key=lambda x: x["datetime"], reverse=True)
+def kpi_cache_stats(request):
+    """Hit/miss counters of the dashboard KPI cache (this process)."""
+    return JsonResponse({'success': True, 'cache': kpi_cache.stats()})
 
-    for act in activity_list:
-        del act["datetime"]
 
-    return JsonResponse({"activities": activity_list})
+def dashboard_events(request):
+    """Server-sent events: status changes, claims and incidents as they happen."""
+    return event_stream_response(request, 'dashboard')
 
 
 def _extract_marque_modele_from_type(type_vehicule):
@@ -231,15 +247,7 @@ def agents(request):
 
 def show_agent(request, agent_id):
     """Return agent data as JSON for the view modal."""
-    agent = get_object_or_404(Agent, pk=agent_id)
-    data = {
-        'agent_id': agent.agent_id,
-        'nom': agent.nom,
-        'prenom': agent.prenom,
-        'email': agent.email,
-        'telephone': agent.telephone,
-        'role': agent.role,
-    }
+    data = AgentSerializer().get(agent_id)
     return JsonResponse({'success': True, 'agent': data})
 
 
@@ -259,20 +267,8 @@ def add_agent(request):
         role = payload.get('role', 'agent').strip().lower()  # Normalize to lowercase
         password = payload.get('password', '').strip()
 
-        # Generate ID
-        last_agent = Agent.objects.order_by('-agent_id').first()
-        if last_agent and last_agent.agent_id:
-            match = re.search(r'AG-(\d+)$', last_agent.agent_id)
-            if match:
-                next_num = int(match.group(1)) + 1
-            else:
-                next_num = 1
-        else:
-            next_num = 1
-        new_id = f"AG-{next_num:04d}"
-
+        # agent_id is allocated by Agent.save()
         agent = Agent(
-            agent_id=new_id,
             nom=nom,
             prenom=prenom,
             email=email,
@@ -345,11 +341,26 @@ def delete_agent(request, agent_id):
     agent.delete()
     return JsonResponse({'success': True, 'deleted_id': agent_id_str})
 
+CLIENT_FILTERS = [
+    ListFilter('ville', 'ville', 'Ville', lookup='icontains'),
+    ListFilter('pays', 'pays', 'Pays', lookup='icontains'),
+    ListFilter('date_from', 'date_inscription', 'Inscrit depuis', lookup='date__gte', input_type='date'),
+    ListFilter('date_to', 'date_inscription', "Inscrit jusqu'au", lookup='date__lte', input_type='date'),
+]
+CLIENT_SORTS = {
+    'id_client': ('id_client', 'ID'),
+    'nom': ('nom', 'Nom'),
+    'ville': ('ville', 'Ville'),
+    'inscription': ('date_inscription', 'Date inscription'),
+}
+
+
 def dashboard_clients(request):
-    # Display clients list
-    clients = Client.objects.all().order_by('-id_client')
+    # Display one page of the clients list
+    page = list_page(request, Client.objects.all(), CLIENT_FILTERS, CLIENT_SORTS, '-id_client')
     return render(request, 'DASHclients.html', {
-        'clients': clients
+        'clients': page.rows,
+        'page': page,
     })
 
 
@@ -388,18 +399,7 @@ def add_client(request):
 
 def show_client(request, client_id):
     """Return client data as JSON for the view modal."""
-    client = get_object_or_404(Client, pk=client_id)
-    data = {
-        'id_client': client.id_client,
-        'nom': client.nom,
-        'prenom': client.prenom,
-        'email': client.email,
-        'telephone': client.telephone,
-        'adresse': client.adresse,
-        'ville': client.ville,
-        'pays': client.pays,
-        'date_inscription': client.date_inscription.isoformat()
-    }
+    data = ClientSerializer().get(client_id)
     return JsonResponse({'success': True, 'client': data})
 
 
@@ -466,56 +466,98 @@ def delete_client(request, client_id):
     return JsonResponse({'success': True})
 
 
+def _driver_choices():
+    return [
+        (driver_id, f'{nom} {prenom}')
+        for driver_id, nom, prenom in Chauffeur.objects.order_by('nom').values_list('id_chauffeur', 'nom', 'prenom')
+    ]
+
+
+SHIPMENT_FILTERS = [
+    ListFilter('status', 'statut', 'Status', choices=STATUS_CHOICES),
+    ListFilter('driver', 'driver', 'Driver', choices=_driver_choices),
+    ListFilter('zone', 'zone', 'Zone', choices=Shipment.SHIPMENT_ZONE_CHOICES),
+    ListFilter('date_from', 'shipment_date', 'From', lookup='gte', input_type='date'),
+    ListFilter('date_to', 'shipment_date', 'To', lookup='lte', input_type='date'),
+]
+SHIPMENT_SORTS = {
+    'created': ('date_creation', 'Created'),
+    'date': ('shipment_date', 'Date'),
+    'status': ('statut', 'Status'),
+    'distance': ('distance', 'Distance'),
+    'id_shipment': ('id_shipment', 'Shipment ID'),
+}
+
+
 def dashboard_shipments(request):
-    shipments = Shipment.objects.all().order_by('-date_creation')
+    shipments = Shipment.objects.select_related('client', 'driver', 'package__client')
+    page = list_page(request, shipments, SHIPMENT_FILTERS, SHIPMENT_SORTS, '-created')
     drivers = Chauffeur.objects.filter(disponibilite=True).order_by('nom')
-    clients = Client.objects.all().order_by('nom')
     return render(request, 'DASHshipments.html', {
-        'shipments': shipments,
+        'shipments': page.rows,
+        'page': page,
         'drivers': drivers,
-        'clients': clients,
+        'clients': choices.clients(),
     })
 
 
-def list_shipments_json(request):
-    """Return all shipments as JSON."""
-    shipments = Shipment.objects.all().order_by('-date_creation')
-    data = []
-    for s in shipments:
-        data.append({
-            'id_shipment': s.id_shipment,
-            'client': s.client.nom + ' ' + s.client.prenom if s.client else (s.package.client.nom + ' ' + s.package.client.prenom if s.package and s.package.client else ''),
-            'client_id': s.client.id_client if s.client else (s.package.client.id_client if s.package and s.package.client else ''),
-            'origin': s.origin,
-            'destination': s.destination,
-            'status': s.statut,
-            'driver': s.driver.nom + ' ' + s.driver.prenom if s.driver else '',
-            'driver_id': s.driver.id_chauffeur if s.driver else '',
-            'date': s.shipment_date.isoformat() if s.shipment_date else '',
-            'zone': s.zone,
-            'speed': s.speed,
-        })
-    return JsonResponse({'success': True, 'shipments': data})
+LIST_MAX_LIMIT = 1000
+
+
+def _list_json(request, serializer_class, key):
+    """Shared body of the ``*_json`` list endpoints.
+
+    ``?fields=a,b`` restricts the columns, ``?limit=N`` switches to keyset
+    pagination (``next_cursor`` is then passed back as ``?cursor=``).
+    Without ``limit`` every row is streamed, in the same envelope as before.
+    """
+    try:
+        serializer = serializer_class(fields=request.GET.get('fields'))
+        limit = parse_limit(request.GET.get('limit'), None, LIST_MAX_LIMIT)
+        queryset = serializer.queryset()
+        if limit is None and not request.GET.get('cursor'):
+            rows = queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+            return StreamingJsonResponse(map(serializer.to_dict, rows), key)
+        rows, next_cursor = paginate(
+            queryset, serializer.ordering,
+            cursor=request.GET.get('cursor'), limit=limit or LIST_MAX_LIMIT,
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, key: serializer.serialize(rows), 'next_cursor': next_cursor})
+
+
+async def _alist_json(request, serializer_class, key):
+    """Async version of ``_list_json`` (same parameters and envelope)."""
+    try:
+        serializer = serializer_class(fields=request.GET.get('fields'))
+        limit = parse_limit(request.GET.get('limit'), None, LIST_MAX_LIMIT)
+        queryset = serializer.queryset()
+        if limit is None and not request.GET.get('cursor'):
+            if isinstance(request, ASGIRequest):
+                rows = (serializer.to_dict(row) async for row in queryset.aiterator(chunk_size=ITERATOR_CHUNK_SIZE))
+            else:
+                # WSGI consumes the body outside the event loop: a sync
+                # iterator keeps the stream lazy there.
+                rows = map(serializer.to_dict, queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE))
+            return StreamingJsonResponse(rows, key)
+        rows, next_cursor = await apaginate(
+            queryset, serializer.ordering,
+            cursor=request.GET.get('cursor'), limit=limit or LIST_MAX_LIMIT,
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    return JsonResponse({'success': True, key: serializer.serialize(rows), 'next_cursor': next_cursor})
+
+
+async def list_shipments_json(request):
+    """Return shipments as JSON (async, see _list_json for fields/limit/cursor)."""
+    return await _alist_json(request, ShipmentSerializer, 'shipments')
 
 
 def show_shipment(request, shipment_id):
     """Return shipment data as JSON for the view modal."""
-    shipment = get_object_or_404(Shipment, pk=shipment_id)
-    data = {
-        'id_shipment': shipment.id_shipment,
-        'client': shipment.client.nom + ' ' + shipment.client.prenom if shipment.client else '',
-        'client_id': shipment.client.id_client if shipment.client else '',
-        'origin': shipment.origin,
-        'destination': shipment.destination,
-        'status': shipment.statut,
-        'driver': shipment.driver.nom + ' ' + shipment.driver.prenom if shipment.driver else '',
-        'driver_id': shipment.driver.id_chauffeur if shipment.driver else '',
-        'date': shipment.shipment_date.isoformat() if shipment.shipment_date else '',
-        'zone': shipment.zone,
-        'speed': shipment.speed,
-        'distance': str(shipment.distance) if shipment.distance else '',
-        'description': shipment.description,
-    }
+    data = ShipmentSerializer(fields='__all__').get(shipment_id)
     return JsonResponse({'success': True, 'shipment': data})
 
 
@@ -596,7 +638,8 @@ def add_shipment(request):
             else:
                 shipment.shipment_date = shipment_date
 
-        shipment.save()
+        with history.changed_by('dashboard', actor=request.session.get('user_id', '')):
+            shipment.save()
 
         return JsonResponse({
             'success': True,
@@ -614,6 +657,29 @@ def add_shipment(request):
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
 
+@require_POST
+def bulk_add_shipments(request):
+    """Create many shipments at once.
+
+    Accepts a JSON list (or {"shipments": [...]}), a JSON Lines or CSV body,
+    or an uploaded ``file``. Every row gets its own result; invalid rows are
+    reported without aborting the others.
+    """
+    try:
+        rows = rows_from_request(request)
+        results = list(import_shipments(rows))
+    except (ValueError, UnicodeDecodeError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    created = sum(1 for r in results if r['success'])
+    return JsonResponse({
+        'success': True,
+        'created': created,
+        'failed': len(results) - created,
+        'results': results,
+    })
+
+
 @require_POST
 def edit_shipment(request, shipment_id):
     """Edit an existing shipment."""
@@ -661,7 +727,8 @@ def edit_shipment(request, shipment_id):
         elif 'driver_id' in payload:
             shipment.driver = None
 
-        shipment.save()
+        with history.changed_by('dashboard', actor=request.session.get('user_id', '')):
+            shipment.save()
 
         return JsonResponse({
             'success': True,
@@ -691,6 +758,17 @@ def delete_shipment(request, shipment_id):
     return JsonResponse({'success': True, 'deleted_id': shipment_id_str})
 
 
+DRIVER_FILTERS = [
+    ListFilter('statut', 'statut', 'Status', choices=STATUT_CHOICES),
+    ListFilter('disponibilite', 'disponibilite', 'Availability', choices=[('True', 'Available'), ('False', 'Unavailable')]),
+]
+DRIVER_SORTS = {
+    'id_chauffeur': ('id_chauffeur', 'ID'),
+    'nom': ('nom', 'Name'),
+    'embauche': ('date_embauche', 'Hire date'),
+}
+
+
 def drivers(request):
 
     if request.method == "POST":
@@ -727,30 +805,21 @@ def drivers(request):
             return redirect('dashboard_drivers')
 
     # GET REQUEST
-    chauffeurs = Chauffeur.objects.all().order_by('-id_chauffeur')
+    page = list_page(
+        request, Chauffeur.objects.select_related('vehicule'),
+        DRIVER_FILTERS, DRIVER_SORTS, '-id_chauffeur',
+    )
     vehicules = Vehicule.objects.all().order_by('-id_vehicule')
     return render(request, 'drivers.html', {
-        'drivers': chauffeurs,
+        'drivers': page.rows,
+        'page': page,
         'vehicles': vehicules,
     })
 
 
 def show_driver(request, driver_id):
     """Return driver data as JSON for the view modal."""
-    chauffeur = get_object_or_404(Chauffeur, pk=driver_id)
-    data = {
-        'id_chauffeur': chauffeur.id_chauffeur,
-        'nom': chauffeur.nom,
-        'prenom': chauffeur.prenom,
-        'email': chauffeur.email,
-        'telephone': chauffeur.telephone,
-        'numero_permis': chauffeur.numero_permis,
-        'disponibilite': chauffeur.disponibilite,
-        'statut': chauffeur.statut,
-        'vehicule': chauffeur.vehicule.immatriculation if chauffeur.vehicule else None,
-        'vehicule_id': chauffeur.vehicule.id_vehicule if chauffeur.vehicule else None,
-        'date_embauche': chauffeur.date_embauche.isoformat() if chauffeur.date_embauche else None,
-    }
+    data = DriverSerializer().get(driver_id)
     return JsonResponse({'success': True, 'driver': data})
 
 
@@ -927,44 +996,33 @@ def add_driver(request):
     return redirect('dashboard_drivers')
 
 
+VEHICLE_FILTERS = [
+    ListFilter('etat', 'etat', 'Status', choices=[
+        ('disponible', 'Available'),
+        ('en_maintenance', 'Maintenance'),
+        ('hors_service', 'Out of Service'),
+    ]),
+    ListFilter('type', 'type_vehicule', 'Type', lookup='icontains'),
+]
+VEHICLE_SORTS = {
+    'id_vehicule': ('id_vehicule', 'Vehicle ID'),
+    'immatriculation': ('immatriculation', 'Plate Number'),
+    'capacite': ('capacite_charge', 'Capacity'),
+    'service': ('date_mise_service', 'Service Date'),
+}
+
+
 def vehicles(request):
-    vehicles_list = Vehicule.objects.all().order_by('-id_vehicule')
+    page = list_page(request, Vehicule.objects.all(), VEHICLE_FILTERS, VEHICLE_SORTS, '-id_vehicule')
     return render(request, 'vehicles.html', {
-        'vehicles': vehicles_list,
+        'vehicles': page.rows,
+        'page': page,
     })
 
 
 def show_vehicle(request, vehicle_id):
     """Return vehicle data as JSON for the view modal."""
-    vehicle = get_object_or_404(Vehicule, pk=vehicle_id)
-    # The Vehicule model stores different field names than older UI expects.
-    # Provide backward-compatible keys where possible.
-    # Attempt to split marque/modele from type_vehicule if encoded there.
-    marque = ''
-    modele = ''
-    type_display = vehicle.type_vehicule or ''
-    # If type_vehicule was stored as "<type> - <marque> <modele>" try to split
-    if ' - ' in type_display:
-        parts = type_display.split(' - ', 1)
-        type_display = parts[0]
-        rest = parts[1]
-        # naive split for marque/modele
-        tokens = rest.split(' ', 1)
-        marque = tokens[0] if tokens else ''
-        modele = tokens[1] if len(tokens) > 1 else ''
-
-    data = {
-        'id_vehicule': vehicle.id_vehicule,
-        'immatriculation': vehicle.immatriculation,
-        'marque': marque,
-        'modele': modele,
-        'type_vehicule': type_display,
-        # Provide canonical keys expected by the frontend
-        'capacite_charge': str(vehicle.capacite_charge) if vehicle.capacite_charge is not None else '',
-        'consommation': str(vehicle.consommation) if getattr(vehicle, 'consommation', None) is not None else '',
-        'date_mise_service': vehicle.date_mise_service.isoformat() if vehicle.date_mise_service else '',
-        'etat': vehicle.etat,
-    }
+    data = VehicleSerializer().get(vehicle_id)
     return JsonResponse({'success': True, 'vehicle': data})
 
 
@@ -1120,50 +1178,36 @@ def delete_vehicle(request, vehicle_id):
     return JsonResponse({'success': True, 'deleted_id': vehicle_id_str})
 
 
+INCIDENT_FILTERS = [
+    ListFilter('status', 'status', 'Status', choices=Incident.INCIDENT_STATUS_CHOICES),
+    ListFilter('priority', 'priority', 'Priority', choices=Incident.PRIORITY_CHOICES),
+    ListFilter('type', 'incident_type', 'Type', choices=Incident.INCIDENT_TYPE_CHOICES),
+    ListFilter('date_from', 'incident_date', 'From', lookup='date__gte', input_type='date'),
+    ListFilter('date_to', 'incident_date', 'To', lookup='date__lte', input_type='date'),
+]
+INCIDENT_SORTS = {
+    'date': ('incident_date', 'Date'),
+    'created': ('created_at', 'Created'),
+    'id_incident': ('id_incident', 'Incident ID'),
+}
+
+
 def incidents(request):
-    incidents_list = Incident.objects.all().order_by('-incident_date')
+    page = list_page(request, Incident.objects.all(), INCIDENT_FILTERS, INCIDENT_SORTS, '-date')
     return render(request, 'incidents.html', {
-        'incidents': incidents_list,
+        'incidents': page.rows,
+        'page': page,
     })
 
 
 def list_incidents_json(request):
-    """Return all incidents as JSON."""
-    incidents_list = Incident.objects.all().order_by('-incident_date')
-    data = []
-    for inc in incidents_list:
-        data.append({
-            'id_incident': inc.id_incident,
-            'incident_type': inc.incident_type,
-            'type_display': inc.get_incident_type_display(),
-            'description': inc.description,
-            'status': inc.status,
-            'status_display': inc.get_status_display(),
-            'priority': inc.priority,
-            'priority_display': inc.get_priority_display(),
-            'date': inc.incident_date.strftime('%Y-%m-%d') if inc.incident_date else '',
-            'commentaire': inc.commentaire,
-        })
-    return JsonResponse({'success': True, 'incidents': data})
+    """Return incidents as JSON (see _list_json for fields/limit/cursor)."""
+    return _list_json(request, IncidentSerializer, 'incidents')
 
 
 def show_incident(request, incident_id):
     """Return incident data as JSON for the view modal."""
-    incident = get_object_or_404(Incident, pk=incident_id)
-    data = {
-        'id_incident': incident.id_incident,
-        'incident_type': incident.incident_type,
-        'type_display': incident.get_incident_type_display(),
-        'description': incident.description,
-        'status': incident.status,
-        'status_display': incident.get_status_display(),
-        'priority': incident.priority,
-        'priority_display': incident.get_priority_display(),
-        'date': incident.incident_date.strftime('%Y-%m-%d') if incident.incident_date else '',
-        'commentaire': incident.commentaire,
-        'created_at': incident.created_at.isoformat() if incident.created_at else '',
-        'resolution_date': incident.resolution_date.isoformat() if incident.resolution_date else '',
-    }
+    data = IncidentSerializer(fields='__all__').get(incident_id)
     return JsonResponse({'success': True, 'incident': data})
 
 
@@ -1269,29 +1313,34 @@ def delete_incident(request, incident_id):
     return JsonResponse({'success': True, 'deleted_id': incident_id_str})
 
 
+INVOICE_FILTERS = [
+    ListFilter('client', 'client', 'Client ID'),
+    ListFilter('date_from', 'invoice_date', 'From', lookup='gte', input_type='date'),
+    ListFilter('date_to', 'invoice_date', 'To', lookup='lte', input_type='date'),
+]
+INVOICE_SORTS = {
+    'date': ('invoice_date', 'Date'),
+    'amount': ('total_amount', 'Amount'),
+    'id_invoice': ('id_invoice', 'Invoice ID'),
+}
+
+
 def invoices(request):
-    invoices_list = Invoice.objects.all().order_by('-invoice_date')
-    clients = Client.objects.all().order_by('nom')
-    shipments = Shipment.objects.all().order_by('-date_creation')
+    page = list_page(
+        request, Invoice.objects.select_related('client'),
+        INVOICE_FILTERS, INVOICE_SORTS, '-date',
+    )
     return render(request, 'invoices.html', {
-        'invoices': invoices_list,
-        'clients': clients,
-        'shipments': shipments,
+        'invoices': page.rows,
+        'page': page,
+        'clients': choices.clients(),
+        'shipments': choices.invoiceable_shipments(),
     })
 
 
 def show_invoice(request, invoice_id):
     """Return invoice data as JSON for the view modal."""
-    invoice = get_object_or_404(Invoice, pk=invoice_id)
-    data = {
-        'id_invoice': invoice.id_invoice,
-        'client': f"{invoice.client.nom} {invoice.client.prenom}" if invoice.client else '',
-        'client_id': invoice.client.id_client if invoice.client else '',
-        'shipment': invoice.shipment.id_shipment if invoice.shipment else '',
-        'shipment_id': invoice.shipment.id_shipment if invoice.shipment else '',
-        'total_amount': str(invoice.total_amount),
-        'invoice_date': invoice.invoice_date.strftime('%Y-%m-%d') if invoice.invoice_date else '',
-    }
+    data = InvoiceSerializer().get(invoice_id)
     return JsonResponse({'success': True, 'invoice': data})
 
 
@@ -1349,29 +1398,34 @@ def delete_invoice(request, invoice_id):
     return JsonResponse({'success': True, 'deleted_id': invoice_id_str})
 
 
+PACKAGE_FILTERS = [
+    ListFilter('type', 'package_type', 'Type', choices=Package.PACKAGE_TYPE_CHOICES),
+    ListFilter('client', 'client', 'Client ID'),
+    ListFilter('date_from', 'date_creation', 'From', lookup='date__gte', input_type='date'),
+    ListFilter('date_to', 'date_creation', 'To', lookup='date__lte', input_type='date'),
+]
+PACKAGE_SORTS = {
+    'id_package': ('id_package', 'Package ID'),
+    'created': ('date_creation', 'Created'),
+    'weight': ('weight', 'Weight'),
+}
+
+
 def package(request):
-    packages_list = Package.objects.all().order_by('-id_package')
-    clients = Client.objects.all().order_by('nom')
+    page = list_page(
+        request, Package.objects.select_related('client'),
+        PACKAGE_FILTERS, PACKAGE_SORTS, '-id_package',
+    )
     return render(request, 'package.html', {
-        'packages': packages_list,
-        'clients': clients,
+        'packages': page.rows,
+        'page': page,
+        'clients': choices.clients(),
     })
 
 
 def show_package(request, package_id):
     """Return package data as JSON for the view modal."""
-    package = get_object_or_404(Package, pk=package_id)
-    data = {
-        'id_package': package.id_package,
-        'tracking_number': package.tracking_number,
-        'client': f"{package.client.nom} {package.client.prenom}" if package.client else '',
-        'client_id': package.client.id_client if package.client else '',
-        'weight': str(package.weight),
-        'number_of_pieces': package.number_of_pieces,
-        'package_type': package.package_type,
-        'package_type_display': package.get_package_type_display(),
-        'date_creation': package.date_creation.strftime('%Y-%m-%d %H:%M') if package.date_creation else '',
-    }
+    data = PackageSerializer().get(package_id)
     return JsonResponse({'success': True, 'package': data})
 
 
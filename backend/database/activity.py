@@ -0,0 +1,143 @@
+"""
+Activity log writers.
+
+Every creation of a client, shipment, driver, vehicle, invoice, package,
+incident or agent, every shipment status change and every claim of an
+unassigned shipment appends one ActivityEvent in the same transaction as
+the write. The dashboard feed then reads the newest events with a single
+indexed query, and database.live pushes some of them to open pages.
+"""
+from django.db.models.signals import post_save
+
+from .models import (
+    ActivityEvent, Agent, Chauffeur, Client, Incident, Invoice, Package, Shipment, Vehicule,
+)
+from .signals import invoices_created, shipments_imported, shipments_updated
+
+
+def _full_name(person):
+    return f"{person.nom} {person.prenom}" if person is not None else "Unknown"
+
+
+def _shipment_client(shipment):
+    client = shipment.client
+    if client is None and shipment.package_id:
+        client = shipment.package.client
+    return client
+
+
+def describe_created(instance):
+    """Return the ActivityEvent fields for a newly created ``instance``."""
+    if isinstance(instance, Shipment):
+        return {
+            'kind': 'shipment_created', 'action': "New Shipment",
+            'user': _full_name(_shipment_client(instance)),
+            'details': f"Shipment #{instance.id_shipment} created",
+            'status': instance.statut,
+        }
+    if isinstance(instance, Incident):
+        return {
+            'kind': 'incident_created', 'action': "Incident Reported", 'user': "System",
+            'details': instance.description, 'status': instance.status,
+        }
+    if isinstance(instance, Client):
+        return {
+            'kind': 'client_created', 'action': "New Client", 'user': _full_name(instance),
+            'details': "Client registered", 'status': "Completed",
+        }
+    if isinstance(instance, Chauffeur):
+        return {
+            'kind': 'driver_created', 'action': "New Driver", 'user': _full_name(instance),
+            'details': "Driver added to system", 'status': instance.statut,
+        }
+    if isinstance(instance, Vehicule):
+        return {
+            'kind': 'vehicle_created', 'action': "Vehicle Added", 'user': "System",
+            'details': f"Vehicle {instance.immatriculation}", 'status': instance.etat,
+        }
+    if isinstance(instance, Invoice):
+        return {
+            'kind': 'invoice_created', 'action': "Invoice Generated", 'user': _full_name(instance.client),
+            'details': f"Invoice #{instance.id_invoice}", 'status': "Completed",
+        }
+    if isinstance(instance, Package):
+        return {
+            'kind': 'package_created', 'action': "Package Created", 'user': _full_name(instance.client),
+            'details': f"Tracking {instance.tracking_number}", 'status': "Completed",
+        }
+    if isinstance(instance, Agent):
+        return {
+            'kind': 'agent_created', 'action': "Agent Added", 'user': _full_name(instance),
+            'details': f"Role: {instance.role}", 'status': "Active",
+        }
+    return None
+
+
+def event_for(instance, **fields):
+    return ActivityEvent(
+        object_type=type(instance).__name__,
+        object_id=str(instance.pk),
+        **fields,
+    )
+
+
+def _on_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        fields = describe_created(instance)
+        if fields:
+            event_for(instance, **fields).save()
+        return
+
+    if sender is Shipment:
+        for event in describe_changes(instance, getattr(instance, '_loaded_values', {})):
+            event.save()
+
+
+def describe_changes(shipment, previous):
+    """Events for a shipment whose columns were ``previous`` (attname: value)."""
+    events = []
+    if 'driver_id' in previous and previous['driver_id'] is None and shipment.driver_id:
+        events.append(event_for(
+            shipment, kind='shipment_claimed', action="Shipment Claimed",
+            user=_full_name(shipment.driver),
+            details=f"Shipment #{shipment.id_shipment} assigned to {shipment.driver_id}",
+            status=shipment.statut,
+        ))
+    old_status = previous.get('statut')
+    if old_status is not None and old_status != shipment.statut:
+        events.append(event_for(
+            shipment, kind='shipment_status', action="Shipment Status Changed",
+            user=_full_name(shipment.driver) if shipment.driver_id else "System",
+            details=f"Shipment #{shipment.id_shipment}: {old_status} → {shipment.statut}",
+            status=shipment.statut,
+        ))
+    return events
+
+
+def _on_shipments_imported(sender, shipments, **kwargs):
+    ActivityEvent.objects.bulk_create(
+        event_for(shipment, **describe_created(shipment)) for shipment in shipments
+    )
+
+
+def _on_invoices_created(sender, invoices, **kwargs):
+    ActivityEvent.objects.bulk_create(
+        event_for(invoice, **describe_created(invoice)) for invoice in invoices
+    )
+
+
+def _on_shipments_updated(sender, shipments, previous, **kwargs):
+    # Saved one by one (not bulk_create) so database.live pushes them.
+    for shipment in shipments:
+        for event in describe_changes(shipment, previous[shipment.pk]):
+            event.save()
+
+
+def connect_signals():
+    for model in (Shipment, Incident, Client, Chauffeur, Vehicule, Invoice, Package, Agent):
+        post_save.connect(_on_post_save, sender=model, dispatch_uid=f'activity_post_save_{model.__name__}')
+    shipments_imported.connect(_on_shipments_imported, dispatch_uid='activity_shipments_imported')
+    shipments_updated.connect(_on_shipments_updated, dispatch_uid='activity_shipments_updated')
+    invoices_created.connect(_on_invoices_created, dispatch_uid='activity_invoices_created')
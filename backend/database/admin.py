@@ -2,6 +2,7 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
+from . import history
 from .models import (
     Client,
     Vehicule,
@@ -43,16 +44,34 @@ def unblock_shipments(modeladmin, request, queryset):
     modeladmin.message_user(request, f"{updated} shipment(s) unblocked.")
 
 
+def _status_action(status, label):
+    @admin.action(description=f'Mark selected shipments as {label}')
+    def action(modeladmin, request, queryset):
+        updated = history.set_status(queryset, status, source='bulk', actor=request.user.get_username())
+        modeladmin.message_user(request, f"{updated} shipment(s) marked as {label}.")
+    action.__name__ = f'mark_{status.lower()}'
+    return action
+
+
+# Status changes go through history.set_status(): one UPDATE, with the
+# status history, statistics and caches kept in step.
+STATUS_ACTIONS = [
+    _status_action('IN_TRANSIT', 'in transit'),
+    _status_action('DELIVERED', 'delivered'),
+    _status_action('FAILED', 'failed'),
+]
+
+
 class ShipmentAdmin(admin.ModelAdmin):
     # Build display/filter lists depending on whether is_blocked exists
     if _HAS_IS_BLOCKED:
         list_display = ('id_shipment', 'package', 'client', 'statut', 'is_blocked', 'date_creation')
         list_filter = ('statut', 'is_blocked')
-        actions = [block_shipments, unblock_shipments]
+        actions = [block_shipments, unblock_shipments, *STATUS_ACTIONS]
     else:
         list_display = ('id_shipment', 'package', 'client', 'statut', 'date_creation')
         list_filter = ('statut',)
-        actions = []
+        actions = STATUS_ACTIONS
 
 
 admin.site.register(Client)
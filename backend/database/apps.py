@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class DatabaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'database'
+
+    def ready(self):
+        from . import activity, history, identity, live, stats
+        activity.connect_signals()
+        history.connect_signals()
+        identity.connect_signals()
+        live.connect_signals()
+        stats.connect_signals()
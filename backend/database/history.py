@@ -0,0 +1,164 @@
+"""
+Shipment status history (ShipmentEvent).
+
+Every shipment gets one event when it is created and one per status change,
+inserted by the post_save receiver inside Shipment.save()'s transaction, so
+the history cannot disagree with ``Shipment.statut``. Bulk imports get their
+creation events right after each chunk (``shipments_imported``);
+``set_status()`` is the bulk equivalent of saving each shipment (it sends
+``shipments_updated``).
+
+Callers say where a change comes from with ``changed_by()``::
+
+    with history.changed_by('driver', actor=driver.id_chauffeur):
+        shipment.save()
+
+Dwell time per status is computed in SQL with a window function over the
+timeline index: see ``dwell_times()`` and the ``shipment_dwell_times``
+command.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .models import Shipment, ShipmentEvent
+from .signals import shipments_imported, shipments_updated
+
+
+_source = ContextVar('shipment_history_source', default=('system', ''))
+
+# Average/maximum time spent in each status, from each event to the next one
+# of the same shipment (the current status of a shipment is still open and is
+# not counted). Window functions: SQLite >= 3.25, PostgreSQL, MySQL 8.
+DWELL_TIME_SQL = """
+SELECT status, COUNT(*) AS transitions,
+       AVG(seconds) AS avg_seconds, MAX(seconds) AS max_seconds
+FROM (
+    SELECT status,
+           {elapsed} AS seconds
+    FROM (
+        SELECT status, timestamp,
+               LEAD(timestamp) OVER (PARTITION BY shipment_id ORDER BY timestamp, id) AS next_timestamp
+        FROM database_shipmentevent
+        {where}
+    ) AS steps
+    WHERE next_timestamp IS NOT NULL
+) AS dwell
+GROUP BY status
+ORDER BY status
+"""
+
+ELAPSED_SECONDS = {
+    'sqlite': "(julianday(next_timestamp) - julianday(timestamp)) * 86400.0",
+    'postgresql': "EXTRACT(EPOCH FROM next_timestamp - timestamp)",
+    'mysql': "TIMESTAMPDIFF(MICROSECOND, timestamp, next_timestamp) / 1000000.0",
+}
+
+
+@contextmanager
+def changed_by(source, actor=''):
+    """Attribute the status changes saved in this block to ``source``/``actor``."""
+    token = _source.set((source, str(actor or '')))
+    try:
+        yield
+    finally:
+        _source.reset(token)
+
+
+def _event(shipment, previous_status='', timestamp=None):
+    source, actor = _source.get()
+    return ShipmentEvent(
+        shipment_id=shipment.pk,
+        status=shipment.statut,
+        previous_status=previous_status or '',
+        timestamp=timestamp or timezone.now(),
+        source=source,
+        actor=actor,
+    )
+
+
+def _on_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        _event(instance, timestamp=instance.date_creation).save()
+        return
+    previous = getattr(instance, '_loaded_values', {}).get('statut')
+    if previous is not None and previous != instance.statut:
+        _event(instance, previous_status=previous).save()
+
+
+def _on_shipments_imported(sender, shipments, **kwargs):
+    with changed_by('import'):
+        ShipmentEvent.objects.bulk_create(
+            _event(shipment, timestamp=shipment.date_creation) for shipment in shipments
+        )
+
+
+def _on_shipments_updated(sender, shipments, previous, **kwargs):
+    now = timezone.now()
+    ShipmentEvent.objects.bulk_create(
+        _event(shipment, previous_status=previous[shipment.pk]['statut'], timestamp=now)
+        for shipment in shipments
+        if 'statut' in previous[shipment.pk]
+    )
+
+
+def set_status(queryset, status, source='bulk', actor=''):
+    """Set ``status`` on every shipment of ``queryset`` with one UPDATE.
+
+    Shipments already in ``status`` are left alone. The others are locked,
+    updated, and announced with ``shipments_updated`` in the same
+    transaction (history, statistics, activity and caches follow). Returns
+    the number of shipments changed.
+    """
+    with transaction.atomic(), changed_by(source, actor):
+        shipments = list(
+            queryset.exclude(statut=status).select_related('driver', 'package')
+            .select_for_update(of=('self',))
+        )
+        if not shipments:
+            return 0
+        Shipment.objects.filter(pk__in=[shipment.pk for shipment in shipments]).update(statut=status)
+        previous = {}
+        for shipment in shipments:
+            previous[shipment.pk] = {'statut': shipment.statut}
+            shipment.statut = status
+            shipment._loaded_values['statut'] = status
+        shipments_updated.send(sender=Shipment, shipments=shipments, previous=previous)
+    return len(shipments)
+
+
+def timeline(shipment_ids):
+    """Events of ``shipment_ids``, oldest first (range scans of the timeline index)."""
+    return (
+        ShipmentEvent.objects.filter(shipment_id__in=shipment_ids)
+        .order_by('shipment_id', 'timestamp', 'id')
+    )
+
+
+def dwell_times(since=None):
+    """[{status, transitions, avg_seconds, max_seconds}, ...] computed in SQL.
+
+    ``since`` (a datetime) restricts the computation to the events logged
+    from then on.
+    """
+    elapsed = ELAPSED_SECONDS.get(connection.vendor)
+    if elapsed is None:
+        raise NotImplementedError(f'dwell_times: unsupported database {connection.vendor!r}')
+    where, params = '', []
+    if since is not None:
+        where, params = 'WHERE timestamp >= %s', [since]
+    with connection.cursor() as cursor:
+        cursor.execute(DWELL_TIME_SQL.format(elapsed=elapsed, where=where), params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def connect_signals():
+    post_save.connect(_on_post_save, sender=Shipment, dispatch_uid='history_post_save')
+    shipments_imported.connect(_on_shipments_imported, dispatch_uid='history_shipments_imported')
+    shipments_updated.connect(_on_shipments_updated, dispatch_uid='history_shipments_updated')
@@ -0,0 +1,155 @@
+"""
+Registry of the hot queries checked by ``manage.py explain_hot_queries``.
+
+Each app lists the queries its busy pages run in its own ``hot_queries.py``
+module (found by ``autodiscover()``, like admin.py modules)::
+
+    from database.hot_queries import register
+
+    @register('driver: today\'s shipments')
+    def todays_shipments(sample):
+        return Shipment.objects.filter(driver_id=sample.driver_id, shipment_date=sample.today)
+
+A query function receives a ``Sample`` (real ids and dates picked from the
+database) and returns a QuerySet shaped like the one the code runs, LIMIT
+included. ``allow_scan='reason'`` documents a query that may legitimately
+read a whole table.
+"""
+import re
+
+from django.db import connection
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.module_loading import autodiscover_modules
+
+from .models import (
+    ActivityEvent, Chauffeur, Client, DailyStats, Incident, Invoice, Package, Shipment,
+)
+
+
+class HotQuery:
+    def __init__(self, name, build, allow_scan=None):
+        self.name = name
+        self.build = build
+        self.allow_scan = allow_scan
+
+
+_registry = {}
+
+
+def register(name, allow_scan=None):
+    def decorator(build):
+        _registry[name] = HotQuery(name, build, allow_scan)
+        return build
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules('hot_queries')
+
+
+def registered():
+    autodiscover()
+    return list(_registry.values())
+
+
+class Sample:
+    """Parameter values taken from the data, so plans match real lookups."""
+
+    @cached_property
+    def today(self):
+        return timezone.localdate()
+
+    @cached_property
+    def month_start(self):
+        return self.today.replace(day=1)
+
+    @cached_property
+    def driver_id(self):
+        return Chauffeur.objects.values_list('pk', flat=True).first() or 'CH00000000'
+
+    @cached_property
+    def client_id(self):
+        return Client.objects.values_list('pk', flat=True).first() or 'CL00000000'
+
+    @cached_property
+    def tracking_number(self):
+        return Package.objects.values_list('tracking_number', flat=True).first() or 'UNKNOWN'
+
+    @cached_property
+    def shipment_id(self):
+        return Shipment.objects.values_list('pk', flat=True).first() or 'SHP00000000'
+
+
+# =========================
+#     PLAN INSPECTION
+# =========================
+FULL_SCAN_PATTERNS = {
+    # "SCAN t" without "USING [COVERING] INDEX" reads every row of t.
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(?P<table>\w+)(?! USING)(?:$|\s)', re.M),
+    'postgresql': re.compile(r'Seq Scan on (?P<table>\w+)'),
+    'mysql': re.compile(r'table:\s*(?P<table>\w+).*?type:\s*ALL', re.S),
+}
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+    'postgresql': re.compile(r'Sort Key:'),
+    'mysql': re.compile(r'Using filesort'),
+}
+
+
+def full_scans(plan):
+    """Names of the tables ``plan`` (explain() text) reads entirely."""
+    pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+    if pattern is None:
+        return []
+    tables = set(connection.introspection.table_names())
+    # Subqueries and CTEs show up as scans too: keep real tables only.
+    return sorted({m.group('table') for m in pattern.finditer(plan) if m.group('table') in tables})
+
+
+def sorts(plan):
+    pattern = SORT_PATTERNS.get(connection.vendor)
+    return bool(pattern and pattern.search(plan))
+
+
+# =========================
+#   QUERIES OF THIS APP
+# =========================
+@register('stats: shipments created per day (rebuild)')
+def rollup_created(sample):
+    from .stats import local_range
+    start, end = local_range(sample.month_start, sample.today)
+    return Shipment.objects.filter(date_creation__gte=start, date_creation__lt=end).values('zone', 'speed')
+
+
+@register('stats: invoices per day (rebuild)')
+def rollup_revenue(sample):
+    return Invoice.objects.filter(invoice_date__gte=sample.month_start, invoice_date__lte=sample.today).values('invoice_date', 'total_amount')
+
+
+@register('stats: incidents per day (rebuild)')
+def rollup_incidents(sample):
+    from .stats import local_range
+    start, end = local_range(sample.month_start, sample.today)
+    return Incident.objects.filter(incident_date__gte=start, incident_date__lt=end).values('incident_date')
+
+
+@register('stats: delivered shipments (rebuild)', allow_scan='all DELIVERED rows, grouped by an expression')
+def rollup_delivered(sample):
+    return Shipment.objects.filter(statut='DELIVERED').values('shipment_date', 'date_creation')
+
+
+@register('dashboard: monthly revenue')
+def monthly_revenue(sample):
+    return DailyStats.objects.filter(date__gte=sample.month_start, date__lte=sample.today).values('revenue')
+
+
+@register('dashboard: recent activity feed')
+def activity_feed(sample):
+    return ActivityEvent.objects.order_by('-timestamp', '-id')[:40]
+
+
+@register('tracking: shipment timeline')
+def shipment_timeline(sample):
+    from .history import timeline
+    return timeline([sample.shipment_id])
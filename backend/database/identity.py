@@ -0,0 +1,149 @@
+"""
+Identity of the logged-in user (agent, driver or client).
+
+``IdentityMiddleware`` sets ``request.identity``: a Principal with the
+display fields of the user the request comes from (bearer token or session,
+see database.tokens), or None. It is resolved lazily, once per request, and
+the fields are kept in the session with a version number, so a page
+normally loads no row at all:
+
+- the session role picks the model: 'driver' a Chauffeur, 'client' a
+  Client, an Agent role ('admin', 'agent') an Agent;
+- saving or deleting that row (ex: from the dashboard views) bumps its
+  version in the cache selected by ``IDENTITY_CACHE``, and every session
+  holding the old version loads the row again on its next request;
+- a user whose row is gone is remembered as such (no query per request).
+
+With the default local-memory cache, versions are per process: point
+``IDENTITY_CACHE`` at a shared backend when running several workers.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from .models import Agent, Chauffeur, Client
+from .tokens import request_identity
+
+
+SESSION_KEY = '_identity'
+KEY_PREFIX = 'identity:version'
+
+DISPLAY_FIELDS = ('nom', 'prenom', 'email')
+
+AGENT_ROLES = {value for value, _ in Agent.ROLE_CHOICES}
+
+
+class Principal:
+    """Display fields of the logged-in agent, driver or client."""
+
+    def __init__(self, role, user_id, nom='', prenom='', email=''):
+        self.role = role
+        self.user_id = user_id
+        self.nom = nom
+        self.prenom = prenom
+        self.email = email
+
+    @property
+    def full_name(self):
+        return f'{self.prenom} {self.nom}'.strip()
+
+    def __str__(self):
+        return self.full_name or str(self.user_id)
+
+    def __repr__(self):
+        return f'<Principal {self.role} {self.user_id}>'
+
+
+def model_for(role):
+    """Model of the users with ``role``, or None for an unknown role."""
+    if role == 'driver':
+        return Chauffeur
+    if role == 'client':
+        return Client
+    if role in AGENT_ROLES:
+        return Agent
+    return None
+
+
+def get_cache():
+    return caches[getattr(settings, 'IDENTITY_CACHE', 'default')]
+
+
+def _version_key(model, pk):
+    return f'{KEY_PREFIX}:{model._meta.label_lower}:{pk}'
+
+
+def version(model, pk):
+    cache = get_cache()
+    key = _version_key(model, pk)
+    value = cache.get(key)
+    if value is None:
+        # Lost or never set: a new version, agreed on by concurrent callers.
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key) or time.time_ns()
+    return value
+
+
+def invalidate(model, pk):
+    get_cache().set(_version_key(model, pk), time.time_ns(), None)
+
+
+def _load(model, role, user_id):
+    fields = DISPLAY_FIELDS + (('role',) if model is Agent else ())
+    row = model.objects.filter(pk=user_id).values(*fields).first()
+    if row is None:
+        return None
+    # Agents: the role of the row, so a role changed from the dashboard shows.
+    return {'role': row.pop('role', role), **row}
+
+
+def resolve(request):
+    """Principal of ``request``, or None (anonymous, unknown role or user)."""
+    role, user_id = request_identity(request)
+    model = model_for(role)
+    if model is None or not user_id:
+        return None
+
+    current = version(model, user_id)
+    from_session = getattr(request, 'token_identity', None) is None
+    cached = request.session.get(SESSION_KEY) if from_session else None
+    if cached and cached['key'] == [role, str(user_id)] and cached['version'] == current:
+        fields = cached['fields']
+    else:
+        fields = _load(model, role, user_id)
+        if from_session:
+            request.session[SESSION_KEY] = {'key': [role, str(user_id)], 'version': current, 'fields': fields}
+    if fields is None:
+        return None
+    return Principal(user_id=user_id, **fields)
+
+
+class IdentityMiddleware(MiddlewareMixin):
+    """Set ``request.identity`` (after the session and token middleware).
+
+    Lazy: requests that never read it load nothing, and the middleware
+    itself does no I/O, so it runs natively under WSGI and ASGI. Reading
+    it may query the database: async views must not. It is falsy for an
+    anonymous user.
+    """
+
+    def process_request(self, request):
+        request.identity = SimpleLazyObject(lambda: resolve(request))
+
+
+def _on_change(sender, instance, **kwargs):
+    # After commit, so a request racing the write cannot cache the old row
+    # under the new version.
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate(sender, pk))
+
+
+def connect_signals():
+    for model in (Agent, Chauffeur, Client):
+        for signal, name in ((post_save, 'save'), (post_delete, 'delete')):
+            signal.connect(_on_change, sender=model, dispatch_uid=f'identity_{name}_{model.__name__}')
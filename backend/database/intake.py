@@ -0,0 +1,327 @@
+"""
+Bulk shipment intake (partner imports).
+
+Rows are plain dicts using the same keys as the dashboard "add shipment"
+form (client_id, origin, destination, status, driver_id, date, zone, speed,
+distance) plus optional package fields (tracking_number, weight,
+number_of_pieces, package_type, description). Each chunk is validated with
+one query per referenced table, gets its Package/Shipment IDs from a single
+counter reservation and is written with two ``bulk_create`` calls. A bad row
+is reported and skipped; it never aborts the rest of the batch.
+"""
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import Chauffeur, Client, Package, Shipment, STATUS_CHOICES
+from .sequences import reserve_ids
+from .signals import shipments_imported
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+_STATUSES = {value for value, _ in STATUS_CHOICES}
+_ZONES = {value for value, _ in Shipment.SHIPMENT_ZONE_CHOICES}
+_SPEEDS = {value for value, _ in Shipment.SPEED_CHOICES}
+_PACKAGE_TYPES = {value for value, _ in Package.PACKAGE_TYPE_CHOICES}
+
+# Row keys of the model fields whose name differs, for error messages.
+_ROW_KEYS = {'statut': 'status', 'shipment_date': 'date'}
+
+
+def generate_tracking_number():
+    return f'TRK-{uuid.uuid4().hex[:12].upper()}'
+
+
+def _as_row(row):
+    """``row`` if it is a JSON object, else an ``_error`` row to report."""
+    return row if isinstance(row, dict) else {'_error': 'expected a JSON object'}
+
+
+def read_rows(stream, fmt):
+    """Yield row dicts from a JSON Lines (``jsonl``) or ``csv`` text stream.
+
+    A JSON Lines line that cannot be decoded is yielded as ``{'_error': ...}``
+    so the caller can report it against its row number.
+    """
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        return
+
+    if fmt != 'jsonl':
+        raise ValueError(f'Unsupported format: {fmt}')
+
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield {'_error': f'invalid JSON: {e}'}
+            continue
+        yield _as_row(row)
+
+
+def rows_from_request(request):
+    """Extract rows from a bulk intake request.
+
+    Accepts a JSON body (a list, or ``{"shipments": [...]}``), an
+    ``application/x-ndjson`` body, a ``text/csv`` body, or an uploaded
+    ``file`` whose format comes from its extension.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        fmt = 'csv' if upload.name.lower().endswith('.csv') else 'jsonl'
+        return read_rows(io.TextIOWrapper(upload, encoding='utf-8-sig'), fmt)
+
+    content_type = request.content_type or ''
+    body = request.body.decode('utf-8-sig')
+    if content_type == 'text/csv':
+        return read_rows(io.StringIO(body), 'csv')
+    if content_type in ('application/x-ndjson', 'application/jsonl'):
+        return read_rows(io.StringIO(body), 'jsonl')
+
+    payload = json.loads(body)
+    if isinstance(payload, dict):
+        payload = payload.get('shipments', [])
+    if not isinstance(payload, list):
+        raise ValueError('expected a list of shipments')
+    return [_as_row(row) for row in payload]
+
+
+def _text(row, key, default=''):
+    value = row.get(key, default)
+    return default if value is None else str(value).strip()
+
+
+def _decimal(value, field, errors):
+    try:
+        number = Decimal(value or '0')
+    except (InvalidOperation, TypeError):
+        number = None
+    if number is None or not number.is_finite():
+        errors.append(f'{field}: invalid number {value!r}')
+        return None
+    if number < 0:
+        errors.append(f'{field}: must not be negative')
+        return None
+    return number
+
+
+def _check_fields(model, values, errors):
+    """Validate ``values`` with the model fields (max_length, max_digits...):
+    the database would reject them, or silently store them on SQLite."""
+    for name, value in values.items():
+        field = model._meta.get_field(name)
+        if field.is_relation:
+            continue
+        try:
+            values[name] = field.clean(value, None)
+        except ValidationError as e:
+            errors.append(f"{_ROW_KEYS.get(name, name)}: {' '.join(e.messages)}")
+
+
+def _clean(row, clients, drivers):
+    """Validate one row; return (package_kwargs, shipment_kwargs, errors)."""
+    errors = []
+    if '_error' in row:
+        return None, None, [row['_error']]
+
+    client_id = _text(row, 'client_id')
+    client = clients.get(client_id)
+    if not client_id:
+        errors.append('client_id: required')
+    elif client is None:
+        errors.append(f'client_id: unknown client {client_id}')
+
+    driver_id = _text(row, 'driver_id')
+    driver = drivers.get(driver_id) if driver_id else None
+    if driver_id and driver is None:
+        errors.append(f'driver_id: unknown driver {driver_id}')
+
+    status = _text(row, 'status', 'PENDING') or 'PENDING'
+    zone = _text(row, 'zone', 'NATIONAL') or 'NATIONAL'
+    speed = _text(row, 'speed', 'NORMAL') or 'NORMAL'
+    package_type = _text(row, 'package_type', 'OTHER') or 'OTHER'
+    for field, value, allowed in (
+        ('status', status, _STATUSES),
+        ('zone', zone, _ZONES),
+        ('speed', speed, _SPEEDS),
+        ('package_type', package_type, _PACKAGE_TYPES),
+    ):
+        if value not in allowed:
+            errors.append(f'{field}: invalid value {value!r}')
+
+    distance = _decimal(_text(row, 'distance', '0'), 'distance', errors)
+    weight = _decimal(_text(row, 'weight', '0'), 'weight', errors)
+
+    try:
+        pieces = int(_text(row, 'number_of_pieces', '1') or 1)
+        if pieces < 1:
+            raise ValueError
+    except ValueError:
+        errors.append('number_of_pieces: expected a positive integer')
+        pieces = None
+
+    shipment_date = None
+    date_val = _text(row, 'date')
+    if date_val:
+        try:
+            shipment_date = datetime.strptime(date_val, '%Y-%m-%d').date()
+        except ValueError:
+            errors.append(f'date: expected YYYY-MM-DD, got {date_val!r}')
+
+    if errors:
+        return None, None, errors
+
+    package_kwargs = {
+        'client': client,
+        'tracking_number': _text(row, 'tracking_number') or generate_tracking_number(),
+        'weight': weight,
+        'number_of_pieces': pieces,
+        'package_type': package_type,
+    }
+    shipment_kwargs = {
+        'client': client,
+        'origin': _text(row, 'origin'),
+        'destination': _text(row, 'destination'),
+        'description': _text(row, 'description'),
+        'statut': status,
+        'driver': driver,
+        'zone': zone,
+        'speed': speed,
+        'distance': distance,
+        'shipment_date': shipment_date,
+    }
+    _check_fields(Package, package_kwargs, errors)
+    _check_fields(Shipment, shipment_kwargs, errors)
+    if errors:
+        return None, None, errors
+    return package_kwargs, shipment_kwargs, []
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert_one(package, shipment):
+    """Fallback path: insert a single row inside its own savepoint."""
+    try:
+        with transaction.atomic():
+            package.save(force_insert=True)
+            shipment.save(force_insert=True)
+        return None
+    except IntegrityError as e:
+        return str(e)
+
+
+def _import_chunk(chunk, first_row):
+    results = []
+    chunk = [_as_row(row) for row in chunk]
+
+    client_ids = {_text(row, 'client_id') for row in chunk} - {''}
+    driver_ids = {_text(row, 'driver_id') for row in chunk} - {''}
+    clients = Client.objects.in_bulk(client_ids) if client_ids else {}
+    drivers = Chauffeur.objects.in_bulk(driver_ids) if driver_ids else {}
+
+    valid = []
+    seen_tracking = set()
+    for offset, row in enumerate(chunk):
+        row_number = first_row + offset
+        package_kwargs, shipment_kwargs, errors = _clean(row, clients, drivers)
+        if not errors:
+            tracking = package_kwargs['tracking_number']
+            if tracking in seen_tracking:
+                errors = [f'tracking_number: duplicate {tracking} in this batch']
+            seen_tracking.add(tracking)
+        if errors:
+            results.append({'row': row_number, 'success': False, 'errors': errors})
+        else:
+            valid.append((row_number, package_kwargs, shipment_kwargs))
+
+    if valid:
+        existing = set(
+            Package.objects.filter(tracking_number__in=seen_tracking)
+            .values_list('tracking_number', flat=True)
+        )
+        kept = []
+        for row_number, package_kwargs, shipment_kwargs in valid:
+            if package_kwargs['tracking_number'] in existing:
+                results.append({
+                    'row': row_number, 'success': False,
+                    'errors': [f"tracking_number: {package_kwargs['tracking_number']} already exists"],
+                })
+            else:
+                kept.append((row_number, package_kwargs, shipment_kwargs))
+        valid = kept
+
+    if not valid:
+        return results
+
+    package_ids = reserve_ids(Package, len(valid))
+    shipment_ids = reserve_ids(Shipment, len(valid))
+    packages = []
+    shipments = []
+    for (row_number, package_kwargs, shipment_kwargs), package_id, shipment_id in zip(valid, package_ids, shipment_ids):
+        package = Package(id_package=package_id, **package_kwargs)
+        packages.append(package)
+        shipments.append(Shipment(id_shipment=shipment_id, package=package, **shipment_kwargs))
+
+    failures = {}
+    try:
+        with transaction.atomic():
+            Package.objects.bulk_create(packages)
+            Shipment.objects.bulk_create(shipments)
+            # bulk_create() sends no post_save: tell listeners (history,
+            # stats, activity), in the same transaction as the rows.
+            shipments_imported.send(sender=Shipment, shipments=shipments)
+    except IntegrityError:
+        # Someone raced us on a unique value: retry row by row so only the
+        # offending rows are rejected (save() sends post_save for those).
+        for (row_number, _, _), package, shipment in zip(valid, packages, shipments):
+            error = _insert_one(package, shipment)
+            if error:
+                failures[row_number] = error
+
+    for (row_number, _, _), package, shipment in zip(valid, packages, shipments):
+        if row_number in failures:
+            results.append({'row': row_number, 'success': False, 'errors': [failures[row_number]]})
+        else:
+            results.append({
+                'row': row_number,
+                'success': True,
+                'id_shipment': shipment.id_shipment,
+                'id_package': package.id_package,
+                'tracking_number': package.tracking_number,
+            })
+    return results
+
+
+def import_shipments(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Create packages and shipments for ``rows`` and yield one result per row.
+
+    Results are dicts with ``row`` (1-based), ``success`` and either the new
+    identifiers or a list of ``errors``. Rows are processed ``chunk_size`` at
+    a time, each chunk in its own transaction.
+    """
+    first_row = 1
+    for chunk in _chunks(rows, max(1, chunk_size)):
+        results = _import_chunk(chunk, first_row)
+        results.sort(key=lambda result: result['row'])
+        yield from results
+        first_row += len(chunk)
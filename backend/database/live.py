@@ -0,0 +1,309 @@
+"""
+Live event push (server-sent events) for the dashboard and driver pages.
+
+Shipment status changes, shipment claims and new incidents are already
+written to the ActivityEvent log (see database.activity). Once the write is
+committed, the event is published on its channels ('dashboard', 'driver')
+through a broker, and ``event_stream_response()`` relays a channel to the
+browser as ``text/event-stream``.
+
+Brokers (``LIVE_EVENTS_BROKER`` setting):
+
+- ``'inprocess'`` (default): fan-out to the streams opened in this process.
+  Right for a single ASGI worker.
+- ``'database'``: every stream polls the ActivityEvent table every
+  ``LIVE_EVENTS_POLL_INTERVAL`` seconds. A local stand-in for a real message
+  broker when several worker processes must see each other's events.
+
+Event ids are ActivityEvent ids, so a reconnecting EventSource sends
+``Last-Event-ID`` and gets what it missed from the log.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.http import StreamingHttpResponse
+
+from .models import ActivityEvent
+
+
+# ActivityEvent kinds pushed live, and the channels receiving them.
+LIVE_KINDS = {
+    'shipment_status': ('dashboard', 'driver'),
+    'shipment_claimed': ('dashboard', 'driver'),
+    'incident_created': ('dashboard',),
+}
+
+QUEUE_SIZE = 256
+HEARTBEAT_INTERVAL = 15
+DEFAULT_STREAM_TIMEOUT = 300
+DEFAULT_POLL_INTERVAL = 2.0
+# Events replayed after a reconnect (older ones are skipped).
+BACKLOG_LIMIT = 100
+# Browser reconnect delay, in ms.
+RETRY_MS = 3000
+
+
+def to_message(event):
+    return {
+        'id': event.id,
+        'type': event.kind,
+        'timestamp': event.timestamp.isoformat(),
+        'object_type': event.object_type,
+        'object_id': event.object_id,
+        'action': event.action,
+        'user': event.user,
+        'details': event.details,
+        'status': event.status,
+    }
+
+
+def backlog(channel, after_id, limit=BACKLOG_LIMIT):
+    """Messages for ``channel`` logged after event ``after_id``, oldest first."""
+    kinds = [kind for kind, channels in LIVE_KINDS.items() if channel in channels]
+    events = ActivityEvent.objects.filter(id__gt=after_id, kind__in=kinds).order_by('id')[:limit]
+    return [to_message(event) for event in events]
+
+
+def latest_event_id():
+    return ActivityEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+# =========================
+#        BROKERS
+# =========================
+class _QueueSubscription:
+    """One stream's inbox, filled from any thread, read from its event loop."""
+
+    def __init__(self, broker, channel, queue_size):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Loop already closed: the stream is gone.
+            self.broker.unsubscribe(self)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A slow client: drop the message, the stream tells the page to
+            # resync instead of buffering without bound.
+            self.overflowed = True
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = [sub for sub in self._subscriptions if sub.channel == channel]
+        for subscription in subscriptions:
+            subscription.offer(message)
+
+    async def subscribe(self, channel, after_id):
+        subscription = _QueueSubscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+
+class _PollingSubscription:
+    def __init__(self, channel, after_id, interval):
+        self.channel = channel
+        self.last_id = after_id
+        self.interval = interval
+        self.pending = []
+        self.overflowed = False
+
+    async def get(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self.pending:
+            self.pending = await sync_to_async(backlog)(self.channel, self.last_id)
+            if self.pending:
+                self.last_id = self.pending[-1]['id']
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(self.interval, remaining))
+        return self.pending.pop(0)
+
+    def close(self):
+        pass
+
+
+class DatabaseBroker:
+    """Broker stand-in sharing events between processes through ActivityEvent."""
+
+    def __init__(self, interval=DEFAULT_POLL_INTERVAL):
+        self.interval = interval
+
+    def publish(self, channel, message):
+        # Already stored in the activity log, which subscribers poll.
+        pass
+
+    async def subscribe(self, channel, after_id):
+        return _PollingSubscription(channel, after_id, self.interval)
+
+    def unsubscribe(self, subscription):
+        pass
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            name = getattr(settings, 'LIVE_EVENTS_BROKER', 'inprocess')
+            if name == 'database':
+                _broker = DatabaseBroker(getattr(settings, 'LIVE_EVENTS_POLL_INTERVAL', DEFAULT_POLL_INTERVAL))
+            elif name == 'inprocess':
+                _broker = InProcessBroker()
+            else:
+                raise ValueError(f'Unknown LIVE_EVENTS_BROKER {name!r}')
+        return _broker
+
+
+def publish(event):
+    message = to_message(event)
+    broker = get_broker()
+    for channel in LIVE_KINDS[event.kind]:
+        broker.publish(channel, message)
+
+
+def _on_activity_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.kind in LIVE_KINDS:
+        transaction.on_commit(lambda: publish(instance))
+
+
+def connect_signals():
+    post_save.connect(_on_activity_event, sender=ActivityEvent, dispatch_uid='live_activity_event')
+
+
+# =========================
+#        SSE STREAM
+# =========================
+def format_sse(message=None, comment=None, retry=None, event_id=None):
+    """One SSE block. ``event_id`` alone (no message) only moves the
+    browser's ``lastEventId``: it is sent back as Last-Event-ID on reconnect."""
+    lines = []
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    if comment is not None:
+        lines.append(f': {comment}')
+    if event_id is not None and message is None:
+        lines.append(f'id: {event_id}')
+    if message is not None:
+        lines.append(f"id: {message['id']}")
+        lines.append(f"event: {message['type']}")
+        lines.append(f"data: {json.dumps(message, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def _last_event_id(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_id') or ''
+    return int(value) if value.isdigit() else None
+
+
+async def _stream(channel, after_id, timeout):
+    broker = get_broker()
+    if after_id is None:
+        after_id = await sync_to_async(latest_event_id)()
+    subscription = await broker.subscribe(channel, after_id)
+    last_sent = after_id
+    try:
+        # Set the cursor now: a stream that times out without any event
+        # still reconnects with Last-Event-ID and replays the gap.
+        yield format_sse(comment='connected', retry=RETRY_MS, event_id=after_id)
+        # Events missed since Last-Event-ID (live duplicates are skipped below).
+        for message in await sync_to_async(backlog)(channel, after_id):
+            last_sent = message['id']
+            yield format_sse(message)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Bounded streams: the browser reconnects with Last-Event-ID.
+                break
+            message = await subscription.get(min(HEARTBEAT_INTERVAL, remaining))
+            if subscription.overflowed:
+                yield format_sse({'id': last_sent, 'type': 'resync'})
+                break
+            if message is None:
+                yield format_sse(comment='keepalive')
+            elif message['id'] > last_sent:
+                last_sent = message['id']
+                yield format_sse(message)
+    finally:
+        subscription.close()
+
+
+def _replay(channel, after_id):
+    """WSGI fallback: send what was missed and close; the browser polls via retry."""
+    if after_id is None:
+        # First connection: only establish the cursor (a real id, comments
+        # do not set lastEventId), the next poll replays from there.
+        yield format_sse(comment='polling', retry=RETRY_MS, event_id=latest_event_id())
+        return
+    yield format_sse(comment='polling', retry=RETRY_MS)
+    for message in backlog(channel, after_id):
+        yield format_sse(message)
+
+
+def event_stream_response(request, channel):
+    """``text/event-stream`` response relaying ``channel``.
+
+    Under ASGI the stream stays open (``LIVE_EVENTS_STREAM_TIMEOUT`` seconds at
+    most, then the browser reconnects). A WSGI worker cannot hold a stream
+    open without tying up a thread, so there the response only replays the
+    events missed since ``Last-Event-ID`` and the browser comes back after
+    the ``retry`` delay.
+    """
+    after_id = _last_event_id(request)
+    if isinstance(request, ASGIRequest):
+        timeout = getattr(settings, 'LIVE_EVENTS_STREAM_TIMEOUT', DEFAULT_STREAM_TIMEOUT)
+        content = _stream(channel, after_id, timeout)
+    else:
+        content = _replay(channel, after_id)
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Disable proxy buffering (nginx) so events leave immediately.
+    response['X-Accel-Buffering'] = 'no'
+    return response
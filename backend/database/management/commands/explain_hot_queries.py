@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from database.hot_queries import Sample, full_scans, registered, sorts
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN on every registered hot query (hot_queries.py modules) '
+        'and flag the ones reading a whole table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', action='store_true', help='Print every query plan.')
+        parser.add_argument('--only', help='Only the queries whose name contains this text.')
+        parser.add_argument(
+            '--fail-on-scan', action='store_true',
+            help='Exit with an error when a query not marked allow_scan reads a whole table.',
+        )
+
+    def handle(self, *args, **options):
+        sample = Sample()
+        queries = [
+            query for query in registered()
+            if not options['only'] or options['only'] in query.name
+        ]
+        if not queries:
+            raise CommandError('No hot query matches.')
+
+        self.stdout.write(f'{len(queries)} hot queries on {connection.vendor}\n')
+        flagged = []
+        for query in queries:
+            plan = query.build(sample).explain()
+            scanned = full_scans(plan)
+            notes = []
+            if sorts(plan):
+                notes.append('sorts rows')
+            if scanned and query.allow_scan:
+                line = self.style.WARNING(f'SCAN  {query.name} ({", ".join(scanned)}; allowed: {query.allow_scan})')
+            elif scanned:
+                flagged.append(query.name)
+                line = self.style.ERROR(f'SCAN  {query.name} ({", ".join(scanned)})')
+            else:
+                line = self.style.SUCCESS(f'ok    {query.name}')
+            if notes:
+                line += f'  [{", ".join(notes)}]'
+            self.stdout.write(line)
+            if options['plans'] or (scanned and not query.allow_scan):
+                for plan_line in plan.splitlines():
+                    self.stdout.write(f'        {plan_line}')
+
+        if flagged:
+            message = f'{len(flagged)} hot query(ies) read a whole table: {", ".join(flagged)}'
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No unexpected full-table scan.'))
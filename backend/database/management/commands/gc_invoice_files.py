@@ -0,0 +1,89 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from database.models import Invoice
+
+
+def _walk(storage, directory):
+    """Names of the files under ``directory``, one folder listed at a time."""
+    if not storage.exists(directory):
+        return
+    folders, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for folder in folders:
+        yield from _walk(storage, posixpath.join(directory, folder))
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete the invoice files no invoice refers to. Files are checked '
+        'against the invoice table a batch at a time; files written less than '
+        '--min-age minutes ago are kept, their invoice may not be committed yet.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=60, help='Minutes before an unreferenced file is deleted.')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Files checked against the invoices per query.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted.')
+
+    def handle(self, *args, **options):
+        if options['min_age'] < 0:
+            raise CommandError('--min-age must not be negative')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+
+        field = Invoice._meta.get_field('invoice_pdf')
+        storage = field.storage
+        root = posixpath.dirname(field.generate_filename(None, 'x'))
+        cutoff = timezone.now() - timedelta(minutes=options['min_age'])
+
+        counts = {'kept': 0, 'recent': 0, 'deleted': 0}
+        freed = 0
+        batch = []
+
+        def flush():
+            nonlocal freed
+            # One query per batch of walked files: memory stays bounded by
+            # --chunk-size, and invoices committed during the walk are seen.
+            taken = set(Invoice.objects.filter(invoice_pdf__in=batch).values_list('invoice_pdf', flat=True))
+            for name in batch:
+                if name in taken:
+                    counts['kept'] += 1
+                    continue
+                if storage.get_modified_time(name) > cutoff:
+                    counts['recent'] += 1
+                    continue
+                size = storage.size(name)
+                if not dry_run:
+                    storage.delete(name)
+                counts['deleted'] += 1
+                freed += size
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'  {name}')
+            batch.clear()
+
+        # Leftovers of interrupted writes (database.storage.TEMP_PREFIX) are
+        # never referenced: they go once older than --min-age, like orphans.
+        for name in _walk(storage, root):
+            batch.append(name)
+            if len(batch) >= chunk_size:
+                flush()
+        if batch:
+            flush()
+
+        if counts['recent']:
+            self.stdout.write(self.style.WARNING(
+                f"{counts['recent']} unreferenced file(s) newer than {options['min_age']} min kept."
+            ))
+        verb = 'would be deleted' if dry_run else 'deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['kept']} file(s) in use, {counts['deleted']} orphan(s) {verb} "
+            f'({freed / 1024:.0f} KB).'
+        ))
+
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from invoice.generation import DEFAULT_CHUNK_SIZE, STAGES, generate, month_bounds
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD')
+
+
+def _period(value):
+    """``YYYY-MM`` or ``YYYY-MM-DD..YYYY-MM-DD``."""
+    if '..' in value:
+        start, end = (_date(part) for part in value.split('..', 1))
+        if start > end:
+            raise CommandError('--period: the first day must not be after the last one')
+        return start, end
+    try:
+        return month_bounds(datetime.strptime(value, '%Y-%m').date())
+    except ValueError:
+        raise CommandError(f'Invalid period {value!r}, expected YYYY-MM or YYYY-MM-DD..YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = (
+        'Invoice every shipment of a period that has no invoice yet: price in bulk, '
+        'render the PDFs in a process pool, bulk-create the invoices. Run it again '
+        'to resume an interrupted run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--period', required=True, help='YYYY-MM or YYYY-MM-DD..YYYY-MM-DD')
+        parser.add_argument('--date', help='Invoice date (default: today).')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Invoices per transaction.')
+        parser.add_argument('--workers', type=int, help='PDF rendering processes (default: one per CPU, 0: none).')
+        parser.add_argument('--limit', type=int, help='Stop after this many invoices.')
+
+    def handle(self, *args, **options):
+        start, end = _period(options['period'])
+        invoice_date = _date(options['date']) if options['date'] else timezone.localdate()
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        if options['workers'] is not None and options['workers'] < 0:
+            raise CommandError('--workers must not be negative')
+
+        def progress(report):
+            self.stdout.write(f'  {report.created} invoice(s)')
+
+        self.stdout.write(f'Invoicing shipments of {start} .. {end}, dated {invoice_date}')
+        report = generate(
+            start, end, invoice_date,
+            chunk_size=options['chunk_size'], workers=options['workers'],
+            limit=options['limit'], progress=progress,
+        )
+
+        for stage in STAGES:
+            self.stdout.write(
+                f'  {stage:7} {report.items[stage]:6d} in {report.seconds[stage]:7.2f}s '
+                f'({report.throughput(stage):.0f}/s)'
+            )
+        if report.skipped:
+            self.stdout.write(self.style.WARNING(f'{report.skipped} shipment(s) invoiced concurrently, skipped.'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{report.created} invoice(s) created, {report.revenue} total.'
+        ))
@@ -0,0 +1,49 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from database.intake import DEFAULT_CHUNK_SIZE, import_shipments, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import shipments (and their packages) from a JSON Lines or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin.")
+        parser.add_argument(
+            '--format', choices=['jsonl', 'csv'],
+            help='Input format (default: guessed from the file extension, jsonl for stdin).',
+        )
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+
+        if path == '-':
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(path, encoding='utf-8-sig', newline='')
+            except OSError as e:
+                raise CommandError(str(e))
+
+        created = failed = 0
+        started = time.monotonic()
+        try:
+            for result in import_shipments(read_rows(stream, fmt), chunk_size=options['chunk_size']):
+                if result['success']:
+                    created += 1
+                else:
+                    failed += 1
+                    self.stderr.write(f"  row {result['row']}: {'; '.join(result['errors'])}")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.monotonic() - started
+        rate = created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} shipment(s) created, {failed} row(s) rejected in {elapsed:.1f}s ({rate:.0f}/s)'
+        ))
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from driver import tours
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = (
+        "Plan the day's tours: group the pending shipments by driver capacity, "
+        'order the stops and save one Tour per driver.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to plan (default: today).')
+        parser.add_argument('--max-stops', type=int, help='Shipments per tour (default: TOUR_MAX_STOPS).')
+        parser.add_argument('--replace', action='store_true', help='Plan the PENDING tours of the day again.')
+        parser.add_argument('--dry-run', action='store_true', help='Show the plan without saving it.')
+
+    def handle(self, *args, **options):
+        day = _date(options['date']) if options['date'] else timezone.localdate()
+        if options['max_stops'] is not None and options['max_stops'] < 1:
+            raise CommandError('--max-stops must be at least 1')
+
+        plans, unplanned = tours.plan(day, max_stops=options['max_stops'], replace=options['replace'])
+        for tour_plan in plans:
+            capacity = tour_plan.capacity if tour_plan.capacity is not None else '-'
+            self.stdout.write(
+                f'  {tour_plan.driver.pk}: {len(tour_plan.stops)} stop(s), '
+                f'{tour_plan.load}/{capacity} kg, {tour_plan.length:.1f} km'
+            )
+        if unplanned:
+            self.stdout.write(self.style.WARNING(f'{len(unplanned)} shipment(s) left unplanned (no room left in the tours).'))
+
+        if options['dry_run']:
+            self.stdout.write(f'Dry run: {len(plans)} tour(s) for {day}, nothing saved.')
+            return
+        created = tours.save(plans, day, replace=options['replace'])
+        # save() drops the stops claimed meanwhile by other drivers.
+        stops = sum(len(tour_plan.stops) for tour_plan in plans)
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} tour(s) saved for {day} ({stops} shipment(s)).'))
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from database.stats import data_bounds, rebuild
+
+
+def _date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD')
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the DailyStats rollup from shipments, invoices and incidents '
+        '(backfill after migrating, or repair after bulk SQL changes).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='First day to rebuild (default: oldest data).')
+        parser.add_argument('--to', dest='end', help='Last day to rebuild (default: newest data or today).')
+
+    def handle(self, *args, **options):
+        first, last = data_bounds()
+        start = _date(options['start']) if options['start'] else first
+        end = _date(options['end']) if options['end'] else max(filter(None, [last, timezone.localdate()]))
+        if start is None:
+            self.stdout.write('Nothing to rebuild: no shipments, invoices or incidents.')
+            return
+        if start > end:
+            raise CommandError('--from must not be after --to')
+
+        def progress(chunk_start, chunk_end, rows):
+            self.stdout.write(f'  {chunk_start} .. {chunk_end}: {rows} row(s)')
+
+        written = rebuild(start, end, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'DailyStats rebuilt for {start} .. {end}: {written} row(s)'))
@@ -0,0 +1,148 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, CharField, F, TextField, Value, When
+from django.db.models.functions import Replace
+
+from database.models import ActivityEvent, Invoice, Package, Shipment, Tour
+from database.sequences import format_id, parse_id
+
+
+REKEYED_MODELS = {
+    'shipment': Shipment,
+    'package': Package,
+    'invoice': Invoice,
+    'tour': Tour,
+}
+
+
+def referencing_fields(model):
+    """Yield (related_model, field) for every FK/O2O pointing at ``model``'s pk.
+
+    M2M through tables (ex: TourStop, the table of Tour.shipments) are included.
+    """
+    for related_model in apps.get_models(include_auto_created=True):
+        for field in related_model._meta.local_fields:
+            if not field.is_relation or field.remote_field.model is not model:
+                continue
+            if field.target_field.primary_key:
+                yield related_model, field
+
+
+def _case(column, mapping):
+    return Case(
+        *[When(**{column: old}, then=Value(new)) for old, new in mapping.items()],
+        output_field=CharField(),
+    )
+
+
+def _activity_details(mapping):
+    # "Shipment #SHP001 created" -> "Shipment #SHP00000001 created"
+    return Case(
+        *[
+            When(object_id=old, then=Replace('details', Value(f'#{old}'), Value(f'#{new}')))
+            for old, new in mapping.items()
+        ],
+        default=F('details'),
+        output_field=TextField(),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-key Shipment/Package/Invoice/Tour rows to the fixed-width ID format '
+        '(ex: SHP001 -> SHP00000001), updating every foreign key and the activity '
+        'log, one small transaction per batch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*',
+            help=f"Models to re-key among {', '.join(sorted(REKEYED_MODELS))} (default: all).",
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help='Seconds to sleep between batches so other writers get the lock.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        names = options['models'] or sorted(REKEYED_MODELS)
+        unknown = [name for name in names if name not in REKEYED_MODELS]
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(unknown)}")
+
+        for name in names:
+            model = REKEYED_MODELS[name]
+            renamed, skipped = self.rekey_model(model, batch_size, options['pause'], options['dry_run'])
+            verb = 'would be re-keyed' if options['dry_run'] else 're-keyed'
+            self.stdout.write(self.style.SUCCESS(
+                f'{model.__name__}: {renamed} row(s) {verb}, {skipped} skipped'
+            ))
+
+    def rekey_model(self, model, batch_size, pause, dry_run):
+        pk_name = model._meta.pk.name
+        references = list(referencing_fields(model))
+        manager = model._base_manager
+        renamed = skipped = 0
+        last_pk = ''
+
+        while True:
+            # Keyset scan: each batch is a short indexed range read.
+            batch = list(
+                manager.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+
+            mapping = {}
+            for old in batch:
+                number = parse_id(model, old)
+                if number is None:
+                    continue
+                new = format_id(model, number)
+                if new != old:
+                    mapping[old] = new
+            if not mapping:
+                continue
+
+            taken = set(manager.filter(pk__in=mapping.values()).values_list('pk', flat=True))
+            for old, new in list(mapping.items()):
+                if new in taken:
+                    self.stderr.write(f'  {old}: target {new} already exists, skipped')
+                    del mapping[old]
+                    skipped += 1
+            if not mapping:
+                continue
+
+            if not dry_run:
+                with transaction.atomic():
+                    for related_model, field in references:
+                        related_model._base_manager.filter(
+                            **{f'{field.attname}__in': list(mapping)}
+                        ).update(**{field.attname: _case(field.attname, mapping)})
+                    # The activity log refers to its objects by type and id
+                    # (no foreign key).
+                    ActivityEvent.objects.filter(
+                        object_type=model.__name__, object_id__in=list(mapping),
+                    ).update(object_id=_case('object_id', mapping), details=_activity_details(mapping))
+                    manager.filter(pk__in=list(mapping)).update(
+                        **{pk_name: _case(pk_name, mapping)}
+                    )
+                if pause:
+                    time.sleep(pause)
+
+            renamed += len(mapping)
+            self.stdout.write(f'  {model.__name__}: {renamed} row(s) processed (up to {last_pk})')
+
+        return renamed, skipped
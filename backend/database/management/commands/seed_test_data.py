@@ -259,7 +259,7 @@ class Command(BaseCommand):
             if i < len(shipments):
                 tour.shipments.add(shipments[i])
                 if i + 1 < len(shipments):
-                    tour.shipments.add(shipments[i + 1])
+                    tour.shipments.add(shipments[i + 1], through_defaults={'position': 1})
             tours.append(tour)
             self.stdout.write(f'  Created: {tour.id_tour} - Driver: {tour.chauffeur.nom} ({tour.status})')
 
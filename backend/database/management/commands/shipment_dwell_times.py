@@ -0,0 +1,41 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from database.history import dwell_times
+
+
+def _since(value):
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD')
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _duration(seconds):
+    seconds = int(seconds or 0)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    return f'{days}d {hours:02d}h{seconds // 60:02d}'
+
+
+class Command(BaseCommand):
+    help = 'Average and maximum time shipments spend in each status, from the status history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only use the events logged from this day (YYYY-MM-DD).')
+
+    def handle(self, *args, **options):
+        since = _since(options['since']) if options['since'] else None
+        rows = dwell_times(since)
+        if not rows:
+            self.stdout.write('No status transition recorded yet.')
+            return
+        self.stdout.write(f"{'status':12} {'transitions':>11}  {'average':>11}  {'maximum':>11}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['status']:12} {row['transitions']:>11}  "
+                f"{_duration(row['avg_seconds']):>11}  {_duration(row['max_seconds']):>11}"
+            )
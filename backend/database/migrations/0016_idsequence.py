@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-18, seeding step added manually
+
+import re
+
+from django.db import migrations, models
+
+
+# (model, prefix) for every model whose save() allocates a prefixed ID.
+SEQUENCES = [
+    ('Client', 'CL'),
+    ('Vehicule', 'VH'),
+    ('Chauffeur', 'CH'),
+    ('Reclamation', 'REC'),
+    ('Incident', 'INC'),
+    ('Agent', 'AG-'),
+    ('Package', 'PCG'),
+    ('Tour', 'TOU'),
+    ('Invoice', 'INV'),
+    ('Shipment', 'SHP'),
+]
+
+
+def seed_sequences(apps, schema_editor):
+    """Start each counter at the highest number already used (compared numerically)."""
+    IdSequence = apps.get_model('database', 'IdSequence')
+    for model_name, prefix in SEQUENCES:
+        model = apps.get_model('database', model_name)
+        pattern = re.compile(rf"{re.escape(prefix)}(\d+)")
+        highest = 0
+        ids = model.objects.filter(pk__startswith=prefix).values_list('pk', flat=True)
+        for value in ids.iterator(chunk_size=2000):
+            match = pattern.fullmatch(value)
+            if match:
+                highest = max(highest, int(match.group(1)))
+        IdSequence.objects.update_or_create(prefix=prefix, defaults={'last_value': highest})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0015_alter_agent_options_remove_agent_derniere_connexion_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('prefix', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': "Séquence d'identifiants",
+                'verbose_name_plural': "Séquences d'identifiants",
+            },
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0016_idsequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('zone', models.CharField(blank=True, max_length=20)),
+                ('speed', models.CharField(blank=True, max_length=20)),
+                ('shipments_created', models.IntegerField(default=0)),
+                ('shipments_delivered', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('incidents_opened', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistique journalière',
+                'verbose_name_plural': 'Statistiques journalières',
+                'constraints': [models.UniqueConstraint(fields=('date', 'zone', 'speed'), name='dailystats_unique_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 6.0 on 2026-10-18, seeding step added manually
+
+from datetime import datetime, time
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Events seeded per type: what the old 8-query feed used to show.
+SEED_PER_TYPE = 5
+
+
+def _name(person):
+    return f"{person.nom} {person.prenom}" if person is not None else "Unknown"
+
+
+def _aware(value):
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def seed_events(apps, schema_editor):
+    """Start the log with the latest rows of each type, so the feed is not empty."""
+    get = lambda name: apps.get_model('database', name)
+    ActivityEvent = get('ActivityEvent')
+    events = []
+
+    def add(obj, when, kind, action, user, details, status):
+        if when is None:
+            return
+        events.append(ActivityEvent(
+            timestamp=_aware(when), kind=kind, action=action, user=user, details=details,
+            status=status, object_type=obj.__class__.__name__, object_id=str(obj.pk),
+        ))
+
+    for s in get('Shipment').objects.select_related('client').order_by('-date_creation')[:SEED_PER_TYPE]:
+        add(s, s.date_creation, 'shipment_created', "New Shipment", _name(s.client),
+            f"Shipment #{s.id_shipment} created", s.statut)
+    for i in get('Incident').objects.order_by('-created_at')[:SEED_PER_TYPE]:
+        add(i, i.created_at, 'incident_created', "Incident Reported", "System", i.description, i.status)
+    for c in get('Client').objects.order_by('-date_inscription')[:SEED_PER_TYPE]:
+        add(c, c.date_inscription, 'client_created', "New Client", _name(c), "Client registered", "Completed")
+    for d in get('Chauffeur').objects.order_by('-date_embauche')[:SEED_PER_TYPE]:
+        add(d, d.date_embauche, 'driver_created', "New Driver", _name(d), "Driver added to system", d.statut)
+    for v in get('Vehicule').objects.exclude(date_mise_service=None).order_by('-date_mise_service')[:SEED_PER_TYPE]:
+        add(v, v.date_mise_service, 'vehicle_created', "Vehicle Added", "System", f"Vehicle {v.immatriculation}", v.etat)
+    for inv in get('Invoice').objects.select_related('client').order_by('-invoice_date')[:SEED_PER_TYPE]:
+        add(inv, inv.invoice_date, 'invoice_created', "Invoice Generated", _name(inv.client),
+            f"Invoice #{inv.id_invoice}", "Completed")
+    for p in get('Package').objects.select_related('client').order_by('-date_creation')[:SEED_PER_TYPE]:
+        add(p, p.date_creation, 'package_created', "Package Created", _name(p.client),
+            f"Tracking {p.tracking_number}", "Completed")
+    for a in get('Agent').objects.order_by('-date_creation')[:SEED_PER_TYPE]:
+        add(a, a.date_creation, 'agent_created', "Agent Added", _name(a), f"Role: {a.role}", "Active")
+
+    events.sort(key=lambda event: event.timestamp)
+    ActivityEvent.objects.bulk_create(events)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0017_dailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('kind', models.CharField(max_length=40)),
+                ('action', models.CharField(max_length=100)),
+                ('user', models.CharField(blank=True, max_length=200)),
+                ('details', models.TextField(blank=True)),
+                ('status', models.CharField(blank=True, max_length=50)),
+                ('object_type', models.CharField(blank=True, max_length=40)),
+                ('object_id', models.CharField(blank=True, max_length=20)),
+            ],
+            options={
+                'verbose_name': "Événement d'activité",
+                'verbose_name_plural': "Événements d'activité",
+                'indexes': [models.Index(fields=['-timestamp', '-id'], name='activity_recent_idx')],
+            },
+        ),
+        migrations.RunPython(seed_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-18, seeding step added manually
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+BATCH_SIZE = 2000
+
+
+def seed_events(apps, schema_editor):
+    """One event per existing shipment (its current status at its creation
+    date): the history of older shipments starts there."""
+    Shipment = apps.get_model('database', 'Shipment')
+    ShipmentEvent = apps.get_model('database', 'ShipmentEvent')
+    rows = Shipment.objects.values_list('pk', 'statut', 'date_creation').iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    for pk, statut, created in rows:
+        batch.append(ShipmentEvent(shipment_id=pk, status=statut, timestamp=created, source='system'))
+        if len(batch) >= BATCH_SIZE:
+            ShipmentEvent.objects.bulk_create(batch)
+            batch = []
+    ShipmentEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0018_activityevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShipmentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('IN_TRANSIT', 'In transit'), ('DELIVERED', 'Delivered')], max_length=20)),
+                ('previous_status', models.CharField(blank=True, max_length=20)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('source', models.CharField(choices=[('system', 'System'), ('dashboard', 'Dashboard'), ('driver', 'Driver'), ('import', 'Import'), ('bulk', 'Bulk update')], default='system', max_length=20)),
+                ('actor', models.CharField(blank=True, max_length=100)),
+                ('shipment', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='database.shipment')),
+            ],
+            options={
+                'verbose_name': "Événement d'expédition",
+                'verbose_name_plural': "Événements d'expédition",
+                'indexes': [models.Index(fields=['shipment', 'timestamp', 'id'], name='shipmentevent_timeline_idx')],
+            },
+        ),
+        migrations.RunPython(seed_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0020_shipmentevent'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['-incident_date', '-id_incident'], name='incident_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['-created_at', '-id_incident'], name='incident_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['-invoice_date', '-id_invoice'], name='invoice_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['-date_creation', '-id_shipment'], name='shipment_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['statut', '-date_creation', '-id_shipment'], name='shipment_status_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['shipment_date', 'id_shipment'], name='shipment_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['driver', 'shipment_date'], name='shipment_driver_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='shipment',
+            name='driver',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='shipments', to='database.chauffeur'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0021_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='load',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='route',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='route_length',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['tour_date', 'chauffeur'], name='tour_date_idx'),
+        ),
+    ]
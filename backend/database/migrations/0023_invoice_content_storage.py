@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18
+
+import database.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0022_tour_route'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoice',
+            name='invoice_pdf',
+            field=models.FileField(storage=database.storage.invoice_storage, upload_to='invoices/'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0 on 2026-10-18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_route(apps, schema_editor):
+    """Tour.route (list of shipment ids) -> TourStop.position."""
+    Tour = apps.get_model('database', 'Tour')
+    TourStop = apps.get_model('database', 'TourStop')
+    for tour in Tour.objects.exclude(route=[]).only('pk', 'route').iterator(chunk_size=500):
+        for position, shipment_id in enumerate(tour.route):
+            TourStop.objects.filter(tour_id=tour.pk, shipment_id=shipment_id).update(position=position)
+
+
+def copy_position(apps, schema_editor):
+    Tour = apps.get_model('database', 'Tour')
+    TourStop = apps.get_model('database', 'TourStop')
+    for tour in Tour.objects.only('pk').iterator(chunk_size=500):
+        tour.route = list(
+            TourStop.objects.filter(tour_id=tour.pk).order_by('position').values_list('shipment_id', flat=True)
+        )
+        tour.save(update_fields=['route'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0023_invoice_content_storage'),
+    ]
+
+    operations = [
+        # The table of Tour.shipments becomes the TourStop model as is.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='TourStop',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('shipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tour_stops', to='database.shipment')),
+                        ('tour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stops', to='database.tour')),
+                    ],
+                    options={
+                        'verbose_name': 'Arrêt de tournée',
+                        'verbose_name_plural': 'Arrêts de tournée',
+                        'db_table': 'database_tour_shipments',
+                        'ordering': ['tour', 'position'],
+                        'unique_together': {('tour', 'shipment')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='tour',
+                    name='shipments',
+                    field=models.ManyToManyField(blank=True, related_name='tours', through='database.TourStop', to='database.shipment'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tourstop',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(copy_route, copy_position),
+        migrations.RemoveField(
+            model_name='tour',
+            name='route',
+        ),
+    ]
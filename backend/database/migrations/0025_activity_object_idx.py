@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0024_tourstop'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activityevent',
+            index=models.Index(fields=['object_type', 'object_id'], name='activity_object_idx'),
+        ),
+    ]
@@ -3,9 +3,63 @@ from django.contrib.auth.hashers import make_password, check_password
 from django.utils import timezone 
 import secrets
 import string
-import re
-from decimal import Decimal
 
+from .pricing import price
+from .sequences import next_id
+from .storage import invoice_storage
+
+
+
+# =========================
+#        SEQUENCES
+# =========================
+class IdSequence(models.Model):
+    """
+    Compteur d'identifiants par préfixe (CL, SHP, PCG, ...).
+    Une seule ligne par préfixe, incrémentée par database.sequences.
+    """
+
+    prefix = models.CharField(max_length=10, primary_key=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Séquence d'identifiants"
+        verbose_name_plural = "Séquences d'identifiants"
+
+    def __str__(self):
+        return f"{self.prefix} -> {self.last_value}"
+
+
+class LoadedValuesMixin:
+    """
+    Garde dans instance._loaded_values les valeurs lues en base (puis celles
+    du dernier save()), pour que les signaux puissent comparer l'ancien et
+    le nouvel état sans relire la ligne. Avec save(update_fields=[...]),
+    seules ces colonnes sont écrites, donc seules elles sont mises à jour.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            loaded = getattr(self, '_loaded_values', {})
+            for name in update_fields:
+                attname = self._meta.get_field(name).attname
+                loaded[attname] = getattr(self, attname)
+            self._loaded_values = loaded
+            return
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
 
 
 # =========================
@@ -18,6 +72,9 @@ class Client(models.Model):
     Le mot de passe est généré automatiquement et stocké de façon chiffrée.
     """
 
+    ID_PREFIX = 'CL'
+    ID_WIDTH = 6
+
     # Identifiant automatique (ex: CL000001)
     id_client = models.CharField(
         max_length=12,
@@ -71,18 +128,7 @@ class Client(models.Model):
         Génère automatiquement l'id_client (CL000001, CL000002, ...)
         """
         if not self.id_client:
-            with transaction.atomic():
-                last_client = Client.objects.select_for_update().filter(
-                    id_client__startswith='CL'
-                ).order_by('-id_client').first()
-
-                if last_client:
-                    match = re.search(r"CL(\d+)$", last_client.id_client)
-                    next_num = int(match.group(1)) + 1 if match else 1
-                else:
-                    next_num = 1
-
-                self.id_client = f"CL{next_num:06d}"
+            self.id_client = next_id(Client)
 
         super().save(*args, **kwargs)
 
@@ -95,6 +141,9 @@ class Vehicule(models.Model):
     Modèle Véhicule.
     """
 
+    ID_PREFIX = 'VH'
+    ID_WIDTH = 6
+
     # Identifiant automatique (ex: VH000001)
     id_vehicule = models.CharField(
         max_length=12,
@@ -143,16 +192,7 @@ class Vehicule(models.Model):
         Génère automatiquement l'id_vehicule (VH000001, VH000002, ...)
         """
         if not self.id_vehicule:
-            with transaction.atomic():
-                last_vehicule = Vehicule.objects.select_for_update().order_by('-id_vehicule').first()
-
-                if last_vehicule:
-                    match = re.search(r"VH(\d+)$", last_vehicule.id_vehicule)
-                    next_num = int(match.group(1)) + 1 if match else 1
-                else:
-                    next_num = 1
-
-                self.id_vehicule = f"VH{next_num:06d}"
+            self.id_vehicule = next_id(Vehicule)
 
         super().save(*args, **kwargs)
 
@@ -195,6 +235,9 @@ STATUT_CHOICES = [
 
 class Chauffeur(models.Model):
 
+    ID_PREFIX = 'CH'
+    ID_WIDTH = 6
+
     id_chauffeur = models.CharField(
         max_length=12,
         primary_key=True,
@@ -257,13 +300,7 @@ class Chauffeur(models.Model):
     #  Génération automatique de l'ID
     def save(self, *args, **kwargs):
         if not self.id_chauffeur:
-            with transaction.atomic():
-                last_obj = Chauffeur.objects.select_for_update().order_by('-id_chauffeur').first()
-                next_num = (
-                    int(re.search(r"CH(\d+)$", last_obj.id_chauffeur).group(1)) + 1
-                    if last_obj else 1
-                )
-                self.id_chauffeur = f"CH{next_num:06d}"
+            self.id_chauffeur = next_id(Chauffeur)
 
         super().save(*args, **kwargs)
 STATUS_CHOICES = [
@@ -285,6 +322,8 @@ class Reclamation(models.Model):
         ('pending_customer', 'Pending Customer Response'),
         ('closed', 'Closed'),
     ]
+   ID_PREFIX = 'REC'
+   ID_WIDTH = 6
    id_reclamation = models.CharField(primary_key=True, max_length=10, verbose_name="Reclamation ID",editable=False)
    date_reclamation= models.DateTimeField(default=timezone.now, verbose_name="Reclamation Date")
    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
@@ -311,23 +350,13 @@ class Reclamation(models.Model):
    def save(self, *args, **kwargs):
         # Génération ID Réclamation
         if not self.id_reclamation:
-            with transaction.atomic():
-                last_obj = Reclamation.objects.select_for_update().filter(
-                    id_reclamation__startswith='REC'
-                ).order_by('-id_reclamation').first()
-
-                if last_obj and last_obj.id_reclamation:
-                    m = re.search(r"REC(\d+)$", last_obj.id_reclamation)
-                    next_num = int(m.group(1)) + 1 if m else 1
-                else:
-                    next_num = 1
-                self.id_reclamation = f"REC{next_num:06d}" 
+            self.id_reclamation = next_id(Reclamation)
         super().save(*args, **kwargs)
 
 # =========================
 #        INCIDENT
 # =========================
-class Incident(models.Model):
+class Incident(LoadedValuesMixin, models.Model):
     INCIDENT_TYPE_CHOICES = [
         ('delay', 'Delay'),
         ('loss', 'Package Loss'),
@@ -345,6 +374,9 @@ class Incident(models.Model):
         ('closed', 'Closed'),
         ('cancelled', 'Cancelled'),
     ]
+    ID_PREFIX = 'INC'
+    ID_WIDTH = 6
+
     id_incident = models.CharField(
         primary_key=True,
         max_length=10,
@@ -403,25 +435,20 @@ class Incident(models.Model):
         verbose_name_plural = "Incidents"
         ordering = ['-incident_date']
         db_table = 'incident'
+        indexes = [
+            # Liste des incidents (tri par défaut, filtres de dates, keyset)
+            models.Index(fields=['-incident_date', '-id_incident'], name='incident_date_idx'),
+            # Tri "Created" de la liste
+            models.Index(fields=['-created_at', '-id_incident'], name='incident_created_idx'),
+        ]
     
     def __str__(self):
         return f"Incident {self.id_incident} - {self.get_incident_type_display()}"
     def save(self, *args, **kwargs):
         # Génération ID Incident
         if not self.id_incident:
-            with transaction.atomic():
-                last_obj = Incident.objects.select_for_update().filter(
-                    id_incident__startswith='INC'
-                ).order_by('-id_incident').first()
-
-                if last_obj and last_obj.id_incident:
-                    m = re.search(r"INC(\d+)$", last_obj.id_incident)
-                    next_num = int(m.group(1)) + 1 if m else 1
-                else:
-                    next_num = 1
-
-                self.id_incident = f"INC{next_num:06d}"
-        
+            self.id_incident = next_id(Incident)
+
         super().save(*args, **kwargs)
     def resolve(self,  resolution_notes=""):
          self.status = 'resolved'
@@ -455,6 +482,9 @@ class Agent(models.Model):
         ('agent', 'Agent Transport')
     ]
     
+    ID_PREFIX = 'AG-'
+    ID_WIDTH = 4
+
     agent_id = models.CharField(
         primary_key=True,
         max_length=10,
@@ -476,14 +506,7 @@ class Agent(models.Model):
     def save(self, *args, **kwargs):
         # 🔹 Generate agent_id if it doesn't exist
         if not self.agent_id:
-            with transaction.atomic():
-                last_obj = Agent.objects.select_for_update().filter(agent_id__startswith='AG-').order_by('-agent_id').first()
-                if last_obj and last_obj.agent_id:
-                    m = re.search(r"AG-(\d+)$", last_obj.agent_id)
-                    next_num = int(m.group(1)) + 1 if m else 1
-                else:
-                    next_num = 1
-                self.agent_id = f"AG-{next_num:04d}"
+            self.agent_id = next_id(Agent)
 
         # 🔹 Hash password
         if not self.mot_de_passe.startswith('pbkdf2_'):
@@ -506,7 +529,7 @@ class Agent(models.Model):
 # =========================
 #        PACKAGE
 # =========================
-class Package(models.Model):
+class Package(LoadedValuesMixin, models.Model):
 
     PACKAGE_TYPE_CHOICES = [
         ('DOC', 'Documents'),
@@ -515,6 +538,10 @@ class Package(models.Model):
         ('OTHER', 'Other'),
     ]
 
+    ID_PREFIX = 'PCG'
+    # Largeur fixe: l'ordre lexical des IDs suit l'ordre numérique
+    ID_WIDTH = 8
+
     id_package = models.CharField(
         max_length=12,
         primary_key=True,
@@ -555,19 +582,10 @@ class Package(models.Model):
 
     def save(self, *args, **kwargs):
         """
-        Génère automatiquement l'id_package (PCG001, PCG002, ...)
+        Génère automatiquement l'id_package (PCG00000001, PCG00000002, ...)
         """
         if not self.id_package:
-            with transaction.atomic():
-                last_obj = Package.objects.select_for_update().order_by('-id_package').first()
-
-                if last_obj:
-                    match = re.search(r"PCG(\d+)$", last_obj.id_package)
-                    next_num = int(match.group(1)) + 1 if match else 1
-                else:
-                    next_num = 1
-
-                self.id_package = f"PCG{next_num:03d}"
+            self.id_package = next_id(Package)
 
         super().save(*args, **kwargs)
 
@@ -582,6 +600,10 @@ class Tour(models.Model):
         ('COMPLETED', 'Completed'),
     ]
 
+    ID_PREFIX = 'TOU'
+    # Largeur fixe: l'ordre lexical des IDs suit l'ordre numérique
+    ID_WIDTH = 8
+
     id_tour = models.CharField(
         max_length=12,
         primary_key=True,
@@ -602,44 +624,92 @@ class Tour(models.Model):
         default='PENDING'
     )
 
+    # Ordre de passage: TourStop.position, calculé par driver.tours
     shipments = models.ManyToManyField(
         'Shipment',
+        through='TourStop',
         blank=True,
         related_name='tours'
     )
 
+    # Longueur estimée de l'itinéraire (km), dépôt -> arrêts -> dépôt
+    route_length = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True
+    )
+
+    # Poids total des colis (kg)
+    load = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0
+    )
+
     date_creation = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = "Tour"
         verbose_name_plural = "Tours"
+        indexes = [
+            # Tournées d'un jour (planification, espace chauffeur)
+            models.Index(fields=['tour_date', 'chauffeur'], name='tour_date_idx'),
+        ]
 
     def __str__(self):
         return self.id_tour
 
     def save(self, *args, **kwargs):
         """
-        Génère automatiquement l'id_tour (TOU001, TOU002, ...)
+        Génère automatiquement l'id_tour (TOU00000001, TOU00000002, ...)
         """
         if not self.id_tour:
-            with transaction.atomic():
-                last_obj = Tour.objects.select_for_update().order_by('-id_tour').first()
+            self.id_tour = next_id(Tour)
 
-                if last_obj:
-                    match = re.search(r"TOU(\d+)$", last_obj.id_tour)
-                    next_num = int(match.group(1)) + 1 if match else 1
-                else:
-                    next_num = 1
+        super().save(*args, **kwargs)
 
-                self.id_tour = f"TOU{next_num:03d}"
 
-        super().save(*args, **kwargs)
+class TourStop(models.Model):
+    """
+    Arrêt d'une tournée (table de liaison de Tour.shipments).
+    Garde la table créée pour le ManyToManyField, avec le rang de l'arrêt.
+    """
+
+    tour = models.ForeignKey(
+        Tour,
+        on_delete=models.CASCADE,
+        related_name='stops'
+    )
+
+    shipment = models.ForeignKey(
+        'Shipment',
+        on_delete=models.CASCADE,
+        related_name='tour_stops'
+    )
+
+    # Rang dans l'ordre de passage (0 = premier arrêt après le dépôt)
+    position = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'database_tour_shipments'
+        unique_together = [('tour', 'shipment')]
+        ordering = ['tour', 'position']
+        verbose_name = "Arrêt de tournée"
+        verbose_name_plural = "Arrêts de tournée"
+
+    def __str__(self):
+        return f"{self.tour_id} #{self.position}: {self.shipment_id}"
 
 
 # =========================
 #        INVOICE
 # =========================
-class Invoice(models.Model):
+class Invoice(LoadedValuesMixin, models.Model):
+
+    ID_PREFIX = 'INV'
+    # Largeur fixe: l'ordre lexical des IDs suit l'ordre numérique
+    ID_WIDTH = 8
 
     id_invoice = models.CharField(
         max_length=12,
@@ -666,8 +736,10 @@ class Invoice(models.Model):
 
     invoice_date = models.DateField(default=timezone.now)
 
+    # Stockage par empreinte du contenu: un même PDF n'est écrit qu'une fois
     invoice_pdf = models.FileField(
-        upload_to='invoices/'
+        upload_to='invoices/',
+        storage=invoice_storage
     )
 
     date_creation = models.DateTimeField(auto_now_add=True)
@@ -675,25 +747,20 @@ class Invoice(models.Model):
     class Meta:
         verbose_name = "Invoice"
         verbose_name_plural = "Invoices"
+        indexes = [
+            # Liste des factures, filtres de dates et recalcul des statistiques
+            models.Index(fields=['-invoice_date', '-id_invoice'], name='invoice_date_idx'),
+        ]
 
     def __str__(self):
         return self.id_invoice
 
     def save(self, *args, **kwargs):
         """
-        Génère automatiquement l'id_invoice (INV001, INV002, ...)
+        Génère automatiquement l'id_invoice (INV00000001, INV00000002, ...)
         """
         if not self.id_invoice:
-            with transaction.atomic():
-                last_obj = Invoice.objects.select_for_update().order_by('-id_invoice').first()
-
-                if last_obj:
-                    match = re.search(r"INV(\d+)$", last_obj.id_invoice)
-                    next_num = int(match.group(1)) + 1 if match else 1
-                else:
-                    next_num = 1
-
-                self.id_invoice = f"INV{next_num:03d}"
+            self.id_invoice = next_id(Invoice)
 
         super().save(*args, **kwargs)
 
@@ -701,7 +768,7 @@ class Invoice(models.Model):
 # =========================
 #        SHIPMENT
 # =========================
-class Shipment(models.Model):
+class Shipment(LoadedValuesMixin, models.Model):
 
     SHIPMENT_ZONE_CHOICES = [
         ('NATIONAL', 'National'),
@@ -713,6 +780,10 @@ class Shipment(models.Model):
         ('EXPRESS', 'Express'),
     ]
 
+    ID_PREFIX = 'SHP'
+    # Largeur fixe: l'ordre lexical des IDs suit l'ordre numérique
+    ID_WIDTH = 8
+
     id_shipment = models.CharField(
         max_length=12,
         primary_key=True,
@@ -753,7 +824,9 @@ class Shipment(models.Model):
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
-        related_name='shipments'
+        related_name='shipments',
+        # Couvert par shipment_driver_date_idx
+        db_index=False
     )
 
     description = models.TextField(blank=True)
@@ -789,45 +862,148 @@ class Shipment(models.Model):
     class Meta:
         verbose_name = "Shipment"
         verbose_name_plural = "Shipments"
+        indexes = [
+            # Plus récentes d'abord: listes du tableau de bord
+            models.Index(fields=['-date_creation', '-id_shipment'], name='shipment_recent_idx'),
+            # Liste filtrée par statut, dans l'ordre par défaut
+            models.Index(fields=['statut', '-date_creation', '-id_shipment'], name='shipment_status_recent_idx'),
+            # Filtres et tri sur la date d'expédition
+            models.Index(fields=['shipment_date', 'id_shipment'], name='shipment_date_idx'),
+            # Espace chauffeur: expéditions du jour d'un chauffeur, et celles
+            # du jour sans chauffeur (driver IS NULL)
+            models.Index(fields=['driver', 'shipment_date'], name='shipment_driver_date_idx'),
+        ]
 
     def __str__(self):
         return self.id_shipment
 
     def save(self, *args, **kwargs):
         """
-        Génère automatiquement l'id_shipment (SHP001, SHP002, ...)
+        Génère automatiquement l'id_shipment (SHP00000001, SHP00000002, ...)
         """
         if not self.id_shipment:
-            with transaction.atomic():
-                last_obj = Shipment.objects.select_for_update().order_by('-id_shipment').first()
-
-                if last_obj:
-                    match = re.search(r"SHP(\d+)$", last_obj.id_shipment)
-                    next_num = int(match.group(1)) + 1 if match else 1
-                else:
-                    next_num = 1
-
-                self.id_shipment = f"SHP{next_num:03d}"
+            self.id_shipment = next_id(Shipment)
 
-        super().save(*args, **kwargs)
+        # Atomique: les écritures des signaux (historique des statuts,
+        # statistiques, activité) sont validées avec la ligne, ou pas du tout
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
         
     def montant_ht(self):
             """Return the base amount without taxes (HT)"""
-            return Decimal(self.distance) * Decimal('1.5')  
+            return price(self.distance, self.zone, self.speed)[0]
 
     def montant_tva(self):
             """Return the TVA (tax)"""
-            return self.montant_ht() * Decimal('0.19')
+            return price(self.distance, self.zone, self.speed)[1]
 
     def montant_ttc(self):
-            """Return total amount including tax"""
-            if self.speed ==  'NORMAL':
-                if self.zone ==  'NATIONAL':
-                    return self.montant_ht() + self.montant_tva() 
-                else :
-                    return self.montant_ht() + self.montant_tva() + 100
-            else :
-                if self.zone ==  'NATIONAL':
-                    return self.montant_ht() + self.montant_tva() + 20
-                else :
-                    return self.montant_ht() + self.montant_tva() + 100 + 20
+            """Return total amount including tax (tariff: database.pricing)"""
+            return price(self.distance, self.zone, self.speed)[2]
+
+
+# =========================
+#        STATISTIQUES
+# =========================
+class DailyStats(models.Model):
+    """
+    Agrégats journaliers du tableau de bord, tenus à jour par database.stats
+    (signaux) et recalculables avec `manage.py rebuild_stats`.
+
+    Une ligne par (jour, zone, vitesse) pour les expéditions; le chiffre
+    d'affaires facturé et les incidents sont sur la ligne zone='' speed=''.
+    """
+
+    date = models.DateField()
+    zone = models.CharField(max_length=20, blank=True)
+    speed = models.CharField(max_length=20, blank=True)
+
+    shipments_created = models.IntegerField(default=0)
+    shipments_delivered = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    incidents_opened = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Statistique journalière"
+        verbose_name_plural = "Statistiques journalières"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'zone', 'speed'], name='dailystats_unique_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.zone or '*'} {self.speed or '*'}"
+
+
+# =========================
+#        ACTIVITÉ
+# =========================
+class ActivityEvent(models.Model):
+    """
+    Journal d'activité (ajout seulement) affiché dans le tableau de bord.
+    Écrit par database.activity à partir des signaux des modèles; le flux
+    "activité récente" est une seule requête indexée sur timestamp.
+    """
+
+    timestamp = models.DateTimeField(default=timezone.now)
+    kind = models.CharField(max_length=40)
+    action = models.CharField(max_length=100)
+    user = models.CharField(max_length=200, blank=True)
+    details = models.TextField(blank=True)
+    status = models.CharField(max_length=50, blank=True)
+    object_type = models.CharField(max_length=40, blank=True)
+    object_id = models.CharField(max_length=20, blank=True)
+
+    class Meta:
+        verbose_name = "Événement d'activité"
+        verbose_name_plural = "Événements d'activité"
+        indexes = [
+            models.Index(fields=['-timestamp', '-id'], name='activity_recent_idx'),
+            # Événements d'un objet (rekey_ids)
+            models.Index(fields=['object_type', 'object_id'], name='activity_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.timestamp:%Y-%m-%d %H:%M} {self.action}"
+
+
+# =========================
+#   HISTORIQUE DES STATUTS
+# =========================
+class ShipmentEvent(models.Model):
+    """
+    Historique (ajout seulement) des statuts d'une expédition: une ligne à la
+    création puis une par changement de statut, écrite par database.history
+    dans la même transaction que l'expédition. La chronologie d'une
+    expédition est une seule requête sur l'index (shipment, timestamp).
+    """
+
+    SOURCE_CHOICES = [
+        ('system', 'System'),
+        ('dashboard', 'Dashboard'),
+        ('driver', 'Driver'),
+        ('import', 'Import'),
+        ('bulk', 'Bulk update'),
+    ]
+
+    shipment = models.ForeignKey(
+        Shipment,
+        on_delete=models.CASCADE,
+        related_name='events',
+        # Couvert par shipmentevent_timeline_idx
+        db_index=False
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    previous_status = models.CharField(max_length=20, blank=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='system')
+    actor = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        verbose_name = "Événement d'expédition"
+        verbose_name_plural = "Événements d'expédition"
+        indexes = [
+            models.Index(fields=['shipment', 'timestamp', 'id'], name='shipmentevent_timeline_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.shipment_id} {self.timestamp:%Y-%m-%d %H:%M} {self.status}"
@@ -0,0 +1,124 @@
+"""
+Shipment tariff: amount before tax (HT), TVA and amount with tax (TTC).
+
+    HT  = distance (km) x RATE_PER_KM
+    TVA = HT x TVA_RATE
+    TTC = HT + TVA + INTERNATIONAL_SURCHARGE (zone other than NATIONAL)
+                   + EXPRESS_SURCHARGE (speed other than NORMAL)
+
+Nothing is rounded: with a distance of 2 decimal places, HT has 3 and TVA/TTC
+have 5. ``price()`` computes one shipment (Shipment.montant_* use it).
+``annotate_prices()`` and ``totals()`` compute a whole queryset in SQL
+without loading the shipments.
+
+In SQL each amount is declared with its exact scale. PostgreSQL and MySQL
+compute them in exact NUMERIC arithmetic. SQLite computes in floating point,
+then each value is quantized to the declared scale (``Amount``). For any distance
+the column can hold, the float error is far below 0.000005, so the values
+match ``price()`` exactly. Sums would pile up that error, so ``totals()``
+sums whole cents and surcharges in SQL and applies the (linear) tariff to
+the sums in Decimal.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import (
+    BigIntegerField, Case, Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Round
+
+
+RATE_PER_KM = Decimal('1.5')
+TVA_RATE = Decimal('0.19')
+INTERNATIONAL_SURCHARGE = 100
+EXPRESS_SURCHARGE = 20
+
+# Scale of each amount (distance: 2 decimal places).
+HT_FIELD = DecimalField(max_digits=14, decimal_places=3)
+TVA_FIELD = DecimalField(max_digits=16, decimal_places=5)
+TTC_FIELD = DecimalField(max_digits=17, decimal_places=5)
+
+
+def surcharge(zone, speed):
+    extra = 0
+    if zone != 'NATIONAL':
+        extra += INTERNATIONAL_SURCHARGE
+    if speed != 'NORMAL':
+        extra += EXPRESS_SURCHARGE
+    return extra
+
+
+def price(distance, zone, speed):
+    """(HT, TVA, TTC) of one shipment, as Decimals."""
+    ht = Decimal(distance) * RATE_PER_KM
+    tva = ht * TVA_RATE
+    return ht, tva, ht + tva + surcharge(zone, speed)
+
+
+def to_cents(amount):
+    """``amount`` rounded to the cent (half up), as invoiced."""
+    return Decimal(amount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def price_rows(rows):
+    """{pk: (HT, TVA, TTC)} for ``(pk, distance, zone, speed)`` rows, ex:
+    ``queryset.values_list('pk', 'distance', 'zone', 'speed')``."""
+    return {pk: price(distance, zone, speed) for pk, distance, zone, speed in rows}
+
+
+# =========================
+#      SQL EXPRESSIONS
+# =========================
+class Amount(ExpressionWrapper):
+    """An amount rounded to the scale of its output field when read.
+
+    Django only does that for plain columns on SQLite; computed values come
+    back with the float noise (132.525000000000 for 132.52500).
+    """
+
+    def get_db_converters(self, connection):
+        return [*super().get_db_converters(connection), self._quantize]
+
+    def _quantize(self, value, expression, connection):
+        if value is None:
+            return None
+        return Decimal(value).quantize(Decimal(1).scaleb(-self.output_field.decimal_places))
+
+
+def _surcharge_expression(prefix=''):
+    return (
+        Case(When(~Q(**{f'{prefix}zone': 'NATIONAL'}), then=Value(INTERNATIONAL_SURCHARGE)), default=Value(0))
+        + Case(When(~Q(**{f'{prefix}speed': 'NORMAL'}), then=Value(EXPRESS_SURCHARGE)), default=Value(0))
+    )
+
+
+def _expressions(prefix=''):
+    """HT, TVA and TTC expressions for the shipment at ``prefix`` (ex:
+    'shipment__' from a related model)."""
+    ht = Amount(F(f'{prefix}distance') * Value(RATE_PER_KM), output_field=HT_FIELD)
+    tva = Amount(ht * Value(TVA_RATE), output_field=TVA_FIELD)
+    ttc = Amount(ht + tva + _surcharge_expression(prefix), output_field=TTC_FIELD)
+    return ht, tva, ttc
+
+
+def annotate_prices(queryset, prefix=''):
+    """``queryset`` with ``price_ht``, ``price_tva`` and ``price_ttc``."""
+    ht, tva, ttc = _expressions(prefix)
+    return queryset.annotate(price_ht=ht, price_tva=tva, price_ttc=ttc)
+
+
+def totals(queryset, prefix=''):
+    """{'count', 'ht', 'tva', 'ttc'} summed over ``queryset`` in one query.
+
+    Equal to the sum of ``price()`` over the shipments: the tariff has no
+    rounding, so it applies to the summed distances and surcharges.
+    """
+    extra = _surcharge_expression(prefix)
+    result = queryset.aggregate(
+        count=Count('pk'),
+        cents=Sum(Cast(Round(F(f'{prefix}distance') * 100), BigIntegerField())),
+        extra=Sum(extra),
+    )
+    distance = Decimal(result['cents'] or 0).scaleb(-2)
+    ht = distance * RATE_PER_KM
+    tva = ht * TVA_RATE
+    return {'count': result['count'], 'ht': ht, 'tva': tva, 'ttc': ht + tva + (result['extra'] or 0)}
@@ -0,0 +1,129 @@
+"""
+Allocation des identifiants préfixés (CL000001, SHP00000001, AG-0001, ...).
+
+Chaque modèle déclare ``ID_PREFIX`` et ``ID_WIDTH``; le prochain numéro
+vient d'une ligne compteur par préfixe (``IdSequence``) incrémentée par un
+seul ``UPDATE ... SET last_value = last_value + n``. On ne verrouille et on
+ne trie donc plus la table métier à chaque insertion.
+
+Hors transaction, un processus réserve un bloc de ``ID_SEQUENCE_BLOCK_SIZE``
+numéros et les distribue ensuite depuis la mémoire. Les numéros non utilisés
+d'un bloc sont perdus au redémarrage (des trous sont possibles, jamais des
+doublons). Dans une transaction englobante on ne réserve que le strict
+nécessaire: si elle est annulée, le compteur revient en arrière et aucun
+numéro déjà mis en cache ne peut être redistribué par un autre processus.
+"""
+import re
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+
+
+DEFAULT_BLOCK_SIZE = 1
+
+_blocks = {}
+_blocks_lock = threading.Lock()
+
+
+def format_id(model, number):
+    """Return the formatted identifier for ``number`` (ex: SHP00000001)."""
+    return f"{model.ID_PREFIX}{number:0{model.ID_WIDTH}d}"
+
+
+def parse_id(model, value):
+    """Return the numeric part of an identifier of ``model``, or None."""
+    match = re.fullmatch(rf"{re.escape(model.ID_PREFIX)}(\d+)", value or '')
+    return int(match.group(1)) if match else None
+
+
+def current_max(model, using=None):
+    """Scan the table once and return the highest number in use.
+
+    Numbers are compared as integers, not strings, so SHP1000 > SHP999.
+    Only used to seed a missing counter.
+    """
+    highest = 0
+    ids = (
+        model._base_manager.using(using)
+        .filter(pk__startswith=model.ID_PREFIX)
+        .values_list('pk', flat=True)
+    )
+    for value in ids.iterator(chunk_size=2000):
+        number = parse_id(model, value)
+        if number is not None and number > highest:
+            highest = number
+    return highest
+
+
+def _block_size():
+    return max(1, int(getattr(settings, 'ID_SEQUENCE_BLOCK_SIZE', DEFAULT_BLOCK_SIZE)))
+
+
+def _reserve(model, count, using):
+    """Atomically bump the counter of ``model`` by ``count``.
+
+    Returns the first reserved number.
+    """
+    from .models import IdSequence
+
+    prefix = model.ID_PREFIX
+    with transaction.atomic(using=using):
+        counters = IdSequence.objects.using(using).filter(prefix=prefix)
+        if not counters.update(last_value=F('last_value') + count):
+            try:
+                with transaction.atomic(using=using):
+                    IdSequence.objects.using(using).create(
+                        prefix=prefix,
+                        last_value=current_max(model, using=using) + count,
+                    )
+            except IntegrityError:
+                # Another worker seeded the counter first.
+                counters.update(last_value=F('last_value') + count)
+        last_value = counters.values_list('last_value', flat=True).get()
+    return last_value - count + 1
+
+
+def reserve_numbers(model, count, using=None):
+    """Reserve ``count`` consecutive numbers for ``model`` and return them.
+
+    Used by bulk inserts that bypass ``save()``.
+    """
+    if count <= 0:
+        return range(0)
+    using = using or router.db_for_write(model)
+    first = _reserve(model, count, using)
+    return range(first, first + count)
+
+
+def reserve_ids(model, count, using=None):
+    """Same as ``reserve_numbers`` but returns formatted identifiers."""
+    return [format_id(model, n) for n in reserve_numbers(model, count, using=using)]
+
+
+def next_id(model, using=None):
+    """Return the next free identifier for ``model``."""
+    using = using or router.db_for_write(model)
+    key = (using, model.ID_PREFIX)
+
+    if connections[using].in_atomic_block:
+        # A rollback of the enclosing transaction would give the numbers
+        # back to the counter: never keep a block in memory here.
+        return format_id(model, _reserve(model, 1, using))
+
+    with _blocks_lock:
+        block = _blocks.get(key)
+        if not block or block[0] > block[1]:
+            size = _block_size()
+            first = _reserve(model, size, using)
+            block = _blocks[key] = [first, first + size - 1]
+        number = block[0]
+        block[0] += 1
+    return format_id(model, number)
+
+
+def reset_blocks():
+    """Forget the blocks reserved by this process (ex: between test runs)."""
+    with _blocks_lock:
+        _blocks.clear()
@@ -0,0 +1,24 @@
+"""
+Signals sent by the ``database`` app on top of Django's model signals.
+
+``bulk_create()`` and ``QuerySet.update()`` do not send ``post_save``, so
+code listening for shipment writes also has to listen for
+``shipments_imported`` and ``shipments_updated``, and code listening for
+invoice creations for ``invoices_created``.
+"""
+from django.dispatch import Signal
+
+
+# Sent by database.intake after each committed chunk, with
+# ``shipments`` (the created Shipment instances, packages attached).
+shipments_imported = Signal()
+
+# Sent inside the transaction of a bulk UPDATE of shipments (ex:
+# history.set_status), with ``shipments`` (the Shipment instances, new
+# values set) and ``previous`` ({pk: {attname: old value}} for the columns
+# the UPDATE changed).
+shipments_updated = Signal()
+
+# Sent by invoice.generation inside the transaction that bulk-created
+# ``invoices`` (the Invoice instances, client attached).
+invoices_created = Signal()
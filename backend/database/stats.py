@@ -0,0 +1,287 @@
+"""
+Maintenance of the DailyStats rollup.
+
+Each Shipment, Invoice and Incident row contributes fixed amounts to one or
+two DailyStats rows, computed from its own columns only:
+
+- Shipment: +1 ``shipments_created`` on the local date of ``date_creation``,
+  and +1 ``shipments_delivered`` on ``shipment_date`` (``date_creation``'s
+  date when empty) while its status is DELIVERED, both under its zone/speed;
+- Invoice: ``total_amount`` of ``revenue`` on ``invoice_date``;
+- Incident: +1 ``incidents_opened`` on the local date of ``incident_date``.
+
+On save the old contribution is subtracted and the new one added, on delete
+the contribution is subtracted, so the table always equals what
+``rebuild()`` computes from scratch.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Max, Min, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.utils import timezone
+
+from .models import DailyStats, Incident, Invoice, Shipment
+from .signals import invoices_created, shipments_imported, shipments_updated
+
+
+# Columns each model's contribution depends on.
+TRACKED_FIELDS = {
+    Shipment: ('date_creation', 'zone', 'speed', 'statut', 'shipment_date'),
+    Invoice: ('invoice_date', 'total_amount'),
+    Incident: ('incident_date',),
+}
+
+# Days rebuilt per transaction.
+REBUILD_CHUNK_DAYS = 31
+
+
+def _day(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value) if 'T' in value or ' ' in value else date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def contributions(model, values):
+    """Return [((date, zone, speed), {column: delta}), ...] for one row."""
+    if model is Shipment:
+        created = _day(values['date_creation'])
+        if created is None:
+            return []
+        key = (created, values['zone'] or '', values['speed'] or '')
+        result = [(key, {'shipments_created': 1})]
+        if values['statut'] == 'DELIVERED':
+            delivered = _day(values['shipment_date']) or created
+            result.append(((delivered, key[1], key[2]), {'shipments_delivered': 1}))
+        return result
+    if model is Invoice:
+        day = _day(values['invoice_date'])
+        if day is None or values['total_amount'] in (None, ''):
+            return []
+        return [((day, '', ''), {'revenue': Decimal(str(values['total_amount']))})]
+    if model is Incident:
+        day = _day(values['incident_date'])
+        return [((day, '', ''), {'incidents_opened': 1})] if day else []
+    return []
+
+
+def apply(deltas):
+    """Add ``deltas`` ({(date, zone, speed): {column: delta}}) to DailyStats."""
+    for (day, zone, speed), changes in deltas.items():
+        changes = {column: delta for column, delta in changes.items() if delta}
+        if not changes:
+            continue
+        rows = DailyStats.objects.filter(date=day, zone=zone, speed=speed)
+        increments = {column: F(column) + delta for column, delta in changes.items()}
+        if rows.update(**increments):
+            continue
+        try:
+            with transaction.atomic():
+                DailyStats.objects.create(date=day, zone=zone, speed=speed, **changes)
+        except IntegrityError:
+            # Created concurrently between our UPDATE and INSERT.
+            rows.update(**increments)
+
+
+def _add(deltas, model, values, sign):
+    for key, changes in contributions(model, values):
+        for column, delta in changes.items():
+            deltas[key][column] = deltas[key].get(column, 0) + sign * delta
+
+
+def _current_values(instance):
+    return {name: getattr(instance, name) for name in TRACKED_FIELDS[type(instance)]}
+
+
+def _stored_values(instance):
+    """Column values as last read from / written to the database, or None."""
+    fields = TRACKED_FIELDS[type(instance)]
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is not None and all(name in loaded for name in fields):
+        return {name: loaded[name] for name in fields}
+    if instance._state.adding:
+        return None
+    return type(instance)._base_manager.filter(pk=instance.pk).values(*fields).first()
+
+
+def _updated_fields(sender, update_fields):
+    """Tracked fields written by a save(update_fields=...), None for all."""
+    if update_fields is None:
+        return None
+    return [name for name in TRACKED_FIELDS[sender] if name in update_fields]
+
+
+def _on_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if _updated_fields(sender, update_fields) == []:
+        instance._stats_previous = None
+        return
+    instance._stats_previous = _stored_values(instance)
+
+
+def _on_post_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    written = _updated_fields(sender, update_fields)
+    if written == []:
+        return  # None of the tracked columns changed in the database.
+    deltas = defaultdict(dict)
+    previous = getattr(instance, '_stats_previous', None)
+    current = _current_values(instance)
+    if previous is not None and not created:
+        _add(deltas, sender, previous, -1)
+        if written is not None:
+            # Only these columns were written: the others keep their stored value.
+            current = {**previous, **{name: current[name] for name in written}}
+    _add(deltas, sender, current, 1)
+    apply(deltas)
+
+
+def _on_pre_delete(sender, instance, **kwargs):
+    # Read before the row is gone (deferred fields cannot be loaded after).
+    instance._stats_previous = _stored_values(instance)
+
+
+def _on_post_delete(sender, instance, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    if previous is None:
+        return
+    deltas = defaultdict(dict)
+    _add(deltas, sender, previous, -1)
+    apply(deltas)
+
+
+def _on_shipments_imported(sender, shipments, **kwargs):
+    deltas = defaultdict(dict)
+    for shipment in shipments:
+        _add(deltas, Shipment, _current_values(shipment), 1)
+    apply(deltas)
+
+
+def _on_shipments_updated(sender, shipments, previous, **kwargs):
+    deltas = defaultdict(dict)
+    for shipment in shipments:
+        current = _current_values(shipment)
+        _add(deltas, Shipment, {**current, **previous[shipment.pk]}, -1)
+        _add(deltas, Shipment, current, 1)
+    apply(deltas)
+
+
+def _on_invoices_created(sender, invoices, **kwargs):
+    deltas = defaultdict(dict)
+    for invoice in invoices:
+        _add(deltas, Invoice, _current_values(invoice), 1)
+    apply(deltas)
+
+
+def connect_signals():
+    for model in TRACKED_FIELDS:
+        name = model.__name__
+        pre_save.connect(_on_pre_save, sender=model, dispatch_uid=f'stats_pre_save_{name}')
+        post_save.connect(_on_post_save, sender=model, dispatch_uid=f'stats_post_save_{name}')
+        pre_delete.connect(_on_pre_delete, sender=model, dispatch_uid=f'stats_pre_delete_{name}')
+        post_delete.connect(_on_post_delete, sender=model, dispatch_uid=f'stats_post_delete_{name}')
+    shipments_imported.connect(_on_shipments_imported, dispatch_uid='stats_shipments_imported')
+    shipments_updated.connect(_on_shipments_updated, dispatch_uid='stats_shipments_updated')
+    invoices_created.connect(_on_invoices_created, dispatch_uid='stats_invoices_created')
+
+
+def local_range(start, end):
+    """Aware datetimes bounding the local days ``start``..``end``, for
+    index range scans on datetime columns (a TruncDate() filter is not)."""
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+    )
+
+
+def _rollup(start, end):
+    """Compute the DailyStats rows for ``start``..``end`` from the source tables."""
+    rows = defaultdict(dict)
+    range_start, range_end = local_range(start, end)
+
+    created = (
+        Shipment.objects.filter(date_creation__gte=range_start, date_creation__lt=range_end)
+        .annotate(day=TruncDate('date_creation'))
+        .values('day', 'zone', 'speed')
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+    for row in created:
+        rows[(row['day'], row['zone'], row['speed'])]['shipments_created'] = row['n']
+
+    delivered = (
+        Shipment.objects.filter(statut='DELIVERED')
+        .annotate(day=Coalesce('shipment_date', TruncDate('date_creation'), output_field=DateField()))
+        .filter(day__gte=start, day__lte=end)
+        .values('day', 'zone', 'speed')
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+    for row in delivered:
+        rows[(row['day'], row['zone'], row['speed'])]['shipments_delivered'] = row['n']
+
+    revenue = (
+        Invoice.objects.filter(invoice_date__gte=start, invoice_date__lte=end)
+        .values('invoice_date')
+        .annotate(total=Sum('total_amount'))
+        .order_by()
+    )
+    for row in revenue:
+        rows[(row['invoice_date'], '', '')]['revenue'] = row['total'] or 0
+
+    incidents = (
+        Incident.objects.filter(incident_date__gte=range_start, incident_date__lt=range_end)
+        .annotate(day=TruncDate('incident_date'))
+        .values('day')
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+    for row in incidents:
+        rows[(row['day'], '', '')]['incidents_opened'] = row['n']
+
+    return [
+        DailyStats(date=day, zone=zone, speed=speed, **values)
+        for (day, zone, speed), values in sorted(rows.items())
+    ]
+
+
+def data_bounds():
+    """(first, last) local dates having any source row, or (None, None)."""
+    days = []
+    for model, column in ((Shipment, 'date_creation'), (Shipment, 'shipment_date'),
+                          (Invoice, 'invoice_date'), (Incident, 'incident_date')):
+        bounds = model.objects.aggregate(first=Min(column), last=Max(column))
+        days.extend(_day(value) for value in bounds.values() if value is not None)
+    if not days:
+        return None, None
+    return min(days), max(days)
+
+
+def rebuild(start, end, progress=None):
+    """Recompute DailyStats for ``start``..``end`` (inclusive).
+
+    Works in transactions of REBUILD_CHUNK_DAYS days: each one deletes the
+    chunk's rows and inserts the recomputed ones. Returns the number of rows
+    written. ``progress(chunk_start, chunk_end, rows)`` is called per chunk.
+    """
+    written = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=REBUILD_CHUNK_DAYS - 1), end)
+        with transaction.atomic():
+            DailyStats.objects.filter(date__gte=chunk_start, date__lte=chunk_end).delete()
+            rows = DailyStats.objects.bulk_create(_rollup(chunk_start, chunk_end))
+        written += len(rows)
+        if progress:
+            progress(chunk_start, chunk_end, len(rows))
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
@@ -0,0 +1,124 @@
+"""
+Content-addressed file storage (invoice PDFs).
+
+A file is stored under the SHA-256 of its bytes, sharded in two levels of
+directories so none of them grows too large:
+
+    invoices/ab/cd/abcd1234...ef.pdf
+
+Only the directory (``upload_to``) and the extension of the requested name
+are kept: the same bytes saved twice, under any name, give the same file,
+written once. A file is written next to its final name and linked in place
+only when complete, so a reader never sees it half written and two
+processes saving the same bytes cannot clash.
+
+Since several rows may share a file, files are never deleted with a row:
+``manage.py gc_invoice_files`` removes the ones no invoice refers to.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import uuid
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.files.utils import validate_file_name
+
+
+HASH_ALGORITHM = 'sha256'
+
+# Two levels of 2 hex digits: 65536 directories.
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+
+# Prefix of the files being written (see gc_invoice_files).
+TEMP_PREFIX = '.tmp-'
+
+DIGEST_RE = re.compile(r'[0-9a-f]{%d}' % (hashlib.new(HASH_ALGORITHM).digest_size * 2))
+
+
+def _bytes(chunk):
+    return chunk.encode() if isinstance(chunk, str) else chunk
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage naming each file after the hash of its content."""
+
+    def digest(self, content):
+        """Hex digest of ``content`` (a File), read in chunks."""
+        hasher = hashlib.new(HASH_ALGORITHM)
+        for chunk in content.chunks():
+            hasher.update(_bytes(chunk))
+        return hasher.hexdigest()
+
+    def hashed_name(self, name, digest):
+        directory, basename = posixpath.split(name.replace('\\', '/'))
+        extension = os.path.splitext(basename)[1].lower()
+        shards = [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_DEPTH)]
+        return posixpath.join(directory, *shards, digest + extension)
+
+    def digest_of(self, name):
+        """Digest ``name`` was named after, or None for a name this storage
+        did not make (files saved before it, under their upload name)."""
+        parts = name.replace('\\', '/').split('/')
+        digest = os.path.splitext(parts[-1])[0]
+        if not DIGEST_RE.fullmatch(digest) or len(parts) <= SHARD_DEPTH:
+            return None
+        shards = [digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_DEPTH)]
+        return digest if parts[-1 - SHARD_DEPTH:-1] == shards else None
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        validate_file_name(name, allow_relative_path=True)
+
+        name = self.hashed_name(name, self.digest(content))
+        validate_file_name(name, allow_relative_path=True)
+        if max_length is not None and len(name) > max_length:
+            raise SuspiciousFileOperation(
+                f'Storage can not save "{name}": the name is longer than {max_length} characters.'
+            )
+        if self.exists(name):
+            # Reused: refresh its date so gc_invoice_files, which spares
+            # recent files, does not take it before the new row is committed.
+            # Downloads validate these files by digest, not by date.
+            os.utime(self.path(name))
+            return name
+        return self._save(name, content)
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        temp_path = os.path.join(directory, f'{TEMP_PREFIX}{uuid.uuid4().hex}')
+        try:
+            with open(temp_path, 'xb') as temp:
+                for chunk in content.chunks():
+                    temp.write(_bytes(chunk))
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            try:
+                os.link(temp_path, full_path)
+            except FileExistsError:
+                pass  # Saved meanwhile by someone else: same name, same bytes.
+        finally:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # Names come from the content: an existing name already holds the
+        # right bytes and is reused, never suffixed.
+        return name
+
+
+def invoice_storage():
+    """Storage of Invoice.invoice_pdf: the ``invoices`` entry of STORAGES."""
+    return storages['invoices']
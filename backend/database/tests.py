@@ -1,3 +1,65 @@
-from django.test import TestCase
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
 
-# Create your tests here.
+from .models import Client, IdSequence
+from .sequences import next_id, reserve_ids, reset_blocks
+
+
+def counter():
+    return IdSequence.objects.filter(prefix=Client.ID_PREFIX).values_list('last_value', flat=True).first()
+
+
+class Rollback(Exception):
+    pass
+
+
+# Outside a transaction next_id() keeps a block in memory, so these tests
+# cannot run inside the transaction of a TestCase.
+@override_settings(ID_SEQUENCE_BLOCK_SIZE=5)
+class SequenceTests(TransactionTestCase):
+
+    def setUp(self):
+        reset_blocks()
+        self.addCleanup(reset_blocks)
+
+    def test_block_outside_transaction(self):
+        self.assertEqual([next_id(Client) for _ in range(3)], ['CL000001', 'CL000002', 'CL000003'])
+        # One reservation of a whole block.
+        self.assertEqual(counter(), 5)
+        self.assertEqual([next_id(Client) for _ in range(3)], ['CL000004', 'CL000005', 'CL000006'])
+        self.assertEqual(counter(), 10)
+
+    def test_no_block_inside_atomic(self):
+        with transaction.atomic():
+            self.assertEqual(next_id(Client), 'CL000001')
+            self.assertEqual(next_id(Client), 'CL000002')
+            self.assertEqual(counter(), 2)
+
+    def test_rollback_gives_the_numbers_back(self):
+        with transaction.atomic():
+            next_id(Client)
+        with self.assertRaises(Rollback):
+            with transaction.atomic():
+                self.assertEqual(next_id(Client), 'CL000002')
+                raise Rollback
+        self.assertEqual(counter(), 1)
+        with transaction.atomic():
+            self.assertEqual(next_id(Client), 'CL000002')
+
+    def test_block_kept_across_rollback_is_not_reused(self):
+        first = next_id(Client)  # Reserves CL000001..CL000005.
+        with self.assertRaises(Rollback):
+            with transaction.atomic():
+                # Inside the transaction: taken from the counter, not the block.
+                self.assertEqual(next_id(Client), 'CL000006')
+                raise Rollback
+        self.assertEqual((first, next_id(Client)), ('CL000001', 'CL000002'))
+
+    def test_counter_seeded_from_existing_rows(self):
+        # Compared as numbers: CL1000 is above CL999.
+        Client.objects.bulk_create([
+            Client(id_client=pk, nom='n', prenom='p', email=f'{pk}@example.com', password_client='!')
+            for pk in ('CL999', 'CL1000')
+        ])
+        self.assertEqual(reserve_ids(Client, 2), ['CL001001', 'CL001002'])
+        self.assertEqual(counter(), 1002)
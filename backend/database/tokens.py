@@ -0,0 +1,134 @@
+"""
+Signed bearer tokens for the driver app and the client portal.
+
+A token carries the role and id of the logged-in driver or client, a
+timestamp and an HMAC (``django.core.signing``). Checking it needs no
+session and no query: the AJAX calls of the driver and client pages send
+``Authorization: Bearer <token>`` and never touch the session table.
+
+- Expiry: a token older than API_TOKEN_MAX_AGE seconds is refused.
+- Key rotation: the first of API_TOKEN_KEYS signs, all of them verify. Put
+  a new key first, drop the old one API_TOKEN_MAX_AGE later. Without
+  API_TOKEN_KEYS, SECRET_KEY and SECRET_KEY_FALLBACKS are used.
+
+Tokens cannot be revoked one by one (they are not stored): removing a key
+invalidates every token it signed.
+
+The session stays the fallback: a request without a token is identified
+by ``request.session['role']`` / ``['user_id']`` as before.
+"""
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core import signing
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+
+
+SALT = 'swiftship.api-token'
+
+# Roles a token can be issued for.
+ROLES = ('driver', 'client')
+
+DEFAULT_MAX_AGE = 8 * 3600
+
+
+class Identity(NamedTuple):
+    role: object
+    user_id: object
+
+
+class InvalidToken(Exception):
+    """Bad signature, unknown key, expired or malformed token."""
+
+
+def _keys():
+    keys = list(getattr(settings, 'API_TOKEN_KEYS', None) or [])
+    if not keys:
+        keys = [settings.SECRET_KEY, *settings.SECRET_KEY_FALLBACKS]
+    return keys
+
+
+def max_age():
+    return getattr(settings, 'API_TOKEN_MAX_AGE', DEFAULT_MAX_AGE)
+
+
+def issue(role, user_id):
+    """Signed token for ``user_id`` with ``role`` (one of ROLES)."""
+    if role not in ROLES:
+        raise ValueError(f'role: expected one of {", ".join(ROLES)}')
+    return signing.dumps([role, str(user_id)], key=_keys()[0], salt=SALT)
+
+
+def verify(token):
+    """Identity carried by ``token``; InvalidToken if it cannot be trusted."""
+    keys = _keys()
+    try:
+        role, user_id = signing.loads(
+            token, key=keys[0], fallback_keys=keys[1:], salt=SALT, max_age=max_age(),
+        )
+    except signing.SignatureExpired:
+        raise InvalidToken('expired')
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidToken('invalid')
+    if role not in ROLES:
+        raise InvalidToken('invalid')
+    return Identity(role, user_id)
+
+
+def bearer(request):
+    """Token of the ``Authorization: Bearer`` header, or None."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer':
+        return None
+    return token.strip() or None
+
+
+def token_for(request, role):
+    """Token for the ``role`` user the request comes from, or None.
+
+    Pages render it for their scripts (``api_token``).
+    """
+    identity = request_identity(request)
+    if identity.role != role or not identity.user_id:
+        return None
+    return issue(*identity)
+
+
+def request_identity(request):
+    """(role, user_id) of the request: the bearer token, else the session."""
+    identity = getattr(request, 'token_identity', None)
+    if identity is not None:
+        return identity
+    return Identity(request.session.get('role'), request.session.get('user_id'))
+
+
+async def arequest_identity(request):
+    identity = getattr(request, 'token_identity', None)
+    if identity is not None:
+        return identity
+    return Identity(await request.session.aget('role'), await request.session.aget('user_id'))
+
+
+class BearerTokenMiddleware(MiddlewareMixin):
+    """Verify ``Authorization: Bearer`` tokens (before CsrfViewMiddleware).
+
+    A valid token sets ``request.token_identity`` and skips the CSRF check:
+    browsers never add this header on their own, so a cross-site request
+    cannot carry it. An invalid or expired token gets a 401, a request
+    without one goes on with the session. No I/O: sync and async capable.
+    """
+
+    def process_request(self, request):
+        request.token_identity = None
+        token = bearer(request)
+        if token is None:
+            return None
+        try:
+            request.token_identity = verify(token)
+        except InvalidToken as e:
+            response = JsonResponse({'success': False, 'error': f'token_{e}'}, status=401)
+            response['WWW-Authenticate'] = f'Bearer error="invalid_token", error_description="{e}"'
+            return response
+        request._dont_enforce_csrf_checks = True
+        return None
@@ -0,0 +1,71 @@
+"""
+Shipment claims by drivers.
+
+A claim is a conditional ``UPDATE ... SET driver_id = %s WHERE id_shipment = %s
+AND driver_id IS NULL``: the database decides which driver wins, nothing is
+locked beforehand and the losers update zero rows. The transaction starts
+with its first UPDATE, so on SQLite it takes the write lock once instead of
+upgrading a read lock (the ``database is locked`` errors of the old
+select_for_update() + save() path), and it stays short.
+
+``shipments_updated`` is sent for the claimed shipments (previous driver:
+None), so the activity feed, live events and caches follow as for a save().
+"""
+from django.db import transaction
+
+from database.models import Shipment
+from database.signals import shipments_updated
+
+
+# Outcomes, per shipment id.
+CLAIMED = 'claimed'
+ALREADY_YOURS = 'already_yours'
+ALREADY_ASSIGNED = 'already_assigned'
+NOT_FOUND = 'not_found'
+
+# Shipments per claim request.
+CLAIM_BATCH_MAX_SIZE = 20
+
+
+def claim(driver, shipment_ids):
+    """Assign to ``driver`` each shipment of ``shipment_ids`` nobody has claimed.
+
+    Returns {shipment_id: outcome}, in the order of ``shipment_ids``
+    (duplicates removed).
+    """
+    ids = list(dict.fromkeys(str(shipment_id) for shipment_id in shipment_ids))
+    won = []
+    with transaction.atomic():
+        for shipment_id in ids:
+            if Shipment.objects.filter(pk=shipment_id, driver__isnull=True).update(driver=driver):
+                won.append(shipment_id)
+
+        if won:
+            shipments = list(
+                Shipment.objects.filter(pk__in=won).select_related('driver', 'package')
+            )
+            shipments_updated.send(
+                sender=Shipment,
+                shipments=shipments,
+                previous={shipment.pk: {'driver_id': None} for shipment in shipments},
+            )
+
+        lost = [shipment_id for shipment_id in ids if shipment_id not in won]
+        owners = dict(Shipment.objects.filter(pk__in=lost).values_list('pk', 'driver_id'))
+
+    results = {}
+    for shipment_id in ids:
+        if shipment_id in won:
+            results[shipment_id] = CLAIMED
+        elif shipment_id not in owners:
+            results[shipment_id] = NOT_FOUND
+        elif owners[shipment_id] == driver.pk:
+            results[shipment_id] = ALREADY_YOURS
+        else:
+            results[shipment_id] = ALREADY_ASSIGNED
+    return results
+
+
+def claim_one(driver, shipment_id):
+    """Outcome of claiming a single shipment."""
+    return claim(driver, [shipment_id])[str(shipment_id)]
@@ -0,0 +1,45 @@
+"""Hot queries of the driver page (see database.hot_queries)."""
+from django.db.models import Count, Q
+
+from dashboard.pagination import order_by_expressions
+from database.hot_queries import register
+from database.models import Shipment
+
+from . import tours
+from .views import UNASSIGNED_ORDERING, UNASSIGNED_PAGE_SIZE
+
+
+@register("driver: today's counters")
+def todays_counters(sample):
+    # aggregate() runs immediately: explain the same query as an annotation.
+    return (
+        Shipment.objects.filter(driver_id=sample.driver_id, shipment_date=sample.today)
+        .values("driver_id")
+        .annotate(
+            total=Count("pk"),
+            pending=Count("pk", filter=Q(statut="PENDING")),
+            completed=Count("pk", filter=Q(statut="DELIVERED")),
+        )
+    )
+
+
+@register("driver: today's shipments")
+def todays_shipments(sample):
+    return (
+        Shipment.objects.filter(driver_id=sample.driver_id, shipment_date=sample.today)
+        .select_related("package__client").order_by("id_shipment")
+    )
+
+
+@register("driver: today's unassigned shipments")
+def unassigned_shipments(sample):
+    return (
+        Shipment.objects.filter(driver__isnull=True, shipment_date=sample.today)
+        .select_related("package__client")
+        .order_by(*order_by_expressions(UNASSIGNED_ORDERING))[:UNASSIGNED_PAGE_SIZE + 1]
+    )
+
+
+@register("tours: shipments to plan")
+def shipments_to_plan(sample):
+    return tours.stops_queryset(sample.today, replace=False)
@@ -0,0 +1,92 @@
+import threading
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from database import tokens
+from database.models import Chauffeur, Client, Package, Shipment
+
+from . import claims
+
+
+def make_driver(n):
+    return Chauffeur.objects.create(
+        nom=f'Driver{n}', prenom='Test', telephone='0600000000',
+        email=f'driver{n}@example.com', numero_permis=f'P{n}', password_driver='!',
+    )
+
+
+def make_shipment(n):
+    client = Client.objects.create(nom='Client', prenom='Test', email=f'client{n}@example.com', password_client='!')
+    package = Package.objects.create(
+        client=client, tracking_number=f'TRK-TEST{n}', weight=Decimal('1'),
+        number_of_pieces=1, package_type='OTHER',
+    )
+    return Shipment.objects.create(
+        package=package, client=client, zone='NATIONAL', speed='NORMAL', distance=Decimal('10'),
+    )
+
+
+class ClaimTests(TestCase):
+
+    def setUp(self):
+        self.first, self.second = make_driver(1), make_driver(2)
+        self.shipment = make_shipment(1)
+
+    def test_outcomes(self):
+        pk = self.shipment.pk
+        self.assertEqual(claims.claim_one(self.first, pk), claims.CLAIMED)
+        self.assertEqual(claims.claim_one(self.first, pk), claims.ALREADY_YOURS)
+        self.assertEqual(claims.claim_one(self.second, pk), claims.ALREADY_ASSIGNED)
+        self.assertEqual(claims.claim_one(self.second, 'SHP99999999'), claims.NOT_FOUND)
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.driver_id, self.first.pk)
+
+    def test_claim_after_stale_read(self):
+        # The second driver saw the shipment unassigned, then the first one
+        # claimed it: the conditional UPDATE refuses the second claim.
+        seen = Shipment.objects.get(pk=self.shipment.pk)
+        self.assertIsNone(seen.driver_id)
+        claims.claim_one(self.first, seen.pk)
+        self.assertEqual(claims.claim_one(self.second, seen.pk), claims.ALREADY_ASSIGNED)
+        self.assertEqual(Shipment.objects.get(pk=seen.pk).driver_id, self.first.pk)
+
+    def test_claim_view(self):
+        claims.claim_one(self.first, self.shipment.pk)
+        response = self.client.post(
+            '/driver/claim/', {'shipment_id': self.shipment.pk},
+            headers={'authorization': f"Bearer {tokens.issue('driver', self.second.pk)}"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'success': False, 'error': claims.ALREADY_ASSIGNED})
+
+
+class ConcurrentClaimTests(TransactionTestCase):
+
+    def test_one_winner(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Shared-cache in-memory SQLite fails concurrent writers at once
+            # (table locked) instead of waiting for the lock.
+            self.skipTest('needs an on-disk test database')
+        drivers = [make_driver(n) for n in range(4)]
+        shipment = make_shipment(1)
+        barrier = threading.Barrier(len(drivers))
+        outcomes = {}
+
+        def run(driver):
+            try:
+                barrier.wait()
+                outcomes[driver.pk] = claims.claim_one(driver, shipment.pk)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(driver,)) for driver in drivers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes.values()), [claims.ALREADY_ASSIGNED] * 3 + [claims.CLAIMED])
+        winner = next(pk for pk, outcome in outcomes.items() if outcome == claims.CLAIMED)
+        self.assertEqual(Shipment.objects.get(pk=shipment.pk).driver_id, winner)
@@ -0,0 +1,279 @@
+"""
+Tour planning: one ordered Tour per driver for a day's pending shipments.
+
+1. Drivers: active and available, with a vehicle. Their capacity is the
+   vehicle's ``capacite_charge`` (kg). A vehicle without a capacity has no
+   weight limit, but every tour stops at ``TOUR_MAX_STOPS`` shipments.
+2. Shipments: PENDING on that day and in no tour of that day. A shipment
+   already claimed by a planned driver stays with that driver. The others
+   are laid out along the roads from the depot (by destination, then
+   distance) and handed out first-fit, so each driver gets neighbouring
+   stops.
+3. The stops of each tour are ordered by nearest neighbour then improved
+   with 2-opt, over the distance matrix of the tour (depot first and last).
+4. ``save()`` claims the shipments for their driver through driver.claims. A
+   shipment claimed meanwhile by someone else is dropped from its tour.
+   The tours and their ordered stops (TourStop) are then written with
+   bulk_create.
+
+Shipments have no coordinates, so ``road_distance()`` is a proxy built from
+``Shipment.distance`` (km from the depot) and ``Shipment.destination``.
+Stops in the same destination lie on one road, ``|d1 - d2|`` apart. Other
+stops are reached through the depot: ``d1 + d2``. ``plan()`` and
+``order_stops()`` take any other symmetric ``distance(stop_a, stop_b)``
+function.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from database.models import Chauffeur, Shipment, Tour, TourStop
+from database.sequences import reserve_ids
+
+from . import claims
+
+
+DEFAULT_MAX_STOPS = 60
+
+# 2-opt passes over a tour (each pass is O(stops²)); it usually settles in a
+# handful.
+TWO_OPT_MAX_PASSES = 50
+
+
+class Stop:
+    """A shipment to deliver, as the planner sees it."""
+
+    __slots__ = ('shipment_id', 'destination', 'distance', 'weight', 'driver_id')
+
+    def __init__(self, shipment_id, destination='', distance=0.0, weight=Decimal('0'), driver_id=None):
+        self.shipment_id = shipment_id
+        self.destination = (destination or '').strip().lower()
+        self.distance = float(distance or 0)
+        self.weight = weight or Decimal('0')
+        self.driver_id = driver_id
+
+    def __repr__(self):
+        return f'<Stop {self.shipment_id} {self.destination!r} {self.distance}km>'
+
+
+DEPOT = Stop(None)
+
+
+class TourPlan:
+    """Stops planned for one driver, in delivery order once ``order()`` ran."""
+
+    def __init__(self, driver, capacity):
+        self.driver = driver
+        self.capacity = capacity
+        self.stops = []
+        self.load = Decimal('0')
+        self.length = 0.0
+
+    def fits(self, stop, max_stops):
+        if len(self.stops) >= max_stops:
+            return False
+        return self.capacity is None or self.load + stop.weight <= self.capacity
+
+    def add(self, stop):
+        self.stops.append(stop)
+        self.load += stop.weight
+
+    def order(self, distance):
+        self.stops, self.length = order_stops(self.stops, distance)
+
+    def drop(self, shipment_ids, distance):
+        """Remove ``shipment_ids``, keeping the order of the other stops."""
+        self.stops = [stop for stop in self.stops if stop.shipment_id not in shipment_ids]
+        self.load = sum((stop.weight for stop in self.stops), Decimal('0'))
+        matrix = distance_matrix(self.stops, distance)
+        self.length = route_length([0, *range(1, len(self.stops) + 1), 0], matrix)
+
+
+# =========================
+#     ROUTE ORDERING
+# =========================
+def road_distance(a, b):
+    """Proxy distance in km between two stops (see the module docstring)."""
+    if a.destination == b.destination:
+        return abs(a.distance - b.distance)
+    return a.distance + b.distance
+
+
+def distance_matrix(stops, distance=road_distance):
+    """Matrix over [DEPOT] + ``stops``: index 0 is the depot."""
+    points = [DEPOT, *stops]
+    return [[distance(a, b) for b in points] for a in points]
+
+
+def nearest_neighbour(matrix):
+    """Route [0, ..., 0] always going to the closest stop not visited yet."""
+    left = set(range(1, len(matrix)))
+    route = [0]
+    current = 0
+    while left:
+        row = matrix[current]
+        current = min(left, key=row.__getitem__)
+        left.remove(current)
+        route.append(current)
+    route.append(0)
+    return route
+
+
+def two_opt(route, matrix, max_passes=TWO_OPT_MAX_PASSES):
+    """Improve ``route`` by reversing segments while that shortens it.
+
+    The depot ends stay in place. ``matrix`` must be symmetric.
+    """
+    route = list(route)
+    last = len(route) - 1
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, last - 1):
+            a = route[i - 1]
+            for j in range(i + 1, last):
+                b, c, d = route[i], route[j], route[j + 1]
+                delta = matrix[a][c] + matrix[b][d] - matrix[a][b] - matrix[c][d]
+                if delta < -1e-9:
+                    route[i:j + 1] = route[j:i - 1:-1]
+                    improved = True
+        if not improved:
+            break
+    return route
+
+
+def route_length(route, matrix):
+    return sum(matrix[a][b] for a, b in zip(route, route[1:]))
+
+
+def order_stops(stops, distance=road_distance):
+    """Return (stops in delivery order, route length from and back to the depot)."""
+    if not stops:
+        return [], 0.0
+    matrix = distance_matrix(stops, distance)
+    route = two_opt(nearest_neighbour(matrix), matrix)
+    return [stops[i - 1] for i in route[1:-1]], route_length(route, matrix)
+
+
+# =========================
+#       ASSIGNMENT
+# =========================
+def road_order(stop):
+    return (stop.destination, stop.distance, stop.shipment_id)
+
+
+def assign(stops, plans, max_stops=DEFAULT_MAX_STOPS):
+    """Distribute ``stops`` over ``plans``; return the stops left over.
+
+    Stops already claimed by the driver of a plan go to that plan first.
+    The others are handed out in road order, each plan taking the stops
+    that still fit before the next plan gets the rest.
+    """
+    by_driver = {plan.driver.pk: plan for plan in plans}
+    free = []
+    for stop in stops:
+        plan = by_driver.get(stop.driver_id)
+        if plan is not None:
+            plan.add(stop)
+        elif stop.driver_id is None:
+            free.append(stop)
+
+    remaining = sorted(free, key=road_order)
+    for plan in plans:
+        if not remaining:
+            break
+        left = []
+        for stop in remaining:
+            if plan.fits(stop, max_stops):
+                plan.add(stop)
+            else:
+                left.append(stop)
+        remaining = left
+    return remaining
+
+
+# =========================
+#        DATABASE
+# =========================
+def _max_stops():
+    return getattr(settings, 'TOUR_MAX_STOPS', DEFAULT_MAX_STOPS)
+
+
+def _drivers(day, replace):
+    drivers = (
+        Chauffeur.objects.filter(statut='actif', disponibilite=True, vehicule__isnull=False)
+        .select_related('vehicule').order_by('id_chauffeur')
+    )
+    planned = Tour.objects.filter(tour_date=day)
+    if replace:
+        planned = planned.exclude(status='PENDING')
+    return drivers.exclude(pk__in=planned.values('chauffeur_id'))
+
+
+def stops_queryset(day, replace=False):
+    """(id, destination, distance, weight, driver) of the shipments to plan."""
+    in_tours = Tour.shipments.through.objects.filter(tour__tour_date=day)
+    if replace:
+        in_tours = in_tours.exclude(tour__status='PENDING')
+    return (
+        Shipment.objects.filter(shipment_date=day, statut='PENDING')
+        .exclude(pk__in=in_tours.values('shipment_id'))
+        .values_list('id_shipment', 'destination', 'distance', 'package__weight', 'driver_id')
+    )
+
+
+def plan(day, distance=road_distance, max_stops=None, replace=False):
+    """Plan the tours of ``day`` without writing anything.
+
+    Returns (plans, unplanned stops). With ``replace``, the PENDING tours
+    already planned for ``day`` are planned again from scratch.
+    """
+    max_stops = max_stops or _max_stops()
+    plans = [TourPlan(driver, driver.vehicule.capacite_charge) for driver in _drivers(day, replace)]
+    stops = [Stop(*row) for row in stops_queryset(day, replace).iterator(chunk_size=2000)]
+    unplanned = assign(stops, plans, max_stops)
+    plans = [tour_plan for tour_plan in plans if tour_plan.stops]
+    for tour_plan in plans:
+        tour_plan.order(distance)
+    return plans, unplanned
+
+
+def save(plans, day, distance=road_distance, replace=False):
+    """Claim the planned shipments and write one Tour per plan.
+
+    Returns the created tours.
+    """
+    with transaction.atomic():
+        if replace:
+            Tour.objects.filter(tour_date=day, status='PENDING').delete()
+
+        for tour_plan in plans:
+            driver = tour_plan.driver
+            free = [stop.shipment_id for stop in tour_plan.stops if stop.driver_id != driver.pk]
+            outcomes = claims.claim(driver, free) if free else {}
+            lost = {
+                shipment_id for shipment_id, outcome in outcomes.items()
+                if outcome not in (claims.CLAIMED, claims.ALREADY_YOURS)
+            }
+            if lost:
+                tour_plan.drop(lost, distance)
+
+        plans = [tour_plan for tour_plan in plans if tour_plan.stops]
+        tours = [
+            Tour(
+                id_tour=tour_id,
+                chauffeur=tour_plan.driver,
+                tour_date=day,
+                route_length=Decimal(str(round(tour_plan.length, 2))),
+                load=tour_plan.load,
+            )
+            for tour_id, tour_plan in zip(reserve_ids(Tour, len(plans)), plans)
+        ]
+        Tour.objects.bulk_create(tours)
+
+        TourStop.objects.bulk_create(
+            TourStop(tour_id=tour.pk, shipment_id=stop.shipment_id, position=position)
+            for tour, tour_plan in zip(tours, plans)
+            for position, stop in enumerate(tour_plan.stops)
+        )
+    return tours
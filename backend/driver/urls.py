@@ -5,5 +5,7 @@ urlpatterns = [
     path('', views.index, name='driver_index'),
     path('dashboard/', views.index, name='driver_dashboard'),
     path('claim/', views.claim_shipment, name='driver_claim'),
+    path('claim/batch/', views.claim_shipments, name='driver_claim_batch'),
     path('update_status/', views.update_shipment_status, name='driver_update_status'),
+    path('events/', views.driver_events, name='driver_events'),
 ]
@@ -5,12 +5,23 @@ from django.utils import timezone
 from django.db import transaction
 from django.middleware.csrf import get_token
 from django.conf import settings
+from django.db.models import Count, Q
+import json
 import logging
 
+from dashboard.pagination import order_by_expressions, paginate
+from database import history, tokens
+from database.live import event_stream_response
 from database.models import Chauffeur, Shipment
 
+from . import claims
+
 logger = logging.getLogger(__name__)
 
+# Unassigned shipments shown per page on the driver dashboard.
+UNASSIGNED_PAGE_SIZE = 20
+UNASSIGNED_ORDERING = ["id_shipment"]
+
 # =========================
 # Login (CLASSIC)
 # =========================
@@ -51,7 +62,12 @@ def driver_login(request):
         request.session.modified = True
 
         if wants_json:
-            return JsonResponse({"success": True, "role": "driver"})
+            return JsonResponse({
+                "success": True,
+                "role": "driver",
+                "token": tokens.issue("driver", driver.id_chauffeur),
+                "expires_in": tokens.max_age(),
+            })
 
         return redirect("driver_index")
 
@@ -70,10 +86,10 @@ def driver_logout(request):
 # Dashboard
 # =========================
 def index(request):
-    if request.session.get("role") != "driver":
+    role, user_id = tokens.request_identity(request)
+    if role != "driver":
         return redirect("driver_login")
 
-    user_id = request.session.get("user_id")
     today = timezone.localdate()
 
     try:
@@ -81,32 +97,53 @@ def index(request):
     except Chauffeur.DoesNotExist:
         return redirect("driver_login")
 
-    todays_shipments = Shipment.objects.filter(
-        driver=driver,
-        shipment_date=today
-    )
+    todays = Shipment.objects.filter(driver=driver, shipment_date=today)
 
-    unassigned_shipments = Shipment.objects.filter(
-        driver__isnull=True,
-        shipment_date=today
+    # The three counters in one pass over today's shipments.
+    counters = todays.aggregate(
+        total=Count("pk"),
+        pending=Count("pk", filter=Q(statut="PENDING")),
+        completed=Count("pk", filter=Q(statut="DELIVERED")),
     )
 
-    assigned_shipments = Shipment.objects.filter(driver=driver)
+    # The template reads the client and package of every card.
+    todays_shipments = list(
+        todays.select_related("package__client").order_by("id_shipment")
+    )
+    completed_today = [s for s in todays_shipments if s.statut == "DELIVERED"]
 
-    # Shipments completed today by this driver (used in template)
-    completed_today = todays_shipments.filter(statut="DELIVERED")
+    # Every driver sees the shared pool: serve it one page at a time.
+    unassigned = (
+        Shipment.objects.filter(driver__isnull=True, shipment_date=today)
+        .select_related("package__client")
+        .order_by(*order_by_expressions(UNASSIGNED_ORDERING))
+    )
+    cursor = request.GET.get("unassigned") or None
+    try:
+        unassigned_shipments, next_cursor = paginate(
+            unassigned, UNASSIGNED_ORDERING, cursor, UNASSIGNED_PAGE_SIZE
+        )
+    except ValueError:
+        # Stale or tampered cursor: start over from the first page.
+        cursor = None
+        unassigned_shipments, next_cursor = paginate(
+            unassigned, UNASSIGNED_ORDERING, None, UNASSIGNED_PAGE_SIZE
+        )
 
     get_token(request)  # CSRF for AJAX buttons
 
     return render(request, "driver.html", {
         "driver": driver,
+        # Bearer token of the AJAX buttons: no session lookup per call.
+        "api_token": tokens.issue("driver", driver.id_chauffeur),
         "todays_shipments": todays_shipments,
         "unassigned_shipments": unassigned_shipments,
-        "assigned_shipments": assigned_shipments,
+        "unassigned_cursor": cursor,
+        "unassigned_next_cursor": next_cursor,
         "completed_today": completed_today,
-        "pending": todays_shipments.filter(statut="PENDING").count(),
-        "completed": todays_shipments.filter(statut="DELIVERED").count(),
-        "total": todays_shipments.count(),
+        "pending": counters["pending"],
+        "completed": counters["completed"],
+        "total": counters["total"],
     })
 
 
@@ -115,9 +152,10 @@ def index(request):
 # =========================
 @require_GET
 def ping(request):
+    role, user_id = tokens.request_identity(request)
     return JsonResponse({
-        "role": request.session.get("role"),
-        "user_id": request.session.get("user_id"),
+        "role": role,
+        "user_id": user_id,
         "cookies": request.COOKIES
     })
 
@@ -127,20 +165,63 @@ def ping(request):
 # =========================
 @require_POST
 def claim_shipment(request):
-    if request.session.get("role") != "driver":
+    role, user_id = tokens.request_identity(request)
+    if role != "driver":
         return JsonResponse({"success": False}, status=403)
 
     shipment_id = request.POST.get("shipment_id")
-    driver = Chauffeur.objects.get(id_chauffeur=request.session["user_id"])
+    if not shipment_id:
+        return JsonResponse({"success": False, "error": "shipment_id: required"}, status=400)
+    try:
+        driver = Chauffeur.objects.get(id_chauffeur=user_id)
+    except Chauffeur.DoesNotExist:
+        return JsonResponse({"success": False}, status=403)
+
+    outcome = claims.claim_one(driver, shipment_id)
+    if outcome in (claims.CLAIMED, claims.ALREADY_YOURS):
+        return JsonResponse({"success": True})
+    if outcome == claims.NOT_FOUND:
+        return JsonResponse({"success": False, "error": "not_found"}, status=404)
+    return JsonResponse({"success": False, "error": outcome})
+
 
-    with transaction.atomic():
-        shipment = Shipment.objects.select_for_update().get(id_shipment=shipment_id)
-        if shipment.driver:
-            return JsonResponse({"success": False, "error": "already_assigned"})
-        shipment.driver = driver
-        shipment.save()
+@require_POST
+def claim_shipments(request):
+    """Claim several shipments at once.
+
+    Body: JSON ``{"shipment_ids": [...]}`` or repeated ``shipment_id`` form
+    fields, at most CLAIM_BATCH_MAX_SIZE. Returns ``{"results": {id:
+    outcome}}`` with an outcome of driver.claims (claimed, already_yours,
+    already_assigned, not_found) per shipment.
+    """
+    role, user_id = tokens.request_identity(request)
+    if role != "driver":
+        return JsonResponse({"success": False}, status=403)
+
+    try:
+        if request.content_type == "application/json":
+            shipment_ids = json.loads(request.body).get("shipment_ids")
+        else:
+            shipment_ids = request.POST.getlist("shipment_id")
+        if not isinstance(shipment_ids, list) or not all(isinstance(i, str) for i in shipment_ids):
+            raise ValueError("shipment_ids: expected a list of shipment ids")
+        shipment_ids = [i.strip() for i in shipment_ids if i.strip()]
+        if not shipment_ids:
+            raise ValueError("shipment_ids: required")
+        if len(shipment_ids) > claims.CLAIM_BATCH_MAX_SIZE:
+            raise ValueError(f"shipment_ids: at most {claims.CLAIM_BATCH_MAX_SIZE} per request")
+    except (ValueError, AttributeError) as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    try:
+        driver = Chauffeur.objects.get(id_chauffeur=user_id)
+    except Chauffeur.DoesNotExist:
+        return JsonResponse({"success": False}, status=403)
 
-    return JsonResponse({"success": True})
+    results = claims.claim(driver, shipment_ids)
+    claimed = sum(1 for outcome in results.values() if outcome == claims.CLAIMED)
+    logger.info("claim_shipments: driver %s claimed %d/%d", driver.pk, claimed, len(results))
+    return JsonResponse({"success": True, "claimed": claimed, "results": results})
 
 
 # =========================
@@ -148,11 +229,12 @@ def claim_shipment(request):
 # =========================
 @require_POST
 def update_shipment_status(request):
-    logger.debug("update_shipment_status called: session_role=%s user_id=%s", request.session.get("role"), request.session.get("user_id"))
+    role, user_id = tokens.request_identity(request)
+    logger.debug("update_shipment_status called: role=%s user_id=%s", role, user_id)
 
     wants_json = 'application/json' in request.META.get('HTTP_ACCEPT', '')
 
-    if request.session.get("role") != "driver":
+    if role != "driver":
         logger.warning("update_shipment_status forbidden: wrong role or not logged in")
         if wants_json:
             return JsonResponse({"success": False, "error": "forbidden"}, status=403)
@@ -180,19 +262,30 @@ def update_shipment_status(request):
                 logger.warning("update_shipment_status: shipment not found %s", shipment_id)
                 return JsonResponse({"success": False, "error": "not_found"}, status=404)
 
-            if str(shipment.driver_id) != str(request.session.get("user_id")):
-                logger.warning("update_shipment_status forbidden: shipment %s driver mismatch (owner=%s session=%s)", shipment_id, shipment.driver_id, request.session.get("user_id"))
+            if str(shipment.driver_id) != str(user_id):
+                logger.warning("update_shipment_status forbidden: shipment %s driver mismatch (owner=%s user=%s)", shipment_id, shipment.driver_id, user_id)
                 return JsonResponse({"success": False, "error": "forbidden"}, status=403)
 
             shipment.statut = action_map[action]
-            shipment.save()
+            with history.changed_by("driver", actor=shipment.driver_id):
+                shipment.save()
 
     except Exception as e:
         logger.exception("update_shipment_status failed: %s", e)
         return JsonResponse({"success": False, "error": "server_error"}, status=500)
 
-    logger.info("update_shipment_status: shipment %s set to %s by user %s", shipment_id, action_map[action], request.session.get("user_id"))
+    logger.info("update_shipment_status: shipment %s set to %s by user %s", shipment_id, action_map[action], user_id)
     if wants_json:
         return JsonResponse({"success": True})
     # Non-AJAX form submit -> redirect back to dashboard
     return redirect('driver_index')
+
+
+# =========================
+# Live events (SSE)
+# =========================
+@require_GET
+def driver_events(request):
+    if tokens.request_identity(request).role != "driver":
+        return JsonResponse({"success": False, "error": "forbidden"}, status=403)
+    return event_stream_response(request, "driver")
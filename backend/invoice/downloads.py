@@ -0,0 +1,151 @@
+"""
+File downloads with HTTP caching and byte ranges.
+
+``serve(request, storage, name, filename)`` streams a stored file without
+reading it into memory:
+
+- the whole file goes through FileResponse, in blocks (and through the
+  server's sendfile, ``wsgi.file_wrapper``, when the storage gives a real
+  file);
+- ``ETag`` and ``Last-Modified`` answer ``If-None-Match`` /
+  ``If-Modified-Since`` with 304. A content-addressed file (see
+  database/storage.py) gets the digest of its name as a strong ETag and no
+  Last-Modified: its modification time only tracks its age for
+  gc_invoice_files. Other files get size + modification time (no hashing);
+- ``Range: bytes=...`` (one range, ``If-Range`` honoured) gets a 206 with
+  the requested slice, an unsatisfiable range a 416.
+
+Multiple ranges are answered with the whole file, as RFC 9110 allows.
+"""
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Invoices are personal: caches may keep them but must check back each time.
+CACHE_CONTROL = 'private, no-cache'
+
+# Bytes per read when the server streams the file itself (FileResponse
+# reads 4 KB at a time by default).
+BLOCK_SIZE = 64 * 1024
+
+
+class FileSlice:
+    """Read-only view of ``length`` bytes of ``file`` from ``start``."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def etag_for(size, modified):
+    return f'"{size:x}-{int(modified.timestamp() * 1_000_000):x}"'
+
+
+def _content_digest(storage, name):
+    digest_of = getattr(storage, 'digest_of', None)
+    return digest_of(name) if digest_of is not None else None
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single ``bytes=`` range, None to send the
+    whole file, or ValueError when the range cannot be satisfied."""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None  # Malformed or several ranges: ignore the header.
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise ValueError('empty suffix range')
+        if size == 0:
+            raise ValueError('range not satisfiable')
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('range not satisfiable')
+    return start, end
+
+
+def _if_range_matches(request, etag, modified):
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and modified is not None and int(modified.timestamp()) <= since
+
+
+def serve(request, storage, name, filename, content_type='application/pdf', as_attachment=True):
+    size = storage.size(name)
+    digest = _content_digest(storage, name)
+    if digest is not None:
+        etag, modified = f'"{digest}"', None
+    else:
+        modified = storage.get_modified_time(name)
+        etag = etag_for(size, modified)
+
+    def headers(response):
+        response['ETag'] = etag
+        if modified is not None:
+            response['Last-Modified'] = http_date(modified.timestamp())
+        response['Accept-Ranges'] = 'bytes'
+        response['Cache-Control'] = CACHE_CONTROL
+        return response
+
+    def stream(filelike, **kwargs):
+        response = FileResponse(
+            filelike, as_attachment=as_attachment, filename=filename,
+            content_type=content_type, **kwargs,
+        )
+        response.block_size = BLOCK_SIZE
+        return response
+
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(modified.timestamp()) if modified is not None else None,
+    )
+    if not_modified is not None:
+        return headers(not_modified)
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and request.method in ('GET', 'HEAD') and _if_range_matches(request, etag, modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return headers(response)
+
+    file = storage.open(name, 'rb')
+    if byte_range is None:
+        return headers(stream(file))
+
+    start, end = byte_range
+    length = end - start + 1
+    response = stream(FileSlice(file, start, length), status=206)
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return headers(response)
@@ -0,0 +1,212 @@
+"""
+Batch invoice generation (``manage.py generate_invoices``).
+
+Every shipment of a period without an invoice gets one, chunk by chunk:
+
+1. select: the next ``chunk_size`` uninvoiced shipments, priced in SQL
+   (database.pricing) with their client and package in the same query;
+2. render: the PDFs, in a process pool (invoice.pdf, no Django needed);
+3. store: the files, through the invoice storage (database.storage);
+4. write: the Invoice rows with bulk_create, and ``invoices_created`` so
+   statistics, the activity feed and the dashboard cache follow, all in
+   one transaction per chunk.
+
+A chunk is committed or not at all, and the next run only sees the
+shipments still without an invoice: an interrupted run is resumed by
+running it again. The files of a chunk that was not written are left to
+``manage.py gc_invoice_files``: a stored file may be shared, so only the
+collector, which checks every invoice, deletes files.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from database import pricing
+from database.models import Client, Invoice, Shipment
+from database.sequences import reserve_ids
+from database.signals import invoices_created
+from database.stats import local_range
+from database.storage import invoice_storage
+
+from .pdf import render_invoice
+
+
+DEFAULT_CHUNK_SIZE = 200
+
+STAGES = ('select', 'render', 'store', 'write')
+
+
+class Report:
+    """Items and seconds per stage, and what the run did."""
+
+    def __init__(self):
+        self.items = dict.fromkeys(STAGES, 0)
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.created = 0
+        self.skipped = 0
+        self.revenue = Decimal('0')
+
+    def timed(self, stage, count, started):
+        self.items[stage] += count
+        self.seconds[stage] += time.perf_counter() - started
+
+    def throughput(self, stage):
+        seconds = self.seconds[stage]
+        return self.items[stage] / seconds if seconds else 0.0
+
+
+def period_shipments(start, end):
+    """Shipments of ``start``..``end`` (shipment date, or creation date when
+    there is none) that have no invoice yet."""
+    created_from, created_to = local_range(start, end)
+    return Shipment.objects.filter(
+        Q(shipment_date__range=(start, end))
+        | Q(shipment_date__isnull=True, date_creation__gte=created_from, date_creation__lt=created_to),
+        invoice__isnull=True,
+    )
+
+
+def _rows(queryset, after, limit):
+    queryset = pricing.annotate_prices(queryset)
+    if after:
+        queryset = queryset.filter(pk__gt=after)
+    return list(
+        queryset.order_by('pk').values(
+            'pk', 'package__client_id', 'package__tracking_number', 'origin', 'destination',
+            'distance', 'zone', 'speed', 'price_ht', 'price_tva', 'price_ttc',
+        )[:limit]
+    )
+
+
+def _payload(row, invoice_id, invoice_date, client):
+    surcharge = pricing.to_cents(pricing.surcharge(row['zone'], row['speed']))
+    ht = pricing.to_cents(row['price_ht'])
+    ttc = pricing.to_cents(row['price_ttc'])
+    return {
+        'invoice_id': invoice_id,
+        'invoice_date': invoice_date.isoformat(),
+        'client_name': f'{client.nom} {client.prenom}',
+        'client_address': [line for line in (client.adresse, client.ville, client.pays) if line],
+        'client_email': client.email,
+        'shipment_id': row['pk'],
+        'tracking_number': row['package__tracking_number'],
+        'origin': row['origin'],
+        'destination': row['destination'],
+        'distance': str(row['distance']),
+        'zone': row['zone'],
+        'speed': row['speed'],
+        'ht': str(ht),
+        # Printed lines add up to the total (rounding each one could be a
+        # cent off): the TVA line takes the difference.
+        'tva': str(ttc - ht - surcharge),
+        'surcharge': str(surcharge),
+        'ttc': str(ttc),
+    }
+
+
+def _file_name(invoice_id):
+    # The storage only keeps the folder and the extension: files are named
+    # after their content.
+    return Invoice._meta.get_field('invoice_pdf').generate_filename(None, f'{invoice_id}.pdf')
+
+
+def _write(invoices):
+    """Insert ``invoices``; return the ones written (a shipment invoiced by
+    someone else meanwhile is skipped)."""
+    try:
+        with transaction.atomic():
+            Invoice.objects.bulk_create(invoices)
+            invoices_created.send(sender=Invoice, invoices=invoices)
+        return invoices
+    except IntegrityError:
+        pass
+    taken = set(
+        Invoice.objects.filter(shipment_id__in=[invoice.shipment_id for invoice in invoices])
+        .values_list('shipment_id', flat=True)
+    )
+    invoices = [invoice for invoice in invoices if invoice.shipment_id not in taken]
+    with transaction.atomic():
+        Invoice.objects.bulk_create(invoices)
+        invoices_created.send(sender=Invoice, invoices=invoices)
+    return invoices
+
+
+def generate(start, end, invoice_date, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, limit=None, progress=None):
+    """Invoice the shipments of ``start``..``end``; return a Report.
+
+    ``workers``: render processes (None: one per CPU, 0: render in this
+    process). ``limit``: stop after that many invoices. ``progress(report)``
+    is called after each chunk.
+    """
+    report = Report()
+    queryset = period_shipments(start, end)
+    storage = invoice_storage()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 0 else None
+    after = None
+    try:
+        while limit is None or report.created < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - report.created)
+
+            started = time.perf_counter()
+            rows = _rows(queryset, after, size)
+            if not rows:
+                break
+            after = rows[-1]['pk']
+            clients = Client.objects.in_bulk({row['package__client_id'] for row in rows})
+            invoice_ids = reserve_ids(Invoice, len(rows))
+            payloads = [
+                _payload(row, invoice_id, invoice_date, clients[row['package__client_id']])
+                for row, invoice_id in zip(rows, invoice_ids)
+            ]
+            report.timed('select', len(rows), started)
+
+            started = time.perf_counter()
+            if pool is None:
+                documents = [render_invoice(payload) for payload in payloads]
+            else:
+                documents = list(pool.map(render_invoice, payloads, chunksize=max(1, len(payloads) // 32)))
+            report.timed('render', len(documents), started)
+
+            started = time.perf_counter()
+            names = [
+                storage.save(_file_name(invoice_id), ContentFile(document))
+                for invoice_id, document in zip(invoice_ids, documents)
+            ]
+            report.timed('store', len(names), started)
+
+            started = time.perf_counter()
+            invoices = [
+                Invoice(
+                    id_invoice=invoice_id,
+                    client=clients[row['package__client_id']],
+                    shipment_id=row['pk'],
+                    total_amount=pricing.to_cents(row['price_ttc']),
+                    invoice_date=invoice_date,
+                    invoice_pdf=name,
+                )
+                for row, invoice_id, name in zip(rows, invoice_ids, names)
+            ]
+            written = _write(invoices)
+            report.timed('write', len(written), started)
+
+            report.created += len(written)
+            report.skipped += len(invoices) - len(written)
+            report.revenue += sum((invoice.total_amount for invoice in written), Decimal('0'))
+            if progress:
+                progress(report)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return report
+
+
+def month_bounds(value):
+    """(first day, last day) of the month of ``value`` (a date)."""
+    first = value.replace(day=1)
+    following = (first + timedelta(days=32)).replace(day=1)
+    return first, following - timedelta(days=1)
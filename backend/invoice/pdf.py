@@ -0,0 +1,132 @@
+"""
+Minimal PDF writer for generated invoices (standard library only).
+
+Produces a one-page A4 PDF 1.4 document with the built-in Helvetica fonts
+(WinAnsi encoding, so French accents print) and a Flate-compressed content
+stream. ``render_invoice()`` only takes plain values, so it can run in a
+worker process without Django.
+"""
+import zlib
+
+
+PAGE_WIDTH = 595   # A4, in points
+PAGE_HEIGHT = 842
+MARGIN = 56
+
+COMPANY = 'SwiftShip'
+
+
+def _escape(text):
+    """PDF string literal for ``text`` (WinAnsi encoded)."""
+    raw = str(text).encode('cp1252', errors='replace')
+    raw = raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    return b'(' + raw.replace(b'\r', b'').replace(b'\n', b' ') + b')'
+
+
+class Page:
+    """Drawing operations of one page, in points from the bottom left."""
+
+    def __init__(self):
+        self.ops = []
+
+    def text(self, x, y, text, size=10, bold=False, align='left'):
+        font = b'/F2' if bold else b'/F1'
+        if align == 'right':
+            # Helvetica averages ~0.5 em per glyph: good enough for amounts.
+            x -= len(str(text)) * size * 0.5
+        self.ops.append(b'BT %s %d Tf %.2f %.2f Td %s Tj ET' % (font, size, x, y, _escape(text)))
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self.ops.append(b'%.2f w %.2f %.2f m %.2f %.2f l S' % (width, x1, y1, x2, y2))
+
+    def content(self):
+        return b'\n'.join(self.ops)
+
+
+def build_pdf(page, title=''):
+    """Serialize ``page`` into a complete PDF file (bytes)."""
+    stream = zlib.compress(page.content())
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+        b'/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>' % (PAGE_WIDTH, PAGE_HEIGHT),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream),
+        b'<< /Title %s /Producer %s >>' % (_escape(title), _escape(COMPANY)),
+    ]
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, len(objects), xref,
+    )
+    return bytes(out)
+
+
+def render_invoice(data):
+    """PDF bytes of one invoice.
+
+    ``data`` keys: invoice_id, invoice_date, client_name, client_address
+    (list of lines), client_email, shipment_id, tracking_number, origin,
+    destination, distance, zone, speed, ht, tva, ttc, surcharge.
+    """
+    page = Page()
+    right = PAGE_WIDTH - MARGIN
+    y = PAGE_HEIGHT - MARGIN
+
+    page.text(MARGIN, y - 10, COMPANY, size=22, bold=True)
+    page.text(right, y - 4, 'INVOICE', size=16, bold=True, align='right')
+    page.text(right, y - 22, data['invoice_id'], size=10, align='right')
+    page.text(right, y - 36, f"Date: {data['invoice_date']}", size=10, align='right')
+    y -= 80
+
+    page.text(MARGIN, y, 'Billed to', size=9, bold=True)
+    y -= 15
+    for line in [data['client_name'], *data['client_address'], data['client_email']]:
+        if line:
+            page.text(MARGIN, y, line, size=10)
+            y -= 13
+    y -= 20
+
+    page.text(MARGIN, y, 'Shipment', size=9, bold=True)
+    page.line(MARGIN, y - 5, right, y - 5)
+    y -= 22
+    rows = [
+        ('Shipment', data['shipment_id']),
+        ('Tracking number', data['tracking_number']),
+        ('From', data['origin'] or '-'),
+        ('To', data['destination'] or '-'),
+        ('Distance', f"{data['distance']} km"),
+        ('Service', f"{data['zone']} / {data['speed']}"),
+    ]
+    for label, value in rows:
+        page.text(MARGIN, y, label, size=10)
+        page.text(MARGIN + 150, y, value, size=10)
+        y -= 15
+    y -= 20
+
+    page.line(MARGIN, y + 12, right, y + 12)
+    amounts = [
+        ('Amount excl. tax (HT)', data['ht']),
+        ('Surcharges', data['surcharge']),
+        ('TVA (19%)', data['tva']),
+    ]
+    for label, value in amounts:
+        page.text(right - 200, y, label, size=10)
+        page.text(right, y, value, size=10, align='right')
+        y -= 15
+    page.line(right - 200, y + 8, right, y + 8, width=1)
+    y -= 8
+    page.text(right - 200, y, 'Total (TTC)', size=12, bold=True)
+    page.text(right, y, data['ttc'], size=12, bold=True, align='right')
+
+    page.text(MARGIN, MARGIN, f'{COMPANY} - generated invoice', size=8)
+    return build_pdf(page, title=f"Invoice {data['invoice_id']}")
@@ -1,3 +1,136 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import RequestFactory, SimpleTestCase
+
+from database.storage import ContentAddressedStorage
+
+from .downloads import parse_range, serve
+
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+
+
+class ParseRangeTests(SimpleTestCase):
+
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1024), (0, 99))
+        self.assertEqual(parse_range('bytes=1000-', 1024), (1000, 1023))
+        self.assertEqual(parse_range('bytes=1000-5000', 1024), (1000, 1023))
+        self.assertEqual(parse_range('bytes=-24', 1024), (1000, 1023))
+        self.assertEqual(parse_range('bytes=-5000', 1024), (0, 1023))
+
+    def test_ignored(self):
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 1024))
+        self.assertIsNone(parse_range('items=0-1', 1024))
+        self.assertIsNone(parse_range('bytes=-', 1024))
+
+    def test_unsatisfiable(self):
+        for header, size in [('bytes=1024-', 1024), ('bytes=5-2', 1024), ('bytes=-0', 1024),
+                             ('bytes=-5', 0), ('bytes=0-', 0)]:
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(ValueError):
+                    parse_range(header, size)
+
+
+class ServeTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = FileSystemStorage(location=self.location)
+        self.storage.save('invoice.pdf', ContentFile(CONTENT))
+        self.factory = RequestFactory()
+
+    def get(self, **headers):
+        request = self.factory.get('/download/', headers=headers)
+        return serve(request, self.storage, 'invoice.pdf', filename='INV00000001.pdf')
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('INV00000001.pdf', response['Content-Disposition'])
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_not_modified(self):
+        first = self.get()
+        response = self.get(if_none_match=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+        response = self.get(if_modified_since=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range(self):
+        response = self.get(range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+
+    def test_suffix_range(self):
+        response = self.get(range='bytes=-24')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 1000-1023/1024')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-24:])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(range='bytes=2048-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_suffix_range_of_empty_file(self):
+        self.storage.save('empty.pdf', ContentFile(b''))
+        request = self.factory.get('/download/', headers={'range': 'bytes=-5'})
+        response = serve(request, self.storage, 'empty.pdf', filename='empty.pdf')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_multiple_ranges_send_whole_file(self):
+        response = self.get(range='bytes=0-9,20-29')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+        response = self.get(range='bytes=0-9', if_range=etag)
+        self.assertEqual(response.status_code, 206)
+        # Changed since: the whole (new) file, not a slice of it.
+        response = self.get(range='bytes=0-9', if_range='"0-0"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+
+class ContentAddressedServeTests(SimpleTestCase):
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.storage = ContentAddressedStorage(location=location)
+        self.name = self.storage.save('invoices/a.pdf', ContentFile(CONTENT))
+        self.factory = RequestFactory()
+
+    def get(self, **headers):
+        request = self.factory.get('/download/', headers=headers)
+        return serve(request, self.storage, self.name, filename='INV00000001.pdf')
+
+    def test_etag_is_the_digest(self):
+        response = self.get()
+        self.assertEqual(response['ETag'], f'"{self.storage.digest_of(self.name)}"')
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_resave_keeps_validators(self):
+        etag = self.get()['ETag']
+        os.utime(self.storage.path(self.name), (1, 1))
+        self.assertEqual(self.storage.save('invoices/b.pdf', ContentFile(CONTENT)), self.name)
+        self.assertEqual(self.get(if_none_match=etag).status_code, 304)
+        self.assertEqual(self.get(range='bytes=0-9', if_range=etag).status_code, 206)
+
+    def test_digest_of_other_names(self):
+        self.assertIsNone(self.storage.digest_of('invoices/legacy.pdf'))
+        self.assertIsNone(self.storage.digest_of('invoices/' + os.path.basename(self.name)))
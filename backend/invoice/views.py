@@ -1,4 +1,4 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import get_object_or_404
 from django.http import JsonResponse, HttpResponse
 from database.models import Invoice, Client, Shipment
 from database.models import Client
@@ -7,17 +7,14 @@ from .forms import InvoiceForm
 from django.utils import timezone
 import os
 from django.conf import settings
-from django.http import FileResponse
+from django.core.files.storage import FileSystemStorage
+from dashboard.views import invoices as dashboard_invoices
+from .downloads import serve
 
 def invoice_list(request):
-    invoices = Invoice.objects.all()
-    clients = Client.objects.all()
-    shipments = Shipment.objects.all()
-    return render(request, 'invoices.html', {
-        'invoices': invoices,
-        'clients': clients,
-        'shipments': shipments,
-    })
+    # This route shadows dashboard.views.invoices: render the same paginated
+    # page, with capped dropdowns (see dashboard/choices.py).
+    return dashboard_invoices(request)
 
 def invoice_add(request):
     if request.method == 'POST':
@@ -65,15 +62,15 @@ def invoice_download(request, invoice_id):
     if not invoice.invoice_pdf:
         return HttpResponse("No PDF attached to this invoice", status=404)
 
-    if not os.path.exists(invoice.invoice_pdf.path):
+    storage = invoice.invoice_pdf.storage
+    if not storage.exists(invoice.invoice_pdf.name):
         return HttpResponse("PDF missing on server", status=404)
 
-    with open(invoice.invoice_pdf.path, 'rb') as f:
-        response = HttpResponse(f.read(), content_type='application/pdf')
-        response['Content-Disposition'] = (
-            f'attachment; filename="{os.path.basename(invoice.invoice_pdf.name)}"'
-        )
-        return response
+    return serve(
+        request, storage, invoice.invoice_pdf.name,
+        # Stored names are content hashes: name the download after the invoice.
+        filename=invoice.pk + os.path.splitext(invoice.invoice_pdf.name)[1],
+    )
 
 
 def shipment_amounts(request, shipment_id):
@@ -86,15 +83,7 @@ def shipment_amounts(request, shipment_id):
     return JsonResponse(data)
 
 def download_blank_invoice(request):
-    file_path = os.path.join(
-        settings.BASE_DIR,
-        'static',
-        'blank_invoice',
-        'SwiftShip Invoice.pdf'
-    )
-
-    return FileResponse(
-        open(file_path, 'rb'),
-        as_attachment=True,
-        filename='SwiftShip_Invoice.pdf'
+    storage = FileSystemStorage(
+        location=os.path.join(settings.BASE_DIR, 'static', 'blank_invoice')
     )
+    return serve(request, storage, 'SwiftShip Invoice.pdf', filename='SwiftShip_Invoice.pdf')
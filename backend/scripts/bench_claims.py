@@ -0,0 +1,176 @@
+"""
+Contention benchmark: many drivers claiming the same shipments at once.
+
+Creates ``--shipments`` unassigned shipments for today, then lets
+``--drivers`` threads (one database connection each, like a threaded
+server) race to claim them, ``--batch`` shipments per request, with:
+
+- lock: the former claim_shipment (transaction + select_for_update() +
+  save());
+- update: driver.claims (one conditional UPDATE per shipment).
+
+Each run reports the throughput, the latency and the errors (ex: ``database
+is locked``), and checks that every shipment ended up with exactly one
+driver. The shipments are deleted at the end.
+
+Usage (from the backend folder, on a development database):
+
+    python scripts/bench_claims.py
+    python scripts/bench_claims.py --drivers 20 --shipments 400 --batch 5
+    python scripts/bench_claims.py --mode update
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+
+import django
+
+# ensure we're running from backend folder
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(BASE_DIR)
+sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import DatabaseError, connection, transaction  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from database.intake import import_shipments  # noqa: E402
+from database.models import Chauffeur, Client, Package, Shipment  # noqa: E402
+from driver import claims  # noqa: E402
+
+
+def create_pool(count):
+    client = Client.objects.first()
+    if client is None:
+        sys.exit('No client in the database: cannot create shipments.')
+    today = timezone.localdate().isoformat()
+    rows = ({'client_id': client.pk, 'date': today, 'destination': 'Benchmark'} for _ in range(count))
+    ids = [result['id_shipment'] for result in import_shipments(rows) if result['success']]
+    if len(ids) != count:
+        sys.exit(f'Could not create the benchmark shipments ({len(ids)}/{count}).')
+    return ids
+
+
+def delete_pool(ids):
+    package_ids = list(Shipment.objects.filter(pk__in=ids).values_list('package_id', flat=True))
+    Package.objects.filter(pk__in=package_ids).delete()
+
+
+def claim_with_lock(driver, shipment_ids):
+    """The claim path replaced by driver.claims, one shipment at a time."""
+    results = {}
+    for shipment_id in shipment_ids:
+        with transaction.atomic():
+            shipment = Shipment.objects.select_for_update().get(id_shipment=shipment_id)
+            if shipment.driver:
+                results[shipment_id] = claims.ALREADY_ASSIGNED
+                continue
+            shipment.driver = driver
+            shipment.save()
+            results[shipment_id] = claims.CLAIMED
+    return results
+
+
+CLAIMERS = {
+    'lock': claim_with_lock,
+    'update': claims.claim,
+}
+
+
+def run(mode, drivers, pool, batch):
+    claim = CLAIMERS[mode]
+    Shipment.objects.filter(pk__in=pool).update(driver=None)
+    start = threading.Barrier(len(drivers))
+    latencies, errors, won = [], Counter(), Counter()
+    lock = threading.Lock()
+
+    def work(driver):
+        # Every driver goes through the whole pool, in its own order.
+        order = pool[:]
+        random.shuffle(order)
+        start.wait()
+        try:
+            for i in range(0, len(order), batch):
+                started = time.perf_counter()
+                try:
+                    results = claim(driver, order[i:i + batch])
+                except DatabaseError as e:
+                    with lock:
+                        errors[type(e).__name__ + ': ' + str(e)[:60]] += 1
+                    continue
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    for shipment_id, outcome in results.items():
+                        if outcome == claims.CLAIMED:
+                            won[shipment_id] += 1
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=work, args=(driver,)) for driver in drivers]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    assigned = Shipment.objects.filter(pk__in=pool, driver__isnull=False).count()
+    return {
+        'wall': wall,
+        'latencies': latencies,
+        'errors': errors,
+        'claimed': sum(won.values()),
+        'double': sum(1 for count in won.values() if count > 1),
+        'assigned': assigned,
+    }
+
+
+def report(mode, result, pool_size):
+    latencies = sorted(result['latencies'])
+    requests = len(latencies) + sum(result['errors'].values())
+    print(f'\n{mode}: {requests} requests in {result["wall"]:.2f}s ({requests / result["wall"]:.0f} req/s)')
+    if latencies:
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+        print(f'  latency p50 {statistics.median(latencies) * 1000:.1f} ms, '
+              f'p95 {p95 * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms')
+    print(f'  shipments claimed: {result["claimed"]} reported, {result["assigned"]}/{pool_size} assigned, '
+          f'{result["double"]} claimed twice')
+    for error, count in result['errors'].most_common():
+        print(f'  {count} x {error}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--mode', choices=['both', *CLAIMERS], default='both')
+    parser.add_argument('--drivers', type=int, default=20, help='concurrent drivers (threads)')
+    parser.add_argument('--shipments', type=int, default=200, help='shipments to fight over')
+    parser.add_argument('--batch', type=int, default=1, help='shipments per claim request')
+    args = parser.parse_args()
+
+    drivers = list(Chauffeur.objects.all()[:args.drivers])
+    if not drivers:
+        sys.exit('No driver in the database.')
+    if len(drivers) < args.drivers:
+        # Fewer drivers than threads: some drivers claim from two devices.
+        drivers = [drivers[i % len(drivers)] for i in range(args.drivers)]
+    batch = max(1, min(args.batch, claims.CLAIM_BATCH_MAX_SIZE))
+
+    pool = create_pool(args.shipments)
+    print(f'{len(drivers)} drivers, {len(pool)} shipments, {batch} per request, {connection.vendor}')
+    try:
+        for mode in (CLAIMERS if args.mode == 'both' else [args.mode]):
+            report(mode, run(mode, drivers, pool, batch), len(pool))
+    finally:
+        delete_pool(pool)
+
+
+if __name__ == '__main__':
+    main()
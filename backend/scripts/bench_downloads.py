@@ -0,0 +1,108 @@
+"""
+Benchmark: memory of an invoice download, read() vs invoice.downloads.
+
+Writes PDF-sized files of growing size in a temporary folder and serves
+each one, the response fully consumed as a WSGI server would:
+
+- read: the former view, HttpResponse(f.read()), the whole file in memory;
+- stream: invoice.downloads.serve(), FileResponse in blocks;
+- range: serve() for a 1 MB slice in the middle of the file.
+
+Peak Python memory (tracemalloc) is reported per request: it grows with the
+file for ``read`` and stays at one block for ``stream`` and ``range``.
+
+Usage (from the backend folder):
+
+    python scripts/bench_downloads.py
+    python scripts/bench_downloads.py --sizes 1,16,64 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import django
+
+# ensure we're running from backend folder
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(BASE_DIR)
+sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.core.files.storage import FileSystemStorage  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from invoice.downloads import serve  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def by_read(request, storage, name):
+    with open(storage.path(name), 'rb') as f:
+        response = HttpResponse(f.read(), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{name}"'
+        return response
+
+
+def by_stream(request, storage, name):
+    return serve(request, storage, name, filename=name)
+
+
+def consume(response):
+    sent = 0
+    for chunk in response:
+        sent += len(chunk)
+    response.close()
+    return sent
+
+
+def measure(view, request, storage, name, repeat):
+    best = None
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        sent = consume(view(request, storage, name))
+        elapsed = time.perf_counter() - started
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+    return sent, peak, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='1,8,32,128', help='file sizes in MB, comma separated')
+    parser.add_argument('--repeat', type=int, default=3, help='requests per case (best time kept)')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    repeat = max(1, args.repeat)
+
+    factory = RequestFactory()
+    with tempfile.TemporaryDirectory() as folder:
+        storage = FileSystemStorage(location=folder)
+        print(f'{"size":>6} {"path":7} {"sent":>12} {"peak memory":>12} {"time":>9}')
+        for size in sizes:
+            name = f'invoice-{size}mb.pdf'
+            with open(os.path.join(folder, name), 'wb') as f:
+                for _ in range(size):
+                    f.write(os.urandom(MB))
+
+            start = max(0, size * MB // 2 - MB // 2)
+            cases = (
+                ('read', by_read, factory.get('/')),
+                ('stream', by_stream, factory.get('/')),
+                ('range', by_stream, factory.get('/', HTTP_RANGE=f'bytes={start}-{start + MB - 1}')),
+            )
+            for label, view, request in cases:
+                sent, peak, elapsed = measure(view, request, storage, name, repeat)
+                print(f'{size:>4}MB {label:7} {sent:>12,} {peak / 1024:>10,.0f}KB {elapsed * 1000:>7.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: pricing a set of shipments, per object vs database.pricing.
+
+Prices the shipments matching ``--month`` (or every shipment) with:
+
+- objects: Shipment instances and montant_ht/tva/ttc (the former path);
+- rows: price() over values_list() rows, no model instances;
+- sql: annotate_prices(), the amounts computed by the database;
+- totals: totals(), one aggregate query.
+
+All the results are compared: amounts and totals must be identical.
+
+Usage (from the backend folder):
+
+    python scripts/bench_pricing.py
+    python scripts/bench_pricing.py --month 2026-01 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+import django
+
+# ensure we're running from backend folder
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(BASE_DIR)
+sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from database import pricing  # noqa: E402
+from database.models import Shipment  # noqa: E402
+
+
+def by_objects(queryset):
+    return {
+        shipment.pk: (shipment.montant_ht(), shipment.montant_tva(), shipment.montant_ttc())
+        for shipment in queryset
+    }
+
+
+def by_rows(queryset):
+    return pricing.price_rows(queryset.values_list('pk', 'distance', 'zone', 'speed'))
+
+
+def by_sql(queryset):
+    rows = pricing.annotate_prices(queryset).values_list('pk', 'price_ht', 'price_tva', 'price_ttc')
+    return {pk: (ht, tva, ttc) for pk, ht, tva, ttc in rows}
+
+
+def timed(function, queryset, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(queryset)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--month', help='YYYY-MM, on the creation date (default: every shipment)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per path (best time kept)')
+    args = parser.parse_args()
+
+    queryset = Shipment.objects.all()
+    if args.month:
+        month = datetime.strptime(args.month, '%Y-%m')
+        queryset = queryset.filter(date_creation__year=month.year, date_creation__month=month.month)
+    repeat = max(1, args.repeat)
+
+    results = {}
+    for name, function in (('objects', by_objects), ('rows', by_rows), ('sql', by_sql)):
+        results[name], elapsed = timed(function, queryset, repeat)
+        print(f'{name:8} {len(results[name])} shipments in {elapsed * 1000:.1f} ms')
+    total, elapsed = timed(pricing.totals, queryset, repeat)
+    print(f'{"totals":8} {total["count"]} shipments in {elapsed * 1000:.1f} ms')
+
+    reference = results['objects']
+    for name in ('rows', 'sql'):
+        # Same values and same exponent (str), not only numerically equal.
+        mismatches = [
+            pk for pk, amounts in reference.items()
+            if [str(a) for a in results[name].get(pk, ())] != [str(a) for a in amounts]
+        ]
+        print(f'{name}: {"identical" if not mismatches else f"{len(mismatches)} mismatch(es), ex: {mismatches[:3]}"}')
+
+    summed = [sum((amounts[i] for amounts in reference.values()), Decimal('0')) for i in range(3)]
+    same = summed == [total['ht'], total['tva'], total['ttc']]
+    print(f'totals: {"identical" if same else "MISMATCH"} (TTC {total["ttc"]})')
+
+
+if __name__ == '__main__':
+    main()
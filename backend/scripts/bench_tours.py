@@ -0,0 +1,119 @@
+"""
+Benchmark: tour planning on thousands of synthetic shipments (no database).
+
+Generates ``--shipments`` stops and ``--drivers`` vehicles, then times the
+steps of driver.tours (assignment by capacity, nearest neighbour, 2-opt) and
+compares the total distance with the stops taken in creation (id) order,
+the order drivers see them in today.
+
+Two metrics:
+
+- road: the proxy used in production (destination + km from the depot);
+- euclidean: random coordinates, where the route ordering matters most.
+
+Usage (from the backend folder):
+
+    python scripts/bench_tours.py
+    python scripts/bench_tours.py --shipments 5000 --drivers 100 --metric euclidean
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+import django
+
+# ensure we're running from backend folder
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(BASE_DIR)
+sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from driver import tours  # noqa: E402
+
+
+class Driver:
+    def __init__(self, pk):
+        self.pk = pk
+
+
+# Synthetic coordinates for the euclidean metric, by shipment id.
+POSITIONS = {None: (0.0, 0.0)}
+
+
+def euclidean(a, b):
+    (xa, ya), (xb, yb) = POSITIONS[a.shipment_id], POSITIONS[b.shipment_id]
+    return math.hypot(xa - xb, ya - yb)
+
+
+def synthetic_stops(count, cities, rng):
+    towns = [(f'city {i}', rng.uniform(5, 300), rng.uniform(0, 2 * math.pi)) for i in range(cities)]
+    stops = []
+    for i in range(count):
+        name, km, angle = rng.choice(towns)
+        distance = max(0.5, rng.gauss(km, km * 0.05))
+        angle += rng.gauss(0, 0.03)
+        shipment_id = f'SHP{i:08d}'
+        POSITIONS[shipment_id] = (distance * math.cos(angle), distance * math.sin(angle))
+        weight = Decimal(str(round(rng.uniform(0.5, 40), 2)))
+        stops.append(tours.Stop(shipment_id, name, round(distance, 2), weight))
+    return stops
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--shipments', type=int, default=3000)
+    parser.add_argument('--drivers', type=int, default=60)
+    parser.add_argument('--cities', type=int, default=40)
+    parser.add_argument('--capacity', type=Decimal, default=Decimal('1200'), help='kg per vehicle')
+    parser.add_argument('--max-stops', type=int, default=tours.DEFAULT_MAX_STOPS)
+    parser.add_argument('--metric', choices=['road', 'euclidean'], default='road')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    distance = tours.road_distance if args.metric == 'road' else euclidean
+    stops = synthetic_stops(args.shipments, args.cities, rng)
+    plans = [tours.TourPlan(Driver(f'CH{i:06d}'), args.capacity) for i in range(args.drivers)]
+
+    started = time.perf_counter()
+    unplanned = tours.assign(stops, plans, args.max_stops)
+    plans = [plan for plan in plans if plan.stops]
+    assigned = time.perf_counter() - started
+
+    naive = nn = opt = 0.0
+    matrix_time = nn_time = opt_time = 0.0
+    for plan in plans:
+        started = time.perf_counter()
+        matrix = tours.distance_matrix(plan.stops, distance)
+        matrix_time += time.perf_counter() - started
+        by_id = sorted(range(1, len(plan.stops) + 1), key=lambda i: plan.stops[i - 1].shipment_id)
+        naive += tours.route_length([0, *by_id, 0], matrix)
+        started = time.perf_counter()
+        route = tours.nearest_neighbour(matrix)
+        nn_time += time.perf_counter() - started
+        nn += tours.route_length(route, matrix)
+        started = time.perf_counter()
+        route = tours.two_opt(route, matrix)
+        opt_time += time.perf_counter() - started
+        opt += tours.route_length(route, matrix)
+
+    planned = sum(len(plan.stops) for plan in plans)
+    print(f'{args.shipments} shipments, {args.drivers} drivers x {args.capacity} kg, '
+          f'max {args.max_stops} stops, {args.metric} metric')
+    print(f'  assignment: {assigned * 1000:.0f} ms, {len(plans)} tours, {planned} planned, {len(unplanned)} unplanned')
+    print(f'  distance matrices: {matrix_time * 1000:.0f} ms')
+    print(f'  nearest neighbour: {nn_time * 1000:.0f} ms')
+    print(f'  2-opt: {opt_time * 1000:.0f} ms')
+    print(f'  total distance: {naive:.0f} km in id order, {nn:.0f} km nearest neighbour '
+          f'({(1 - nn / naive) * 100 if naive else 0:.1f}% shorter), {opt:.0f} km after 2-opt '
+          f'({(1 - opt / naive) * 100 if naive else 0:.1f}% shorter)')
+
+
+if __name__ == '__main__':
+    main()
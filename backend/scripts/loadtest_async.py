@@ -0,0 +1,126 @@
+"""
+Load test: the hot read endpoints served through WSGI vs ASGI.
+
+Both runs hit the same database and the same URLs in-process (no network):
+
+- wsgi: a pool of ``--workers`` threads, each request going through the WSGI
+  handler like a threaded WSGI server;
+- asgi: ``--concurrency`` requests in flight on one event loop, through the
+  ASGI handler like uvicorn.
+
+Usage (from the backend folder):
+
+    python scripts/loadtest_async.py
+    python scripts/loadtest_async.py --requests 2000 --workers 8 --concurrency 64
+    python scripts/loadtest_async.py --endpoint track --no-cache
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+# ensure we're running from backend folder
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(BASE_DIR)
+sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.test import AsyncClient, Client, override_settings  # noqa: E402
+
+from database.models import Package  # noqa: E402
+
+
+def build_urls(endpoint, count):
+    """``count`` request paths for ``endpoint``, cycling over real tracking numbers."""
+    if endpoint == 'track':
+        numbers = list(Package.objects.values_list('tracking_number', flat=True)[:500])
+        if not numbers:
+            sys.exit('No package in the database: nothing to track.')
+        return [f'/client/track/?number={numbers[i % len(numbers)]}' for i in range(count)]
+    if endpoint == 'data':
+        return ['/dashboard/data/'] * count
+    if endpoint == 'shipments':
+        return ['/dashboard/shipments/json/?limit=50'] * count
+    raise ValueError(endpoint)
+
+
+def run_wsgi(urls, workers):
+    local = threading.local()
+
+    def fetch(url):
+        # One test client (WSGI handler) per worker thread.
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        client = local.client
+        started = time.perf_counter()
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fetch, urls))
+
+
+async def _run_asgi(urls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    client = AsyncClient()
+
+    async def fetch(url):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(url)
+            if response.streaming:
+                async for _ in response.streaming_content:
+                    pass
+            return response.status_code, time.perf_counter() - started
+
+    return await asyncio.gather(*(fetch(url) for url in urls))
+
+
+def run_asgi(urls, concurrency):
+    return asyncio.run(_run_asgi(urls, concurrency))
+
+
+def report(name, results, elapsed):
+    latencies = sorted(latency for _, latency in results)
+    errors = sum(1 for status, _ in results if status >= 400)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    print(
+        f'{name:5} {len(results):6d} req  {len(results) / elapsed:8.1f} req/s  '
+        f'p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms  '
+        f'errors {errors}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', choices=('track', 'data', 'shipments', 'all'), default='all')
+    parser.add_argument('--requests', type=int, default=500, help='requests per endpoint and mode')
+    parser.add_argument('--workers', type=int, default=4, help='WSGI worker threads')
+    parser.add_argument('--concurrency', type=int, default=50, help='ASGI requests in flight')
+    parser.add_argument('--no-cache', action='store_true', help='disable the dashboard KPI cache')
+    args = parser.parse_args()
+
+    endpoints = ('track', 'data', 'shipments') if args.endpoint == 'all' else (args.endpoint,)
+    overrides = {'DASHBOARD_KPI_CACHE_TTL': 0} if args.no_cache else {}
+    with override_settings(**overrides):
+        for endpoint in endpoints:
+            urls = build_urls(endpoint, args.requests)
+            print(f'-- {endpoint}: {urls[0]}')
+            for name, run, width in (('wsgi', run_wsgi, args.workers), ('asgi', run_asgi, args.concurrency)):
+                started = time.perf_counter()
+                results = run(urls, width)
+                report(name, results, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    main()
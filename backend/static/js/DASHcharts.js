@@ -4,8 +4,28 @@ document.addEventListener('DOMContentLoaded', function() {
     updateDashboardStats();
     renderDashboardCharts();
     loadRecentActivity();
+    listenForLiveEvents();
 });
 
+// ---------- Live updates (server-sent events) ----------
+let liveRefreshTimer = null;
+
+function listenForLiveEvents() {
+    if (!window.EventSource) return;
+    const source = new EventSource('/dashboard/events/');
+    // A burst of events (ex: a bulk status change) triggers one refresh.
+    const refresh = () => {
+        clearTimeout(liveRefreshTimer);
+        liveRefreshTimer = setTimeout(() => {
+            updateDashboardStats();
+            loadRecentActivity();
+        }, 500);
+    };
+    ['shipment_status', 'shipment_claimed', 'incident_created', 'resync'].forEach(type => {
+        source.addEventListener(type, refresh);
+    });
+}
+
 // ---------- Dashboard stats ----------
 function updateDashboardStats() {
     fetch('/dashboard/data/')
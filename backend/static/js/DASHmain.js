@@ -15,4 +15,48 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 
     console.log('SwiftShip Dashboard initialized successfully!');
-});
\ No newline at end of file
+});
+// Form dropdowns with data-choices="<kind>" only hold the first options:
+// a search box above them loads the matching ones (/dashboard/choices/).
+function setChoice(select, value, label) {
+    if (value && !Array.from(select.options).some(option => option.value === value)) {
+        select.add(new Option(label || value, value));
+    }
+    select.value = value || '';
+}
+
+function initChoiceSearch(select) {
+    const search = document.createElement('input');
+    search.type = 'search';
+    search.className = 'choice-search';
+    search.placeholder = 'Search...';
+    select.parentNode.insertBefore(search, select);
+
+    let timer = null;
+    search.addEventListener('input', function() {
+        clearTimeout(timer);
+        timer = setTimeout(() => {
+            const url = `/dashboard/choices/${select.dataset.choices}/?q=${encodeURIComponent(search.value)}`;
+            fetch(url)
+                .then(response => response.json())
+                .then(data => {
+                    if (!data.success) return;
+                    const selected = select.selectedOptions[0];
+                    // Keep the placeholder and the current selection.
+                    Array.from(select.options).forEach(option => {
+                        if (option.value && option !== selected) option.remove();
+                    });
+                    data.choices.forEach(choice => {
+                        if (!selected || choice.id !== selected.value) {
+                            select.add(new Option(choice.label, choice.id));
+                        }
+                    });
+                })
+                .catch(err => console.error('Error loading choices:', err));
+        }, 250);
+    });
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('select[data-choices]').forEach(initChoiceSearch);
+});
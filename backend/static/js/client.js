@@ -24,7 +24,12 @@ document.addEventListener('DOMContentLoaded', function () {
             }
 
             console.log('client.js: fetching /client/track/ for', trackingNumber);
-            fetch('/client/track/?number=' + encodeURIComponent(trackingNumber), { cache: 'no-store' })
+            // Jeton signé rendu par la page: pas de session lue côté serveur
+            var tokenMeta = document.querySelector('meta[name="api-token"]');
+            fetch('/client/track/?number=' + encodeURIComponent(trackingNumber), {
+                cache: 'no-store',
+                headers: tokenMeta ? { 'Authorization': 'Bearer ' + tokenMeta.content } : {}
+            })
                 .then(function (res) {
                     console.log('client.js: fetch response', res.status, res);
                     // show status in debug area
@@ -14,6 +14,17 @@ window.claimShipment = function(shipmentId, el) {
     }
 }
 
+/* =========================
+   API TOKEN
+   Signed token rendered by the page: the AJAX calls send it as a bearer
+   token, so the server neither loads the session nor checks CSRF.
+========================= */
+function authHeaders(headers) {
+    const meta = document.querySelector('meta[name="api-token"]');
+    if (meta && meta.content) headers['Authorization'] = 'Bearer ' + meta.content;
+    return headers;
+}
+
 /* =========================
    CSRF HELPER
 ========================= */
@@ -55,10 +66,10 @@ document.addEventListener('click', function (e) {
 
         fetch('/driver/claim/', {
             method: 'POST',
-            headers: {
+            headers: authHeaders({
                 'X-CSRFToken': getCookie('csrftoken'),
                 'Content-Type': 'application/x-www-form-urlencoded',
-            },
+            }),
             credentials: 'same-origin',
             body: new URLSearchParams({
                 shipment_id: shipmentId
@@ -113,10 +124,10 @@ document.addEventListener('click', function (e) {
 
     fetch('/driver/update_status/', {
         method: 'POST',
-        headers: {
+        headers: authHeaders({
             'X-CSRFToken': getCookie('csrftoken'),
             'Content-Type': 'application/x-www-form-urlencoded',
-        },
+        }),
         credentials: 'same-origin',
         body: new URLSearchParams({
             shipment_id: shipmentId,
@@ -146,3 +157,17 @@ document.addEventListener('click', function (e) {
         console.error('driver-script click handler error', err);
     }
 });
+
+/* =========================
+   LIVE UPDATES (SSE)
+========================= */
+if (window.EventSource) {
+    const liveEvents = new EventSource('/driver/events/');
+    // Someone claimed a shipment: drop it from the unassigned list.
+    liveEvents.addEventListener('shipment_claimed', function (e) {
+        const data = JSON.parse(e.data);
+        const btn = document.querySelector(`button.claim-bt[data-shipment-id="${data.object_id}"]`);
+        const card = btn ? btn.closest('.inner-card') : null;
+        if (card) card.remove();
+    });
+}